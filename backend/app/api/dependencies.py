@@ -1,5 +1,11 @@
-from fastapi import Header, HTTPException
+from fastapi import Depends, Header, HTTPException, Request
 from typing import Optional
+import hashlib
+import hmac
+import math
+
+from app.core.admission import get_rate_limiter
+from config import settings
 
 
 async def verify_api_key(x_api_key: Optional[str] = Header(None)):
@@ -17,3 +23,53 @@ async def get_user_context(x_user_id: Optional[str] = Header(None)):
     Optional user context extraction
     """
     return {"user_id": x_user_id} if x_user_id else None
+
+
+async def enforce_rate_limit(
+    request: Request,
+    api_key: Optional[str] = Depends(verify_api_key),
+    user: Optional[dict] = Depends(get_user_context),
+):
+    """
+    Per-client token bucket for chat turns, keyed by API key, else user,
+    else client address
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    if api_key:
+        # Never keep raw keys in the (possibly shared) bucket store
+        client = "key:" + hashlib.sha256(api_key.encode()).hexdigest()[:32]
+    elif user:
+        client = f"user:{user['user_id']}"
+    else:
+        client = f"ip:{request.client.host if request.client else 'unknown'}"
+
+    retry_after = await get_rate_limiter().check(client)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def check_admin_key(key: Optional[str]):
+    """Admin surfaces need ADMIN_API_KEY set and presented in X-Admin-Key"""
+    expected = settings.ADMIN_API_KEY
+    if not expected or not key or not hmac.compare_digest(key, expected):
+        raise HTTPException(status_code=403, detail="Admin key required")
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    """Guard for admin-only routes"""
+    check_admin_key(x_admin_key)
+
+
+async def require_profiling(x_admin_key: Optional[str] = Header(None)):
+    """
+    Guard for the profiler: hidden unless PROFILING_ENABLED, admin only
+    """
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    check_admin_key(x_admin_key)
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Literal, Optional
+import asyncio
+import os
+
+from app.api.dependencies import require_profiling
+from app.core.profiler import ProfilerBusyError, create_profiler
+from config import settings
+
+router = APIRouter(dependencies=[Depends(require_profiling)])
+
+
+@router.get("/admin/profile")
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000),
+    include_idle: bool = False,
+):
+    """
+    Sample every thread of the worker that serves this request for
+    `seconds`, then return collapsed stacks (flamegraph.pl) or a
+    speedscope file. Threads parked idle are left out unless
+    `include_idle`. With several workers, repeat to reach the others
+    (X-Profile-PID says which one answered).
+    """
+    profiler = create_profiler(interval_ms, include_idle)
+    try:
+        profiler.start()
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(min(seconds, settings.PROFILING_MAX_SECONDS))
+    finally:
+        profiler.stop()
+
+    summary = profiler.summary()
+    headers = {
+        "X-Profile-PID": str(os.getpid()),
+        "X-Profile-Duration": str(summary["duration_s"]),
+        "X-Profile-Ticks": str(summary["ticks"]),
+    }
+    if format == "speedscope":
+        headers["Content-Disposition"] = (
+            f'attachment; filename="profile-{os.getpid()}.speedscope.json"'
+        )
+        return JSONResponse(
+            profiler.speedscope(name=f"worker {os.getpid()}"), headers=headers
+        )
+    return PlainTextResponse(profiler.collapsed(), headers=headers)
@@ -1,155 +1,357 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
 from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
-from typing import List
-import json
+from contextlib import nullcontext
+from typing import List, Literal, Optional
+import asyncio
 import logging
-from datetime import datetime, timezone
 
-from app.models.schemas import ChatRequest, ChatResponse, ChatMessage, StreamChunk
+from app.api.dependencies import enforce_rate_limit, require_profiling
+from app.models.schemas import ChatRequest, ChatResponse, ChatMessage, StreamEvent
+from app.core.admission import OverloadedError, get_concurrency_limiter
+from app.core.metrics import TIME_TO_FIRST_CHUNK
 from app.core.orchestrator import get_orchestrator
-from app.services.database import get_db
+from app.core.profiler import ProfilerBusyError, create_profiler
+from app.core.resilience import CircuitOpenError
+from app.core.tracing import Trace, activate, start_trace
+from app.services.database import SessionLocal, get_db
+from app.services.history import (
+    decode_cursor,
+    fetch_page,
+    iter_history,
+    parse_fields,
+)
+from app.services.stream_buffer import get_stream_manager
+from app.services.usage import usage_conversation
+from app.services.conversation_store import get_conversation_store
+from app.services.persistence import get_conversation_writer, message_record
 from app.models.database_models import Conversation, Message
+from app.utils.sse import SSEWriter, dumps
+from config import settings
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+TIMEOUT_DETAIL = "The assistant took too long to respond, please try again"
 
-@router.post("/chat/message", response_model=ChatResponse)
-async def send_message(request: ChatRequest, db: Session = Depends(get_db)):
+
+@router.post(
+    "/chat/message",
+    response_model=ChatResponse,
+    dependencies=[Depends(enforce_rate_limit)],
+)
+async def send_message(request: ChatRequest, x_admin_key: Optional[str] = Header(None)):
     """
     Send a chat message and get response (non-streaming)
     """
+    profiler = None
+    if request.profile:
+        await require_profiling(x_admin_key)
+        profiler = create_profiler()
+
     try:
         orchestrator = get_orchestrator()
+        conversation_id = _resolve_conversation_id(request)
 
         # Process message
-        response = await orchestrator.process_message(
-            message=request.message, conversation_history=request.conversation_history
-        )
-
-        # Store conversation in database
-        conversation_id = request.conversation_id or str(uuid4())
-
-        # Get or create conversation
-        conversation = (
-            db.query(Conversation)
-            .filter(Conversation.conversation_id == conversation_id)
-            .first()
-        )
-
-        if not conversation:
-            conversation = Conversation(conversation_id=conversation_id)
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-
-        # Store user message
-        user_message = Message(
-            conversation_id=conversation.id,
-            role="user",
-            content=request.message,
-            timestamp=datetime.now(timezone.utc),
-        )
-        db.add(user_message)
-
-        # Store assistant message
-        assistant_message = Message(
-            conversation_id=conversation.id,
-            role="assistant",
-            content=response.message,
-            message_metadata={
-                "products": [p.dict() for p in response.products]
-                if response.products
-                else None,
-                "compatibility": response.compatibility.dict()
-                if response.compatibility
-                else None,
-            },
-            timestamp=datetime.now(timezone.utc),
+        async with get_concurrency_limiter().admit():
+            with start_trace(
+                "chat.message", conversation_id=conversation_id
+            ) as trace, usage_conversation(conversation_id), profiler or nullcontext():
+                response = await orchestrator.process_message(
+                    message=request.message,
+                    conversation_history=request.conversation_history,
+                    conversation_id=request.conversation_id,
+                )
+
+        if _debug(request):
+            response.metadata = {
+                **(response.metadata or {}),
+                "trace": trace.breakdown(),
+            }
+        if profiler is not None:
+            # Every thread of the worker, not only this request's work
+            response.metadata = {
+                **(response.metadata or {}),
+                "profile": {**profiler.summary(), "collapsed": profiler.collapsed()},
+            }
+
+        # Persisted by the background writer, off the response path
+        await get_conversation_writer().record(
+            conversation_id,
+            [
+                message_record("user", request.message),
+                message_record(
+                    "assistant",
+                    response.message,
+                    {
+                        "products": (
+                            [p.dict() for p in response.products]
+                            if response.products
+                            else None
+                        ),
+                        "compatibility": (
+                            response.compatibility.dict()
+                            if response.compatibility
+                            else None
+                        ),
+                    },
+                ),
+            ],
         )
-        db.add(assistant_message)
-
-        db.commit()
 
         # Update response with conversation ID
         response.conversation_id = conversation_id
 
         return response
 
+    except (CircuitOpenError, OverloadedError) as e:
+        logger.warning(f"Shedding chat request: {e}")
+        raise _shed(e)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Chat request exceeded the {settings.AGENT_ROUND_TIMEOUT}s round deadline"
+        )
+        raise HTTPException(
+            status_code=504,
+            detail=TIMEOUT_DETAIL,
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
         logger.error(f"Error processing message: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/chat/stream")
+def _shed(e) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(max(1, int(e.retry_after)))},
+    )
+
+
+def _debug(request: ChatRequest) -> bool:
+    return request.debug and settings.TRACE_DEBUG_ENABLED
+
+
+def _resolve_conversation_id(request: ChatRequest) -> str:
+    """The request's conversation, or a new one whose context starts empty"""
+    if request.conversation_id:
+        return request.conversation_id
+
+    conversation_id = str(uuid4())
+    get_conversation_store().start(conversation_id)
+    return conversation_id
+
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+}
+
+
+@router.post("/chat/stream", dependencies=[Depends(enforce_rate_limit)])
 async def stream_message(request: ChatRequest):
     """
-    Stream chat response with Server-Sent Events
+    Stream chat response with Server-Sent Events.
+    The stream ID is returned in the X-Stream-ID header; reconnect with
+    GET /chat/stream/{stream_id} and Last-Event-ID to resume.
     """
+    writer = SSEWriter(
+        coalesce_ms=settings.SSE_COALESCE_MS,
+        coalesce_chars=settings.SSE_COALESCE_CHARS,
+    )
+    conversation_id = _resolve_conversation_id(request)
+    user_message = message_record("user", request.message)
+    trace = Trace("chat.stream", conversation_id=conversation_id)
 
     async def event_generator():
+        text: List[str] = []
+        products = []
+        compatibility = None
+
+        def assistant_message(**extra):
+            metadata = {
+                "products": products or None,
+                "compatibility": compatibility,
+                **extra,
+            }
+            return message_record("assistant", "".join(text), metadata)
+
+        async def collect(chunks):
+            nonlocal compatibility
+            async for chunk in chunks:
+                if chunk.type == "text" and isinstance(chunk.content, str):
+                    if not text:
+                        elapsed_ms = trace.root.duration_ms
+                        trace.root.set_attribute("ttft_ms", round(elapsed_ms, 1))
+                        TIME_TO_FIRST_CHUNK.observe(elapsed_ms / 1000)
+                    text.append(chunk.content)
+                elif chunk.type == "product":
+                    products.append(chunk.content)
+                elif chunk.type == "compatibility":
+                    compatibility = chunk.content
+                elif chunk.type == "done" and _debug(request):
+                    chunk = StreamEvent(
+                        type="done", content={"trace": trace.breakdown()}
+                    )
+                yield chunk
+
         try:
             orchestrator = get_orchestrator()
 
-            async for chunk in orchestrator.stream_message(
+            chunks = orchestrator.stream_message(
                 message=request.message,
                 conversation_history=request.conversation_history,
-            ):
-                # Convert chunk to JSON and send as SSE
-                chunk_data = chunk.model_dump(mode="json")
-                # logger.error(f"data: {chunk_data}")
-                yield f"data: {json.dumps(chunk_data)}\n\n"
+                conversation_id=request.conversation_id,
+            )
+            async for frame in writer.stream(collect(chunks)):
+                yield writer.last_id, frame
+
+            await get_conversation_writer().record(
+                conversation_id, [user_message, assistant_message()]
+            )
+
+        except asyncio.CancelledError:
+            # Abandoned by the client: keep the partial turn without blocking
+            get_conversation_writer().record_nowait(
+                conversation_id, [user_message, assistant_message(cancelled=True)]
+            )
+            trace.root.set_attribute("cancelled", True)
+            raise
 
         except Exception as e:
-            error_chunk = StreamChunk(type="error", content=str(e))
-            yield f"data: {error_chunk.model_dump_json()}\n\n"
+            trace.finish(e)
+            if isinstance(e, asyncio.TimeoutError):
+                detail = TIMEOUT_DETAIL
+            else:
+                detail = str(e)
+            error_chunk = StreamEvent(type="error", content=detail)
+            frame = writer.encode(error_chunk)
+            yield writer.last_id, frame
+
+        finally:
+            trace.finish()
+
+    # Admit before the response starts, while a 503 can still be sent; the
+    # slot is held by the background turn, not by this connection
+    limiter = get_concurrency_limiter()
+    try:
+        await limiter.acquire()
+    except OverloadedError as e:
+        logger.warning(f"Shedding chat stream: {e}")
+        raise _shed(e)
+
+    stream_id = uuid4().hex
+    try:
+        manager = get_stream_manager()
+        # The turn runs independently of this connection so it can be resumed;
+        # its task inherits the trace and usage attribution from here
+        with activate(trace), usage_conversation(conversation_id):
+            task = manager.start(stream_id, event_generator())
+    except BaseException:
+        # No turn owns the slot yet
+        limiter.release()
+        raise
+    task.add_done_callback(lambda _: limiter.release())
 
     return StreamingResponse(
-        event_generator(),
+        manager.subscribe(stream_id),
         media_type="text/event-stream",
         headers={
-            "Cache-Control": "no-cache",
-            "X-Accel-Buffering": "no",  # Disable nginx buffering
+            **SSE_HEADERS,
+            "X-Stream-ID": stream_id,
+            "X-Conversation-ID": conversation_id,
         },
     )
 
 
+@router.get("/chat/stream/{stream_id}")
+async def resume_stream(
+    stream_id: str,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Resume a stream: replay chunks after Last-Event-ID, then follow it live
+    """
+    manager = get_stream_manager()
+    if not await manager.backend.exists(stream_id):
+        raise HTTPException(status_code=404, detail="Stream not found or expired")
+
+    try:
+        resume_from = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    return StreamingResponse(
+        manager.subscribe(stream_id, resume_from),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Stream-ID": stream_id},
+    )
+
+
 @router.get("/chat/history/{conversation_id}")
-async def get_conversation_history(conversation_id: str, db: Session = Depends(get_db)):
+async def get_conversation_history(
+    conversation_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: Session = Depends(get_db),
+):
     """
-    Get conversation history
+    Get conversation history, oldest first.
+    JSON responses are paginated: pass `next_cursor` back as `cursor`.
+    `format=ndjson` streams one message per line. `fields` is a
+    comma-separated projection, e.g. `role,content`.
     """
     try:
-        conversation = (
-            db.query(Conversation)
-            .filter(Conversation.conversation_id == conversation_id)
-            .first()
+        try:
+            field_list = parse_fields(fields)
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        conversation_pk = db.scalar(
+            select(Conversation.id).where(
+                Conversation.conversation_id == conversation_id
+            )
         )
 
-        if not conversation:
+        if conversation_pk is None:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
-        messages = (
-            db.query(Message)
-            .filter(Message.conversation_id == conversation.id)
-            .order_by(Message.timestamp)
-            .all()
+        if format == "ndjson":
+
+            def ndjson_lines():
+                # The request session is closed once the response starts
+                stream_db = SessionLocal()
+                try:
+                    for message in iter_history(
+                        stream_db, conversation_pk, field_list, after, limit
+                    ):
+                        yield dumps(message) + b"\n"
+                finally:
+                    stream_db.close()
+
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+        page_size = min(
+            limit or settings.HISTORY_PAGE_SIZE, settings.HISTORY_MAX_PAGE_SIZE
+        )
+        messages, next_cursor = fetch_page(
+            db, conversation_pk, field_list, page_size, after
         )
 
         return {
             "conversation_id": conversation_id,
-            "messages": [
-                {
-                    "role": msg.role,
-                    "content": msg.content,
-                    "timestamp": msg.timestamp,
-                    "message_metadata": msg.message_metadata,
-                }
-                for msg in messages
-            ],
+            "messages": messages,
+            "next_cursor": next_cursor,
         }
 
     except HTTPException:
@@ -165,21 +367,22 @@ async def delete_conversation(conversation_id: str, db: Session = Depends(get_db
     Delete a conversation and its messages
     """
     try:
-        conversation = (
-            db.query(Conversation)
-            .filter(Conversation.conversation_id == conversation_id)
-            .first()
+        conversation_pk = select(Conversation.id).where(
+            Conversation.conversation_id == conversation_id
         )
 
-        if not conversation:
-            raise HTTPException(status_code=404, detail="Conversation not found")
+        # Two set-based deletes in one transaction, no rows loaded
+        db.execute(delete(Message).where(Message.conversation_id.in_(conversation_pk)))
+        deleted = db.execute(
+            delete(Conversation).where(Conversation.conversation_id == conversation_id)
+        ).rowcount
 
-        # Delete messages
-        db.query(Message).filter(Message.conversation_id == conversation.id).delete()
+        if not deleted:
+            db.rollback()
+            raise HTTPException(status_code=404, detail="Conversation not found")
 
-        # Delete conversation
-        db.delete(conversation)
         db.commit()
+        get_conversation_store().evict(conversation_id)
 
         return {"message": "Conversation deleted successfully"}
 
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.services.database import get_db
-from app.services.vector_store import get_vector_store
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.health import DATABASE, DEEPSEEK, get_health_monitor
+from app.core.readiness import DEGRADED, FAILED, READY, get_readiness
+from app.services.vector_store import COMPONENTS as VECTOR_COMPONENTS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,45 +10,50 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _service_status(components, names) -> str:
+    statuses = [components.get(name, {}).get("status") for name in names]
+    if all(status == READY for status in statuses):
+        return "healthy"
+    if DEGRADED in statuses or FAILED in statuses:
+        return "unhealthy"
+    return "loading"
+
+
 @router.get("/health")
-async def health_check(db: Session = Depends(get_db)):
+async def health_check():
     """
-    Health check endpoint
+    Health check endpoint. Serves the background probes' cached results;
+    nothing here touches a dependency.
     """
-    try:
-        # Check database
-        db.execute("SELECT 1")
-        db_status = "healthy"
-    except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        db_status = "unhealthy"
-
-    try:
-        # Check vector store
-        vector_store = get_vector_store()
-        vector_status = "healthy"
-    except Exception as e:
-        logger.error(f"Vector store health check failed: {e}")
-        vector_status = "unhealthy"
-
-    overall_status = (
-        "healthy"
-        if db_status == "healthy" and vector_status == "healthy"
-        else "unhealthy"
-    )
+    snapshot = get_readiness().snapshot()
+    components = snapshot["components"]
+
+    if not snapshot["ready"]:
+        overall_status = "unhealthy"
+    elif snapshot["degraded"]:
+        overall_status = "degraded"
+    else:
+        overall_status = "healthy"
 
     return {
         "status": overall_status,
-        "services": {"database": db_status, "vector_store": vector_status},
+        "services": {
+            "database": _service_status(components, [DATABASE]),
+            "vector_store": _service_status(components, VECTOR_COMPONENTS),
+            "llm": _service_status(components, [DEEPSEEK]),
+        },
+        "probes": get_health_monitor().results,
     }
 
 
 @router.get("/health/ready")
 async def readiness_check():
     """
-    Kubernetes readiness probe
+    Kubernetes readiness probe: 503 until every required component is
+    loaded, and again while one is degraded
     """
-    return {"ready": True}
+    snapshot = get_readiness().snapshot()
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content=snapshot)
 
 
 @router.get("/health/live")
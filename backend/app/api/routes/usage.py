@@ -0,0 +1,32 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from app.api.dependencies import require_admin
+from app.services.usage import usage_report
+
+# Lists conversation ids, so admins only
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("/usage/report")
+def token_usage_report(
+    group_by: str = Query(
+        "phase", description="Comma-separated: conversation, phase, day, model"
+    ),
+    days: int = Query(7, ge=1, le=366),
+    conversation_id: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """
+    Token usage and estimated cost, most expensive groups first.
+    Workers flush usage every USAGE_FLUSH_INTERVAL seconds.
+    """
+    try:
+        return usage_report(
+            [name.strip() for name in group_by.split(",")],
+            days=days,
+            conversation_id=conversation_id,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,227 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, List
+import asyncio
+import logging
+import time
+
+from app.core.metrics import ADMISSION, ADMISSION_QUEUE_WAIT, TURNS_IN_FLIGHT
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+ADMITTED = ADMISSION.labels("admitted")
+QUEUED = ADMISSION.labels("queued")
+QUEUE_FULL = ADMISSION.labels("queue_full")
+QUEUE_TIMEOUT = ADMISSION.labels("queue_timeout")
+RATE_LIMITED = ADMISSION.labels("rate_limited")
+
+
+class OverloadedError(Exception):
+    """Raised when a turn can't get a processing slot in time"""
+
+    def __init__(self, reason: str, retry_after: float = 1.0):
+        self.retry_after = retry_after
+        super().__init__(f"Server is busy ({reason}), retry in {retry_after:.0f}s")
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the chat turns a worker processes at once. Excess turns wait in a
+    bounded FIFO queue; a full queue or a wait past `queue_timeout` is
+    rejected straight away, so a spike can't pile work onto the event loop
+    and the upstream until everything times out. Released slots are handed
+    to the oldest waiter directly.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    async def acquire(self):
+        if self.max_in_flight <= 0:
+            return
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            TURNS_IN_FLIGHT.inc()
+            ADMITTED.inc()
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            QUEUE_FULL.inc()
+            raise OverloadedError("queue full")
+
+        QUEUED.inc()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            QUEUE_TIMEOUT.inc()
+            raise OverloadedError("timed out waiting for a slot")
+        except asyncio.CancelledError:
+            # The client went away; pass on a slot handed over meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started)
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+        ADMITTED.inc()
+
+    def release(self):
+        if self.max_in_flight <= 0:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+        TURNS_IN_FLIGHT.dec()
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class RateLimitBackend(ABC):
+    """Token bucket storage"""
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        """Take a token: 0 if allowed, else seconds until one is available"""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process buckets, so with several workers each enforces its own
+    share. A bucket left idle refills completely, so evicting the least
+    recently used ones past `max_keys` forgets nothing that matters.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # key -> [tokens, last refill]
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+
+# Refill and take atomically, on the Redis clock so workers agree on time.
+# The wait is returned as a string: Lua numbers would be truncated to ints.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets shared by every worker; each expires once it would be full"""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requires the 'redis' package"
+            ) from e
+
+        self.redis = redis.from_url(url)
+        self._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def consume(self, key: str, rate: float, burst: int) -> float:
+        wait = await self._script(keys=[f"ratelimit:{key}"], args=[rate, burst])
+        return float(wait)
+
+
+class RateLimiter:
+    """Per-client token buckets: `per_minute` sustained, bursts up to `burst`"""
+
+    def __init__(self, backend: RateLimitBackend, per_minute: float, burst: int):
+        self.backend = backend
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    async def check(self, client: str) -> float:
+        """0 if the client may proceed, else seconds until it may retry"""
+        try:
+            wait = await self.backend.consume(client, self.rate, self.burst)
+        except Exception as e:
+            # A broken shared store must not take the chat down with it
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return 0.0
+        if wait > 0:
+            RATE_LIMITED.inc()
+        return wait
+
+
+# Global instances
+_concurrency_limiter = None
+_rate_limiter = None
+
+
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    global _concurrency_limiter
+    if _concurrency_limiter is None:
+        _concurrency_limiter = ConcurrencyLimiter(
+            max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+        )
+    return _concurrency_limiter
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter
+    if _rate_limiter is None:
+        if settings.RATE_LIMIT_BACKEND == "redis":
+            backend = RedisRateLimitBackend(settings.REDIS_URL)
+        else:
+            backend = InMemoryRateLimitBackend()
+        _rate_limiter = RateLimiter(
+            backend,
+            per_minute=settings.RATE_LIMIT_PER_MINUTE,
+            burst=settings.RATE_LIMIT_BURST,
+        )
+    return _rate_limiter
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import time
+
+from app.core.metrics import SINGLEFLIGHT_CALLS, record_cache
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one in-flight task,
+    and keeps results for `ttl` seconds (0 = coalesce only). Callers share
+    the result object, so treat it as read-only.
+
+    A caller that is cancelled (deadline, disconnect) leaves the others
+    waiting; the shared task is cancelled only once every caller is gone.
+    """
+
+    def __init__(self, name: str, ttl: float = 0.0, max_entries: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._flights: Dict[Hashable, _Flight] = {}
+        # key -> (expires at, result)
+        self._results: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._executed = SINGLEFLIGHT_CALLS.labels(name, "executed")
+        self._coalesced = SINGLEFLIGHT_CALLS.labels(name, "coalesced")
+        self._cached = SINGLEFLIGHT_CALLS.labels(name, "cached")
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Any:
+        """`fn()`'s result, shared with identical calls in flight or cached"""
+        if self.ttl > 0:
+            entry = self._results.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                record_cache(self.name, True)
+                self._cached.inc()
+                return entry[1]
+            record_cache(self.name, False)
+
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.create_task(self._run(key, fn, cacheable))
+            flight = self._flights[key] = _Flight(task)
+            self._executed.inc()
+        else:
+            self._coalesced.inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller gave up: stop the work, and let the next
+                # identical call start afresh rather than join a cancelled one
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+
+    async def _run(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]],
+    ) -> Any:
+        try:
+            result = await fn()
+        finally:
+            flight = self._flights.get(key)
+            if flight is not None and flight.task is asyncio.current_task():
+                del self._flights[key]
+
+        if self.ttl > 0 and (cacheable is None or cacheable(result)):
+            self._results[key] = (time.monotonic() + self.ttl, result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
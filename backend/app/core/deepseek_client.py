@@ -1,7 +1,13 @@
+import asyncio
 import httpx
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import json
 import logging
+import time
+from app.core.metrics import LLM_LATENCY, LLM_TIME_TO_FIRST_TOKEN, record_llm_usage
+from app.core.resilience import CircuitBreaker, ResilientCaller, RetryPolicy
+from app.core.tracing import span, start_span
+from app.services.usage import cached_prompt_tokens, get_usage_accumulator
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -12,7 +18,23 @@ class DeepseekClient:
         self.api_key = settings.DEEPSEEK_API_KEY
         self.base_url = settings.DEEPSEEK_BASE_URL
         self.model = settings.DEEPSEEK_MODEL
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.client = httpx.AsyncClient(timeout=settings.LLM_REQUEST_TIMEOUT)
+        self.resilience = ResilientCaller(
+            name="deepseek",
+            retry_policy=RetryPolicy(
+                max_retries=settings.LLM_MAX_RETRIES,
+                base_delay=settings.LLM_RETRY_BASE_DELAY,
+                max_delay=settings.LLM_RETRY_MAX_DELAY,
+            ),
+            circuit_breaker=CircuitBreaker(
+                name="deepseek",
+                failure_threshold=settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_CIRCUIT_RESET_TIMEOUT,
+            ),
+            hedge_enabled=settings.LLM_HEDGE_ENABLED,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+        )
 
     async def chat_completion(
         self,
@@ -21,9 +43,14 @@ class DeepseekClient:
         temperature: float = None,
         max_tokens: int = None,
         stream: bool = False,
+        hedge: bool = False,
+        phase: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
-        Send chat completion request to Deepseek
+        Send chat completion request to Deepseek.
+        Transient failures are retried; `hedge` allows a duplicate request
+        when the call is slower than the configured latency percentile.
+        Token usage is accounted to `phase` (see app.services.usage).
         """
         if temperature is None:
             temperature = settings.TEMPERATURE
@@ -47,15 +74,41 @@ class DeepseekClient:
             "Content-Type": "application/json",
         }
 
-        try:
+        async def send() -> Dict[str, Any]:
             response = await self.client.post(
                 f"{self.base_url}/v1/chat/completions", json=payload, headers=headers
             )
             response.raise_for_status()
             return response.json()
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with span(
+                "llm.chat_completion",
+                model=self.model,
+                messages=len(messages),
+                tools=bool(tools),
+                hedge=hedge,
+            ) as llm_span:
+                result = await self.resilience.call(send, hedge=hedge)
+                outcome = "ok"
+                usage = result.get("usage") or {}
+                if usage:
+                    message = (result.get("choices") or [{}])[0].get("message") or {}
+                    self._record_usage(usage, phase, bool(message.get("tool_calls")))
+                llm_span.set_attributes(
+                    prompt_tokens=usage.get("prompt_tokens"),
+                    completion_tokens=usage.get("completion_tokens"),
+                )
+                return result
         except httpx.HTTPError as e:
             logger.error(f"Deepseek API error: {e}")
             raise
+        finally:
+            LLM_LATENCY.labels("completion", outcome).observe(
+                time.perf_counter() - started
+            )
 
     async def stream_chat_completion(
         self,
@@ -63,9 +116,12 @@ class DeepseekClient:
         tools: Optional[List[Dict[str, Any]]] = None,
         temperature: float = None,
         max_tokens: int = None,
+        phase: Optional[str] = None,
     ) -> AsyncGenerator[Dict[str, Any], None]:
         """
-        Stream chat completion from Deepseek
+        Stream chat completion from Deepseek.
+        Opening the stream is retried; once a chunk has been yielded errors
+        propagate, since replaying would duplicate output.
         """
         if temperature is None:
             temperature = settings.TEMPERATURE
@@ -79,6 +135,9 @@ class DeepseekClient:
             "max_tokens": max_tokens,
             "stream": True,
         }
+        if settings.LLM_STREAM_INCLUDE_USAGE:
+            # Usage arrives on a final chunk with no choices
+            payload["stream_options"] = {"include_usage": True}
 
         if tools:
             payload["tools"] = tools
@@ -89,34 +148,145 @@ class DeepseekClient:
             "Content-Type": "application/json",
         }
 
+        policy = self.resilience.retry_policy
+        breaker = self.resilience.circuit_breaker
+        attempt = 0
+
+        # Not made current: this generator is suspended between chunks
+        stream_span = start_span(
+            "llm.stream", model=self.model, messages=len(messages), tools=bool(tools)
+        )
+        requested_at = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        usage = None
+        tool_calls = False
+        error = None
+
         try:
-            async with self.client.stream(
-                "POST",
-                f"{self.base_url}/v1/chat/completions",
-                json=payload,
-                headers=headers,
-            ) as response:
-                response.raise_for_status()
-                async for line in response.aiter_lines():
-                    if line.startswith("data: "):
-                        data = line[6:]  # Remove "data: " prefix
-                        if data.strip() == "[DONE]":
-                            break
-                        try:
-                            chunk = json.loads(data)
-                            yield chunk
-                        except json.JSONDecodeError:
-                            continue
-        except httpx.HTTPError as e:
-            logger.error(f"Deepseek streaming error: {e}")
+            while True:
+                breaker.before_call()
+                started = False
+                try:
+                    async with self.client.stream(
+                        "POST",
+                        f"{self.base_url}/v1/chat/completions",
+                        json=payload,
+                        headers=headers,
+                    ) as response:
+                        response.raise_for_status()
+                        breaker.record_success()
+                        started = True
+                        async for line in response.aiter_lines():
+                            if line.startswith("data: "):
+                                data = line[6:]  # Remove "data: " prefix
+                                if data.strip() == "[DONE]":
+                                    break
+                                try:
+                                    chunk = json.loads(data)
+                                except json.JSONDecodeError:
+                                    continue
+
+                                if chunk.get("usage"):
+                                    usage = chunk["usage"]
+
+                                choices = chunk.get("choices") or [{}]
+                                delta = choices[0].get("delta") or {}
+                                if delta.get("content"):
+                                    tokens += 1
+                                    if first_token_at is None:
+                                        first_token_at = time.perf_counter()
+                                if delta.get("tool_calls"):
+                                    tool_calls = True
+                                yield chunk
+                    return
+                except httpx.HTTPError as e:
+                    if not started:
+                        if policy.is_upstream_failure(e):
+                            breaker.record_failure()
+                        elif isinstance(e, httpx.HTTPStatusError):
+                            breaker.record_success()
+
+                    delay = None
+                    if (
+                        not started
+                        and policy.is_retryable(e)
+                        and attempt < policy.max_retries
+                    ):
+                        delay = policy.compute_delay(attempt, e)
+                    if delay is None:
+                        logger.error(f"Deepseek streaming error: {e}")
+                        raise
+
+                    logger.warning(
+                        f"Deepseek stream failed to open ({e}), retry "
+                        f"{attempt + 1}/{policy.max_retries} in {delay:.2f}s"
+                    )
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                except Exception:
+                    if not started:
+                        # Unexpected: still a verdict for a half-open probe
+                        breaker.record_failure()
+                    raise
+                except BaseException:
+                    if not started:
+                        # Cancelled while opening (round deadline, disconnect)
+                        breaker.release_probe()
+                    raise
+        except Exception as e:
+            error = e
             raise
+        finally:
+            finished_at = time.perf_counter()
+            LLM_LATENCY.labels("stream", "error" if error else "ok").observe(
+                finished_at - requested_at
+            )
+            if usage:
+                self._record_usage(usage, phase, tool_calls)
+            stream_span.set_attributes(tokens=tokens, retries=attempt)
+            if first_token_at is not None:
+                LLM_TIME_TO_FIRST_TOKEN.observe(first_token_at - requested_at)
+                generating = finished_at - first_token_at
+                stream_span.set_attributes(
+                    ttft_ms=round((first_token_at - requested_at) * 1000, 1),
+                    tokens_per_sec=(
+                        round(tokens / generating, 1) if generating > 0 else None
+                    ),
+                )
+            stream_span.finish(error)
 
-    async def simple_completion(self, prompt: str) -> str:
+    async def simple_completion(self, prompt: str, phase: Optional[str] = None) -> str:
         """Simple text completion for utility functions"""
         messages = [{"role": "user", "content": prompt}]
-        response = await self.chat_completion(messages, max_tokens=100)
+        response = await self.chat_completion(messages, max_tokens=100, phase=phase)
         return response["choices"][0]["message"]["content"]
 
+    def _record_usage(
+        self, usage: Dict[str, Any], phase: Optional[str], tool_calls: bool
+    ):
+        """Feed an upstream usage block to the metrics and cost accounting"""
+        record_llm_usage(
+            usage.get("prompt_tokens") or 0,
+            usage.get("completion_tokens") or 0,
+            cached_prompt_tokens(usage),
+        )
+        if settings.USAGE_TRACKING_ENABLED:
+            get_usage_accumulator().record(usage, self.model, phase, tool_calls)
+
+    async def ping(self, timeout: float) -> Dict[str, Any]:
+        """
+        Reachability check for health probes: lists models, bypassing the
+        retries and the circuit breaker so probes never trip it
+        """
+        response = await self.client.get(
+            f"{self.base_url}/v1/models",
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return {"circuit": self.resilience.circuit_breaker.state}
+
     async def close(self):
         """Close the HTTP client"""
         await self.client.aclose()
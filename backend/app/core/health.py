@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.core.deepseek_client import get_deepseek_client
+from app.core.metrics import DEPENDENCY_UP, HEALTH_PROBE_LATENCY
+from app.core.readiness import DEGRADED, READY, get_readiness
+from app.services.database import SessionLocal
+from app.services.vector_store import CHROMA, EMBEDDING_MODEL, peek_vector_store
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+DATABASE = "database"
+DEEPSEEK = "deepseek"
+
+
+class Probe:
+    """
+    A dependency check. `after_load` probes wait until their readiness
+    component has loaded, so a probe never triggers the load itself; the
+    others own their component, registered when monitoring starts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        check: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+        after_load: bool = True,
+        required: bool = True,
+    ):
+        self.name = name
+        self.check = check
+        self.after_load = after_load
+        self.required = required
+
+
+class HealthMonitor:
+    """
+    Probes dependencies in the background and keeps the latest results, so
+    health endpoints answer from memory instead of touching Postgres,
+    Chroma or the LLM per request.
+
+    Results feed the readiness registry: after `failure_threshold` failed
+    probes in a row a dependency is marked degraded (tools fall back to
+    lexical search, a required one turns /health/ready into a 503), and
+    its next passing probe restores it.
+    """
+
+    def __init__(
+        self,
+        probes: List[Probe],
+        interval: float,
+        timeout: float,
+        failure_threshold: int,
+    ):
+        self.probes = probes
+        self.interval = interval
+        self.timeout = timeout
+        self.failure_threshold = max(1, failure_threshold)
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._failures: Dict[str, int] = {}
+        # Probes still running past their timeout; never started twice
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            for probe in self.probes:
+                if not probe.after_load:
+                    get_readiness().register(probe.name, required=probe.required)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.interval)
+
+    async def check_all(self):
+        await asyncio.gather(*(self._check(probe) for probe in self.probes))
+
+    async def _check(self, probe: Probe):
+        readiness = get_readiness()
+        component = readiness.register(probe.name)
+        if probe.after_load and component.status not in (READY, DEGRADED):
+            self.results[probe.name] = {"status": "skipped", "reason": component.status}
+            return
+
+        started = time.perf_counter()
+        detail = None
+        error = None
+        outcome = "ok"
+
+        task = self._inflight.get(probe.name)
+        if task is not None:
+            # Threads can't be cancelled: don't pile another one on a hung call
+            error, outcome = "previous probe still running", "timeout"
+        else:
+            task = asyncio.ensure_future(probe.check())
+            done, _ = await asyncio.wait({task}, timeout=self.timeout)
+            if not done:
+                self._inflight[probe.name] = task
+                task.add_done_callback(self._settle_late)
+                error, outcome = f"timed out after {self.timeout}s", "timeout"
+            elif task.exception() is not None:
+                exc = task.exception()
+                error, outcome = str(exc) or exc.__class__.__name__, "error"
+            else:
+                detail = task.result()
+
+        latency = time.perf_counter() - started
+        HEALTH_PROBE_LATENCY.labels(probe.name, outcome).observe(latency)
+
+        if error is None:
+            self._failures[probe.name] = 0
+            if component.status == DEGRADED:
+                logger.warning(f"Health probe {probe.name} passing again")
+            if component.status != READY:
+                readiness.mark_healthy(probe.name)
+        else:
+            failures = self._failures[probe.name] = (
+                self._failures.get(probe.name, 0) + 1
+            )
+            if failures >= self.failure_threshold and component.status != DEGRADED:
+                logger.warning(
+                    f"Health probe {probe.name} failed {failures} times, "
+                    f"marking degraded: {error}"
+                )
+                readiness.mark_degraded(probe.name, error)
+
+        DEPENDENCY_UP.labels(probe.name).set(1 if component.status == READY else 0)
+        result = {
+            "status": "up" if error is None else "down",
+            "latency_ms": round(latency * 1000, 2),
+            "checked_at": time.time(),
+            "consecutive_failures": self._failures[probe.name],
+        }
+        if detail:
+            result["detail"] = detail
+        if error:
+            result["error"] = error
+        self.results[probe.name] = result
+
+    def _settle_late(self, task: asyncio.Future):
+        for name, inflight in list(self._inflight.items()):
+            if inflight is task:
+                del self._inflight[name]
+        if not task.cancelled():
+            # Retrieve it so a late failure isn't logged as never retrieved
+            task.exception()
+
+
+def _select_one():
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
+async def probe_database() -> None:
+    await asyncio.to_thread(_select_one)
+
+
+async def probe_chroma() -> Dict[str, Any]:
+    # A real read of both collections, not just the client handle
+    return {"documents": await asyncio.to_thread(peek_vector_store().count)}
+
+
+async def probe_embedding_model() -> Dict[str, Any]:
+    vectors = await asyncio.to_thread(peek_vector_store().encode, ["health check"])
+    return {"dimensions": len(vectors[0])}
+
+
+async def probe_deepseek() -> Dict[str, Any]:
+    return await get_deepseek_client().ping(settings.HEALTH_PROBE_TIMEOUT)
+
+
+# Global instance
+_health_monitor = None
+
+
+def get_health_monitor() -> HealthMonitor:
+    global _health_monitor
+    if _health_monitor is None:
+        _health_monitor = HealthMonitor(
+            probes=[
+                Probe(DATABASE, probe_database),
+                Probe(CHROMA, probe_chroma),
+                Probe(EMBEDDING_MODEL, probe_embedding_model),
+                # No startup load: its probes alone decide its state
+                Probe(
+                    DEEPSEEK,
+                    probe_deepseek,
+                    after_load=False,
+                    required=settings.READINESS_REQUIRE_LLM,
+                ),
+            ],
+            interval=settings.HEALTH_CHECK_INTERVAL,
+            timeout=settings.HEALTH_PROBE_TIMEOUT,
+            failure_threshold=settings.HEALTH_FAILURE_THRESHOLD,
+        )
+    return _health_monitor
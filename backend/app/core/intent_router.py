@@ -0,0 +1,107 @@
+from typing import List, Dict, Any, Optional
+import json
+import logging
+import re
+from uuid import uuid4
+
+from app.core.metrics import INTENT_ROUTES
+from app.utils.helpers import extract_part_number, extract_model_number
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[A-Z0-9\-]+")
+
+COMPATIBILITY_PATTERN = re.compile(
+    r"\b(compatible|compatibility|fits?|works? with)\b", re.I
+)
+
+# Words that suggest the user wants more than a plain part lookup
+PROBLEM_KEYWORDS = [
+    "not working",
+    "not draining",
+    "not cleaning",
+    "not cooling",
+    "broken",
+    "leak",
+    "noise",
+    "won't",
+    "doesn't",
+    "stopped",
+]
+
+# A bare part lookup ("PS11752778", "price of PS11752778?") is short
+MAX_LOOKUP_WORDS = 8
+
+LLM_ROUTED = INTENT_ROUTES.labels("llm", "none")
+
+
+class IntentRouter:
+    """
+    Rule-based router that synthesizes tool calls for unambiguous messages,
+    so the orchestrator can skip the LLM planning round trip
+    """
+
+    def route(self, message: str) -> Optional[List[Dict[str, Any]]]:
+        """Return synthesized tool calls, or None to fall back to LLM planning"""
+        intent, arguments = self._classify(message)
+
+        if intent is None:
+            LLM_ROUTED.inc()
+            return None
+
+        INTENT_ROUTES.labels("rule", intent).inc()
+        logger.info(f"Routed message to {intent} without planning call")
+        return [
+            {
+                "id": f"call_{uuid4().hex[:24]}",
+                "type": "function",
+                "function": {"name": intent, "arguments": json.dumps(arguments)},
+            }
+        ]
+
+    def _classify(self, message: str):
+        """Return (tool_name, arguments) for high-confidence patterns"""
+        message_lower = message.lower()
+        tokens = TOKEN_PATTERN.findall(message.upper())
+
+        # Whole tokens only, so partial regex matches never leak into arguments
+        part_numbers = [t for t in tokens if extract_part_number(t) == t]
+        if len(part_numbers) != 1:
+            return None, None
+        part_number = part_numbers[0]
+
+        model_numbers = [
+            t
+            for t in tokens
+            if t != part_number
+            and extract_model_number(t)
+            and re.search(r"[A-Z]", t)
+            and re.search(r"\d", t)
+        ]
+
+        if COMPATIBILITY_PATTERN.search(message):
+            if len(model_numbers) == 1:
+                return "check_compatibility", {
+                    "part_number": part_number,
+                    "model_number": model_numbers[0],
+                }
+            return None, None
+
+        if model_numbers or any(k in message_lower for k in PROBLEM_KEYWORDS):
+            return None, None
+
+        if len(message.split()) <= MAX_LOOKUP_WORDS:
+            return "product_search", {"query": part_number}
+
+        return None, None
+
+
+# Global instance
+_intent_router = None
+
+
+def get_intent_router() -> IntentRouter:
+    global _intent_router
+    if _intent_router is None:
+        _intent_router = IntentRouter()
+    return _intent_router
@@ -0,0 +1,208 @@
+import os
+import time
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from sqlalchemy.pool import QueuePool
+
+# With several uvicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty
+# directory before starting them: every worker then writes its samples to
+# mmap'd files there and /metrics sums them, whichever worker serves it.
+MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, including the whole SSE body",
+    ["method", "route", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+TIME_TO_FIRST_CHUNK = Histogram(
+    "chat_time_to_first_chunk_seconds",
+    "From the stream request to the first answer text sent to the client",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 20),
+)
+STREAMS_ACTIVE = Gauge(
+    "chat_sse_streams_active",
+    "SSE clients currently attached to a stream",
+    multiprocess_mode="livesum",
+)
+STREAMS = Counter(
+    "chat_streams_total",
+    "Streamed turns by outcome",
+    ["outcome"],
+)
+STREAM_TOKENS_SAVED = Counter(
+    "chat_stream_tokens_saved_total",
+    "Estimated completion tokens not generated because the client left; "
+    "from the average length of completed answers",
+)
+
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds",
+    "Upstream LLM call latency; streams are timed to their last chunk",
+    ["call", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds",
+    "From opening an upstream stream to its first content delta",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10),
+)
+LLM_TOKENS = Histogram(
+    "llm_tokens",
+    "Tokens per LLM call as reported by the upstream usage block",
+    ["kind"],
+    buckets=(16, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+
+TOOL_LATENCY = Histogram(
+    "tool_duration_seconds",
+    "Tool execution latency",
+    ["tool", "outcome"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+INTENT_ROUTES = Counter(
+    "chat_intent_routes_total",
+    "Messages by routing path: rule (tool call synthesized, no planning "
+    "call) or llm, and the routed intent",
+    ["path", "intent"],
+)
+
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced calls by how they were served; dedup ratio = "
+    "(coalesced + cached) / all",
+    ["flight", "result"],
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "embedding_batch_size",
+    "Texts per embedding model call on the serving path",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by result; hit ratio = hit / (hit + miss)",
+    ["cache", "result"],
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30),
+)
+
+ADMISSION = Counter(
+    "chat_admission_total",
+    "Chat turns by admission outcome",
+    ["outcome"],
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "chat_admission_queue_wait_seconds",
+    "Time queued turns waited for a processing slot",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10),
+)
+TURNS_IN_FLIGHT = Gauge(
+    "chat_turns_in_flight",
+    "Chat turns holding a processing slot",
+    multiprocess_mode="livesum",
+)
+
+HEALTH_PROBE_LATENCY = Histogram(
+    "health_probe_duration_seconds",
+    "Background dependency health probe latency",
+    ["probe", "outcome"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DEPENDENCY_UP = Gauge(
+    "dependency_up",
+    "1 while a dependency passes its health probes, 0 once it is degraded",
+    ["dependency"],
+    multiprocess_mode="livemin",
+)
+
+# Fixed label sets, bound once so hot paths skip the label lookup
+STREAM_COMPLETED = STREAMS.labels("completed")
+STREAM_CANCELLED = STREAMS.labels("cancelled")
+PROMPT_TOKENS = LLM_TOKENS.labels("prompt")
+COMPLETION_TOKENS = LLM_TOKENS.labels("completion")
+CACHED_PROMPT_TOKENS = LLM_TOKENS.labels("cached_prompt")
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_llm_usage(prompt: int, completion: int, cached: int):
+    PROMPT_TOKENS.observe(prompt)
+    COMPLETION_TOKENS.observe(completion)
+    CACHED_PROMPT_TOKENS.observe(cached)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request by route template (not raw path, which would
+    explode label cardinality). Plain ASGI, so streaming bodies pass
+    through untouched and are timed to their last byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                str(status),
+            ).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> bytes:
+    """Exposition text for this worker, or for all workers in multiprocess mode"""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_worker_dead():
+    """Drop this worker's live gauges from the shared directory on shutdown"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,23 +1,74 @@
-from typing import List, Dict, Any, AsyncGenerator
+from typing import List, Dict, Any, AsyncGenerator, Optional, Tuple
+import asyncio
+import hashlib
 import json
+from contextlib import aclosing
 import logging
 import re
+import time
 from uuid import uuid4
 
+from app.core.coalescing import SingleFlight
 from app.core.deepseek_client import get_deepseek_client
+from app.core.intent_router import get_intent_router
+from app.core.tool_call_parser import ToolCallAssembler
+from app.core.metrics import (
+    STREAM_CANCELLED,
+    STREAM_COMPLETED,
+    STREAM_TOKENS_SAVED,
+    TOOL_LATENCY,
+)
+from app.core.tracing import span
+from app.services.conversation_store import get_conversation_store
+from app.services.usage import AGENT, ANSWER, SCOPE_CHECK
 from app.core.prompts import SYSTEM_PROMPT, GUARD_RAIL_PROMPT, OUT_OF_SCOPE_RESPONSE
 from app.tools.product_search import ProductSearchTool
 from app.tools.compatibility import CompatibilityTool
 from app.tools.troubleshooting import TroubleshootingTool
-from app.models.schemas import ChatMessage, ChatResponse, StreamChunk
+from app.models.schemas import ChatMessage, ChatResponse, StreamEvent
 from config import settings
 
 logger = logging.getLogger(__name__)
 
 
+class StreamStats:
+    """
+    Counts streams cut short by client disconnects. Tokens saved are
+    estimated from the average length of completed answers, since the
+    upstream never tells us how long a cancelled answer would have been.
+    """
+
+    def __init__(self):
+        self.completed = 0
+        self.avg_completion_tokens = 0.0
+
+    def record_completed(self, tokens: int):
+        self.completed += 1
+        STREAM_COMPLETED.inc()
+        # Running mean; cheap and stable enough for an estimate
+        self.avg_completion_tokens += (
+            tokens - self.avg_completion_tokens
+        ) / self.completed
+
+    def record_cancelled(self, tokens: int) -> int:
+        STREAM_CANCELLED.inc()
+        saved = max(0, round(self.avg_completion_tokens) - tokens)
+        STREAM_TOKENS_SAVED.inc(saved)
+        return saved
+
+
 class Orchestrator:
     def __init__(self):
         self.deepseek = get_deepseek_client()
+        self.router = get_intent_router()
+        self.conversations = get_conversation_store()
+        self.stream_stats = StreamStats()
+        self.tool_flight = SingleFlight(
+            "tool",
+            ttl=settings.TOOL_RESULT_CACHE_TTL,
+            max_entries=settings.TOOL_RESULT_CACHE_SIZE,
+        )
+        self.llm_flight = SingleFlight("llm")
 
         # Initialize tools
         self.tools = {
@@ -106,9 +157,15 @@ class Orchestrator:
     async def check_scope(self, message: str) -> bool:
         """Check if message is within scope using LLM"""
         try:
-            prompt = GUARD_RAIL_PROMPT.format(message=message)
-            response = await self.deepseek.simple_completion(prompt)
-            return "IN_SCOPE" in response.upper()
+            with span("check_scope") as scope_span:
+                prompt = GUARD_RAIL_PROMPT.format(message=message)
+                response = await self._coalesce_llm(
+                    ("scope", prompt),
+                    lambda: self.deepseek.simple_completion(prompt, phase=SCOPE_CHECK),
+                )
+                in_scope = "IN_SCOPE" in response.upper()
+                scope_span.set_attribute("in_scope", in_scope)
+                return in_scope
         except Exception as e:
             logger.error(f"Error in scope check: {e}")
             # Fail open - assume in scope if check fails
@@ -117,220 +174,444 @@ class Orchestrator:
     async def execute_tool(
         self, tool_name: str, arguments: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Execute a tool and return results"""
+        """
+        Execute a tool and return results. Identical concurrent calls share
+        one execution, and successful results are reused briefly.
+        """
+        tool = self.tools.get(tool_name)
+        if not tool:
+            return {"error": f"Tool {tool_name} not found"}
+        if not settings.TOOL_COALESCING_ENABLED:
+            return await self._execute_tool(tool_name, tool, arguments)
+
         try:
-            tool = self.tools.get(tool_name)
-            if not tool:
-                return {"error": f"Tool {tool_name} not found"}
+            normalized = tool.normalize_arguments(arguments)
+        except TypeError:
+            # Bad arguments: let the tool report the error itself
+            return await self._execute_tool(tool_name, tool, arguments)
+
+        key = (tool_name, json.dumps(normalized, sort_keys=True, default=str))
+        return await self.tool_flight.do(
+            key,
+            lambda: self._execute_tool(tool_name, tool, normalized),
+            cacheable=_reusable,
+        )
 
-            result = await tool.execute(**arguments)
+    async def _execute_tool(
+        self, tool_name: str, tool, arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        try:
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                with span(f"tool.{tool_name}", tool=tool_name) as tool_span:
+                    result = await tool.execute(**arguments)
+                    if "error" not in result:
+                        outcome = "ok"
+                    tool_span.set_attribute("success", outcome == "ok")
+            finally:
+                TOOL_LATENCY.labels(tool_name, outcome).observe(
+                    time.perf_counter() - started
+                )
             return result
         except Exception as e:
             logger.error(f"Error executing tool {tool_name}: {e}")
             return {"error": str(e)}
 
     async def process_message(
-        self, message: str, conversation_history: List[ChatMessage]
+        self,
+        message: str,
+        conversation_history: Optional[List[ChatMessage]] = None,
+        conversation_id: Optional[str] = None,
     ) -> ChatResponse:
         """Process a message through the orchestrator"""
 
-        # Check scope
-        is_in_scope = await self.check_scope(message)
-        if not is_in_scope:
-            return ChatResponse(
-                message=OUT_OF_SCOPE_RESPONSE,
-                conversation_id=str(uuid4()),
-                metadata={"out_of_scope": True},
-            )
-
-        # Build messages for Deepseek
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        # Obvious intents skip both the scope check and the planning call
+        routed_calls = self._route(message)
 
-        # Add conversation history
-        for msg in conversation_history[-5:]:  # Keep last 5 messages for context
-            messages.append({"role": msg.role, "content": msg.content})
+        # Check scope
+        if routed_calls is None:
+            is_in_scope = await self.check_scope(message)
+            if not is_in_scope:
+                return ChatResponse(
+                    message=OUT_OF_SCOPE_RESPONSE,
+                    conversation_id=str(uuid4()),
+                    metadata={"out_of_scope": True},
+                )
 
-        # Add current message
-        messages.append({"role": "user", "content": message})
+        history = await self._load_history(conversation_id, conversation_history)
+        messages = self._build_messages(message, history)
 
-        # First LLM call with tools
-        response = await self.deepseek.chat_completion(
-            messages=messages, tools=self.tool_definitions
-        )
+        products = []
+        compatibility = None
+        final_message = None
+        iterations = 0
+
+        # Agent loop: keep running tool rounds until the model answers
+        for iteration in range(settings.MAX_TOOL_ITERATIONS):
+            deadline = self._round_deadline()
+
+            if iteration == 0 and routed_calls:
+                assistant_message = self._routed_assistant_message(routed_calls)
+            else:
+                response = await asyncio.wait_for(
+                    self._coalesce_llm(
+                        ("agent", json.dumps(messages, sort_keys=True)),
+                        lambda: self.deepseek.chat_completion(
+                            messages=messages,
+                            tools=self.tool_definitions,
+                            hedge=iteration == 0,
+                            phase=AGENT,
+                        ),
+                    ),
+                    timeout=self._remaining(deadline),
+                )
+                assistant_message = response["choices"][0]["message"]
 
-        assistant_message = response["choices"][0]["message"]
+            tool_calls = assistant_message.get("tool_calls") or []
+            if not tool_calls:
+                final_message = assistant_message.get("content") or ""
+                break
 
-        # DEBUG: Log the response structure
-        logger.info(f"Assistant message keys: {assistant_message.keys()}")
-        logger.info(f"Content: {assistant_message.get('content', 'None')[:200]}")
-        logger.info(f"Tool calls: {assistant_message.get('tool_calls', 'None')}")
+            iterations += 1
+            messages.append(assistant_message)
 
-        # Check if tools were called
-        tool_calls = assistant_message.get("tool_calls", [])
+            for tool_call, function_name, tool_result in await self._execute_tool_calls(
+                tool_calls, deadline
+            ):
+                if function_name == "product_search" and "products" in tool_result:
+                    products.extend(tool_result["products"])
+                elif (
+                    function_name == "check_compatibility"
+                    and "compatible" in tool_result
+                ):
+                    compatibility = tool_result
 
-        # If content contains tool syntax but no tool_calls, it's a formatting issue
-        content = assistant_message.get("content", "")
-        if "tool_call" in content.lower() and not tool_calls:
-            logger.error("Tool syntax found in content but no tool_calls structure!")
+                messages.append(
+                    self._tool_message(tool_call, function_name, tool_result)
+                )
 
-        if not tool_calls:
-            # No tools needed, return response directly
-            return ChatResponse(
-                message=assistant_message.get("content", ""),
-                conversation_id=str(uuid4()),
+        if final_message is None:
+            # Iteration limit reached: answer with what we have, no more tools
+            logger.warning(
+                f"Reached MAX_TOOL_ITERATIONS ({settings.MAX_TOOL_ITERATIONS})"
             )
-
-        # Execute tools
-        messages.append(assistant_message)
-
-        for tool_call in tool_calls:
-            function_name = tool_call["function"]["name"]
-            function_args = json.loads(tool_call["function"]["arguments"])
-
-            logger.info(f"Executing tool: {function_name} with args: {function_args}")
-
-            # Execute tool
-            tool_result = await self.execute_tool(function_name, function_args)
-
-            # Add tool result to messages
-            messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call["id"],
-                    "name": function_name,
-                    "content": json.dumps(tool_result),
-                }
+            final_response = await asyncio.wait_for(
+                self.deepseek.chat_completion(messages=messages, phase=ANSWER),
+                timeout=self._remaining(self._round_deadline()),
             )
-
-        # Second LLM call with tool results
-        final_response = await self.deepseek.chat_completion(
-            messages=messages, tools=self.tool_definitions
-        )
-        final_message = final_response["choices"][0]["message"]["content"]
-
-        # Extract products from tool results
-        products = []
-        compatibility = None
-
-        for tool_call in tool_calls:
-            function_name = tool_call["function"]["name"]
-            function_args = json.loads(tool_call["function"]["arguments"])
-            tool_result = await self.execute_tool(function_name, function_args)
-
-            if function_name == "product_search" and "products" in tool_result:
-                products.extend(tool_result["products"])
-            elif function_name == "check_compatibility" and "compatible" in tool_result:
-                compatibility = tool_result
+            final_message = final_response["choices"][0]["message"]["content"]
 
         return ChatResponse(
             message=final_message,
             conversation_id=str(uuid4()),
             products=products[:5] if products else None,  # Limit to top 5
             compatibility=compatibility,
+            metadata={
+                "routing": "rule" if routed_calls else "llm",
+                "tool_iterations": iterations,
+            },
         )
 
     async def stream_message(
-        self, message: str, conversation_history: List[ChatMessage]
-    ) -> AsyncGenerator[StreamChunk, None]:
+        self,
+        message: str,
+        conversation_history: Optional[List[ChatMessage]] = None,
+        conversation_id: Optional[str] = None,
+    ) -> AsyncGenerator[StreamEvent, None]:
         """Stream response with tool execution"""
 
-        # Check scope first
-        is_in_scope = await self.check_scope(message)
-        if not is_in_scope:
-            yield StreamChunk(type="text", content=OUT_OF_SCOPE_RESPONSE)
-            yield StreamChunk(type="done", content=None)
-            return
+        routed_calls = self._route(message)
 
-        # Build messages
-        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        # The scope check runs alongside the first upstream request and only
+        # gates the first chunk we forward
+        scope_task = None
+        if routed_calls is None:
+            scope_task = asyncio.create_task(self.check_scope(message))
 
-        for msg in conversation_history[-5:]:
-            messages.append({"role": msg.role, "content": msg.content})
+        history = await self._load_history(conversation_id, conversation_history)
+        messages = self._build_messages(message, history)
+        running: List[Tuple[Dict[str, Any], asyncio.Task]] = []
+        # Upstream content deltas, roughly one token each
+        streamed_tokens = 0
 
-        messages.append({"role": "user", "content": message})
+        try:
+            # Each round is a single streaming request: content deltas go
+            # straight to the client and each tool starts as soon as its
+            # arguments are complete
+            for iteration in range(settings.MAX_TOOL_ITERATIONS + 1):
+                deadline = self._round_deadline()
+                offer_tools = iteration < settings.MAX_TOOL_ITERATIONS
+                running = []
+                announced = False
+
+                if iteration == 0 and routed_calls:
+                    assistant_message = self._routed_assistant_message(routed_calls)
+                    running = [
+                        (call, asyncio.create_task(self._run_tool_call(call, deadline)))
+                        for call in routed_calls
+                    ]
+                else:
+                    content = ""
+                    assembler = ToolCallAssembler()
+
+                    stream = self.deepseek.stream_chat_completion(
+                        messages=messages,
+                        tools=self.tool_definitions if offer_tools else None,
+                        phase=AGENT,
+                    )
+                    async with aclosing(
+                        self._iter_with_deadline(stream, deadline)
+                    ) as chunks:
+                        async for chunk in chunks:
+                            if scope_task is not None:
+                                is_in_scope = await scope_task
+                                scope_task = None
+                                if not is_in_scope:
+                                    yield StreamEvent(
+                                        type="text", content=OUT_OF_SCOPE_RESPONSE
+                                    )
+                                    yield StreamEvent(type="done", content=None)
+                                    return
+
+                            if "choices" not in chunk or len(chunk["choices"]) == 0:
+                                continue
+                            delta = chunk["choices"][0].get("delta", {})
+
+                            if "content" in delta and delta["content"]:
+                                content += delta["content"]
+                                streamed_tokens += 1
+                                yield StreamEvent(type="text", content=delta["content"])
+
+                            for call in assembler.feed(delta.get("tool_calls") or []):
+                                logger.info(
+                                    f"Tool call {call['function']['name']} complete mid-stream"
+                                )
+                                running.append(
+                                    (
+                                        call,
+                                        asyncio.create_task(
+                                            self._run_tool_call(call, deadline)
+                                        ),
+                                    )
+                                )
+                                if not announced:
+                                    announced = True
+                                    yield StreamEvent(
+                                        type="thinking",
+                                        content="Searching for that information...",
+                                    )
+
+                    for call in assembler.finish():
+                        running.append(
+                            (
+                                call,
+                                asyncio.create_task(
+                                    self._run_tool_call(call, deadline)
+                                ),
+                            )
+                        )
+
+                    assistant_message = {"role": "assistant", "content": content}
+                    if assembler.tool_calls:
+                        assistant_message["tool_calls"] = assembler.tool_calls
+
+                if not running:
+                    break
+
+                if not announced:
+                    yield StreamEvent(
+                        type="thinking", content="Searching for that information..."
+                    )
+
+                # Add assistant message with tool calls to conversation
+                messages.append(assistant_message)
+
+                for tool_call, task in running:
+                    tool_result = await task
+                    function_name = tool_call["function"]["name"]
+
+                    for tool_chunk in self._tool_result_chunks(
+                        function_name, tool_result
+                    ):
+                        yield tool_chunk
+
+                    # Add tool result to messages for the next round
+                    messages.append(
+                        self._tool_message(tool_call, function_name, tool_result)
+                    )
+
+            self.stream_stats.record_completed(streamed_tokens)
+            yield StreamEvent(type="done", content=None)
+
+        except asyncio.CancelledError:
+            # The client went away; the finally below and aclosing() above
+            # release the upstream connection and any running tools
+            saved = self.stream_stats.record_cancelled(streamed_tokens)
+            logger.info(
+                f"Stream cancelled after {streamed_tokens} tokens "
+                f"(~{saved} tokens saved)"
+            )
+            raise
+
+        finally:
+            if scope_task is not None:
+                scope_task.cancel()
+            for _, task in running:
+                if not task.done():
+                    task.cancel()
+
+    async def _load_history(
+        self,
+        conversation_id: Optional[str],
+        conversation_history: Optional[List[ChatMessage]],
+    ) -> List[Dict[str, str]]:
+        """Recent context: server-side when the conversation is known"""
+        if conversation_id:
+            return await self.conversations.get_window(conversation_id)
+
+        # Stateless clients may still send their own history
+        return [
+            {"role": msg.role, "content": msg.content}
+            for msg in (conversation_history or [])
+        ]
 
-        # First call to get tool decisions (non-streaming)
-        response = await self.deepseek.chat_completion(
-            messages=messages, tools=self.tool_definitions
+    def _build_messages(
+        self, message: str, history: List[Dict[str, str]]
+    ) -> List[Dict[str, Any]]:
+        """System prompt, recent history and the current user message"""
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        messages.extend(history[-settings.CONVERSATION_CONTEXT_WINDOW :])
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    async def _execute_tool_calls(
+        self, tool_calls: List[Dict[str, Any]], deadline: float
+    ) -> List[Tuple[Dict[str, Any], str, Dict[str, Any]]]:
+        """Run one round of tool calls concurrently within the round deadline"""
+        results = await asyncio.gather(
+            *(self._run_tool_call(tool_call, deadline) for tool_call in tool_calls)
         )
+        return [
+            (tool_call, tool_call["function"]["name"], result)
+            for tool_call, result in zip(tool_calls, results)
+        ]
 
-        assistant_message = response["choices"][0]["message"]
-        tool_calls = assistant_message.get("tool_calls", [])
+    async def _run_tool_call(
+        self, tool_call: Dict[str, Any], deadline: float
+    ) -> Dict[str, Any]:
+        """Parse a tool call's arguments and execute it before the deadline"""
+        function_name = tool_call["function"]["name"]
+        try:
+            function_args = json.loads(tool_call["function"]["arguments"] or "{}")
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid arguments for {function_name}: {e}"}
 
-        if tool_calls:
-            # Execute tools and emit progress
-            yield StreamChunk(
-                type="thinking", content="Searching for that information..."
+        logger.info(f"Executing tool: {function_name} with args: {function_args}")
+        try:
+            return await asyncio.wait_for(
+                self.execute_tool(function_name, function_args),
+                timeout=self._remaining(deadline),
             )
+        except asyncio.TimeoutError:
+            logger.error(f"Tool {function_name} exceeded the round deadline")
+            return {"error": f"Tool {function_name} timed out"}
 
-            # Add assistant message with tool calls to conversation
-            messages.append(assistant_message)
+    @staticmethod
+    def _tool_message(
+        tool_call: Dict[str, Any], function_name: str, tool_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        return {
+            "role": "tool",
+            "tool_call_id": tool_call["id"],
+            "name": function_name,
+            "content": json.dumps(tool_result),
+        }
 
-            # Execute all tools and store results
-            for tool_call in tool_calls:
-                function_name = tool_call["function"]["name"]
-                function_args = json.loads(tool_call["function"]["arguments"])
+    def _tool_result_chunks(
+        self, function_name: str, tool_result: Dict[str, Any]
+    ) -> List[StreamEvent]:
+        """Client-facing chunks for a tool result"""
+        chunks = []
 
-                logger.info(
-                    f"Executing tool: {function_name} with args: {function_args}"
-                )
+        if function_name == "product_search":
+            if "products" in tool_result:
+                for product in tool_result["products"][:5]:
+                    chunks.append(StreamEvent(type="product", content=product))
 
-                # Execute tool
-                tool_result = await self.execute_tool(function_name, function_args)
+        elif function_name == "troubleshoot":
+            diagnostic_text = ""
 
-                # Emit appropriate chunks based on tool type
-                if function_name == "product_search":
-                    if "products" in tool_result:
-                        for product in tool_result["products"][:5]:
-                            yield StreamChunk(type="product", content=product)
+            # Emit diagnostic steps if available
+            steps = tool_result.get("diagnostic_steps") or []
+            if steps:
+                diagnostic_text += "**Diagnostic Steps:**\n"
+                for i, step in enumerate(steps, 1):
+                    diagnostic_text += f"{i}. {step}\n"
 
-                elif function_name == "troubleshoot":
-                    diagnostic_text = ""
+            guides = tool_result.get("guides") or []
+            if guides:
+                diagnostic_text += "\n**Troubleshooting Guides:**\n\n"
+                diagnostic_text += self._format_troubleshooting_guides(guides)
+            else:
+                logger.info("no guides found")
 
-                    # Emit diagnostic steps if available
-                    steps = tool_result.get("diagnostic_steps") or []
-                    if steps:
-                        diagnostic_text += "**Diagnostic Steps:**\n"
-                        for i, step in enumerate(steps, 1):
-                            diagnostic_text += f"{i}. {step}\n"
+            if diagnostic_text.strip():
+                chunks.append(StreamEvent(type="text", content=diagnostic_text))
 
-                    guides = tool_result.get("guides") or []
-                    if guides:
-                        diagnostic_text += "\n**Troubleshooting Guides:**\n\n"
-                        diagnostic_text += self._format_troubleshooting_guides(guides)
-                    else:
-                        logger.info("no guides found")
+            # Emit suggested parts
+            for product in tool_result.get("suggested_parts") or []:
+                chunks.append(StreamEvent(type="product", content=product))
 
-                    if diagnostic_text.strip():
-                        yield StreamChunk(type="text", content=diagnostic_text)
+        elif function_name == "check_compatibility":
+            chunks.append(StreamEvent(type="compatibility", content=tool_result))
 
-                    # Emit suggested parts
-                    for product in tool_result.get("suggested_parts") or []:
-                        yield StreamChunk(type="product", content=product)
+        return chunks
 
-                elif function_name == "check_compatibility":
-                    yield StreamChunk(type="compatibility", content=tool_result)
+    @staticmethod
+    def _round_deadline() -> float:
+        return asyncio.get_running_loop().time() + settings.AGENT_ROUND_TIMEOUT
 
-                # Add tool result to messages for final LLM call
-                messages.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_call["id"],
-                        "name": function_name,
-                        "content": json.dumps(tool_result),
-                    }
-                )
+    @staticmethod
+    def _remaining(deadline: float) -> float:
+        return max(0.0, deadline - asyncio.get_running_loop().time())
 
-        # Stream final response with tool results incorporated
-        async for chunk in self.deepseek.stream_chat_completion(
-            messages=messages, tools=self.tool_definitions
-        ):
-            if "choices" in chunk and len(chunk["choices"]) > 0:
-                delta = chunk["choices"][0].get("delta", {})
-                if "content" in delta and delta["content"]:
-                    yield StreamChunk(type="text", content=delta["content"])
+    @classmethod
+    async def _iter_with_deadline(cls, stream: AsyncGenerator, deadline: float):
+        """
+        Iterate an upstream stream, failing once the round deadline passes:
+        a trickle of tokens can't stretch a round past AGENT_ROUND_TIMEOUT
+        """
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(
+                        stream.__anext__(), timeout=cls._remaining(deadline)
+                    )
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    async def _coalesce_llm(self, key: Tuple[str, str], call):
+        """Share an identical non-streamed LLM call already in flight"""
+        if not settings.LLM_COALESCING_ENABLED:
+            return await call()
+        kind, prompt = key
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return await self.llm_flight.do((kind, digest), call)
+
+    def _route(self, message: str):
+        """Synthesized tool calls for obvious intents, None for LLM planning"""
+        if not settings.INTENT_ROUTING_ENABLED:
+            return None
+        return self.router.route(message)
 
-        yield StreamChunk(type="done", content=None)
+    @staticmethod
+    def _routed_assistant_message(tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Assistant turn equivalent to the planning call choosing these tools"""
+        return {"role": "assistant", "content": "", "tool_calls": tool_calls}
 
     @staticmethod
     def _format_troubleshooting_guides(guides: list) -> str:
@@ -371,6 +652,12 @@ class Orchestrator:
         return "\n\n".join(blocks)
 
 
+def _reusable(result: Dict[str, Any]) -> bool:
+    # Fallback results stand in while a dependency is down; reusing them
+    # would keep serving lexical answers after it recovers
+    return "error" not in result and not result.get("degraded")
+
+
 # Global instance
 _orchestrator = None
 
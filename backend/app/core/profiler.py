@@ -0,0 +1,192 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import sys
+import threading
+import time
+
+from config import settings
+
+# Shortened frame paths: relative to the backend or to site-packages
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__))) + os.sep
+MAX_DEPTH = 128
+
+# Innermost frames of a thread parked with nothing to do: an idle event
+# loop, an idle to_thread() worker, a sleeping background thread
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("concurrent" + os.sep + "futures" + os.sep + "thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+# One profile per worker at a time: samples cover every thread anyway
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    """Another profile is already running in this worker"""
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler: a background thread snapshots every other
+    thread's stack (sys._current_frames) at a fixed interval and counts
+    identical stacks. Nothing is hooked into the interpreter, so the
+    sampled code runs at full speed; the cost is one stack walk per thread
+    per tick, under the GIL.
+    """
+
+    def __init__(self, interval: float, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._labels: Dict[Any, str] = {}
+        self._idle: Dict[Any, bool] = {}
+        self._thread_names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if not _profile_lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already running in this worker")
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self.started_at
+        _profile_lock.release()
+
+    def _run(self):
+        own = threading.get_ident()
+        next_tick = time.perf_counter()
+        while not self._stop.is_set():
+            for ident, frame in sys._current_frames().items():
+                if ident == own or (not self.include_idle and self._is_idle(frame)):
+                    continue
+                self.samples[(self._thread_name(ident), self._stack(frame))] += 1
+            self.sample_count += 1
+
+            next_tick += self.interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (GIL contention): skip ticks rather than burst
+                next_tick = time.perf_counter()
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._thread_names.get(ident)
+        if name is None:
+            self._thread_names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._thread_names.get(ident, str(ident))
+        return name
+
+    def _is_idle(self, frame) -> bool:
+        code = frame.f_code
+        idle = self._idle.get(code)
+        if idle is None:
+            idle = self._idle[code] = any(
+                code.co_name == name and code.co_filename.endswith(os.sep + suffix)
+                for suffix, name in IDLE_FRAMES
+            )
+        return idle
+
+    def _stack(self, frame) -> Tuple[str, ...]:
+        """Frame labels, outermost first"""
+        labels = []
+        while frame is not None and len(labels) < MAX_DEPTH:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code)
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed format, for flamegraph.pl or speedscope"""
+        return "\n".join(
+            f"{';'.join((thread,) + stack)} {count}"
+            for (thread, stack), count in self.samples.most_common()
+        )
+
+    def speedscope(self, name: str = "partselect-chat") -> Dict[str, Any]:
+        """A speedscope file (https://www.speedscope.app), one profile per thread"""
+        frames: List[Dict[str, Any]] = []
+        index: Dict[str, int] = {}
+        profiles: Dict[str, Dict[str, Any]] = {}
+
+        for (thread, stack), count in self.samples.most_common():
+            profile = profiles.setdefault(
+                thread,
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": [],
+                    "weights": [],
+                },
+            )
+            sample = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({"name": label})
+                sample.append(index[label])
+            profile["samples"].append(sample)
+            profile["weights"].append(count * self.interval)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "partselect-chat sampling profiler",
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "duration_s": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "ticks": self.sample_count,
+            "unique_stacks": len(self.samples),
+        }
+
+
+def _label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(BACKEND_DIR):
+        filename = filename[len(BACKEND_DIR) :]
+    elif "site-packages" + os.sep in filename:
+        filename = filename.split("site-packages" + os.sep, 1)[1]
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+def create_profiler(
+    interval_ms: Optional[float] = None, include_idle: bool = False
+) -> SamplingProfiler:
+    return SamplingProfiler(
+        (interval_ms or settings.PROFILING_INTERVAL_MS) / 1000, include_idle
+    )
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+# Loaded, but its health probes are failing
+DEGRADED = "degraded"
+
+
+class Component:
+    """Load state of one startup dependency"""
+
+    def __init__(self, name: str, required: bool):
+        self.name = name
+        self.required = required
+        self.status = PENDING
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        # Set once the component settles, whether it loaded or failed
+        self.settled = asyncio.Event()
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = {"status": self.status, "required": self.required}
+        if self.load_seconds is not None:
+            state["load_seconds"] = round(self.load_seconds, 3)
+        if self.error:
+            state["error"] = self.error
+        return state
+
+
+class ReadinessRegistry:
+    """
+    Tracks heavy components that warm up after the app starts serving.
+
+    The app is ready once every required component is; optional ones only
+    degrade the answers (e.g. lexical instead of semantic search) while
+    they load.
+    """
+
+    def __init__(self):
+        self.components: Dict[str, Component] = {}
+
+    def register(self, name: str, required: bool = True) -> Component:
+        if name not in self.components:
+            self.components[name] = Component(name, required)
+        return self.components[name]
+
+    def mark_ready(self, name: str, load_seconds: Optional[float] = None):
+        component = self.register(name)
+        component.status = READY
+        component.load_seconds = load_seconds
+        component.error = None
+        component.settled.set()
+
+    def mark_failed(self, name: str, error: BaseException):
+        component = self.register(name)
+        component.status = FAILED
+        component.error = str(error) or error.__class__.__name__
+        component.settled.set()
+
+    def mark_degraded(self, name: str, error: str):
+        component = self.register(name)
+        component.status = DEGRADED
+        component.error = error
+        component.settled.set()
+
+    def mark_healthy(self, name: str):
+        """Ready again after probes pass; keeps the original load time"""
+        component = self.register(name)
+        component.status = READY
+        component.error = None
+        component.settled.set()
+
+    async def load(self, name: str, loader: Callable[[], Any]) -> bool:
+        """Run a blocking loader in a thread and record the outcome"""
+        component = self.register(name)
+        component.status = LOADING
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(loader)
+        except Exception as e:
+            logger.error(f"Failed to load {name}: {e}", exc_info=True)
+            self.mark_failed(name, e)
+            return False
+
+        self.mark_ready(name, time.perf_counter() - started)
+        logger.info(f"{name} ready in {component.load_seconds:.2f}s")
+        return True
+
+    def is_ready(self, *names: str) -> bool:
+        return all(
+            name in self.components and self.components[name].status == READY
+            for name in names
+        )
+
+    async def wait(self, names: Iterable[str], timeout: float) -> bool:
+        """Wait up to `timeout` seconds for all `names`; False if any isn't ready"""
+        names = list(names)
+        if self.is_ready(*names):
+            return True
+
+        pending = [self.register(name).settled.wait() for name in names]
+        try:
+            await asyncio.wait_for(asyncio.gather(*pending), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.is_ready(*names)
+
+    @property
+    def ready(self) -> bool:
+        return all(c.status == READY for c in self.components.values() if c.required)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "degraded": any(c.status != READY for c in self.components.values()),
+            "components": {
+                name: component.snapshot()
+                for name, component in self.components.items()
+            },
+        }
+
+
+# Global instance
+_readiness = None
+
+
+def get_readiness() -> ReadinessRegistry:
+    global _readiness
+    if _readiness is None:
+        _readiness = ReadinessRegistry()
+    return _readiness
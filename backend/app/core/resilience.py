@@ -0,0 +1,286 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Upstream statuses that are worth retrying (rate limits and server errors)
+RETRYABLE_STATUS_CODES: Set[int] = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when the circuit breaker is shedding load"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(
+            f"Upstream '{name}' is unavailable, retry in {retry_after:.1f}s"
+        )
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter that honors Retry-After"""
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retryable_status_codes: Optional[Set[int]] = None,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable_status_codes = retryable_status_codes or RETRYABLE_STATUS_CODES
+
+    def is_retryable(self, exc: BaseException) -> bool:
+        """Transport failures and retryable HTTP statuses can be retried"""
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code in self.retryable_status_codes
+        return isinstance(exc, httpx.TransportError)
+
+    @staticmethod
+    def is_upstream_failure(exc: BaseException) -> bool:
+        """Whether the error says the upstream is unhealthy (rate limits do not)"""
+        if isinstance(exc, httpx.HTTPStatusError):
+            return exc.response.status_code >= 500
+        return isinstance(exc, httpx.TransportError)
+
+    def compute_delay(
+        self, attempt: int, exc: Optional[BaseException] = None
+    ) -> Optional[float]:
+        """
+        Delay before retry number `attempt` (0-based), or None when the
+        server asks us to wait longer than `max_delay`
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2**attempt))
+        delay = random.uniform(0, ceiling)
+
+        retry_after = self._retry_after(exc)
+        if retry_after is not None:
+            # The server told us when to come back; never retry earlier than
+            # that, and don't hold the request that long: give up instead
+            if retry_after > self.max_delay:
+                return None
+            delay = max(delay, retry_after)
+
+        return delay
+
+    @staticmethod
+    def _retry_after(exc: Optional[BaseException]) -> Optional[float]:
+        """Parse a Retry-After header (seconds or HTTP date)"""
+        if not isinstance(exc, httpx.HTTPStatusError):
+            return None
+
+        value = exc.response.headers.get("Retry-After")
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+    closed -> open after `failure_threshold` failures, open -> half_open after
+    `reset_timeout`, half_open lets a single probe through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call should be shed"""
+        state = self.state
+
+        if state == self.OPEN:
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            raise CircuitOpenError(self.name, max(remaining, 0.0))
+
+        if state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            self._probe_in_flight = True
+
+    def release_probe(self):
+        """A call ended without a verdict (cancelled): let the next one probe"""
+        self._probe_in_flight = False
+
+    def record_success(self):
+        if self._state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._probe_in_flight = False
+
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning(
+                    f"Circuit '{self.name}' opened after {self._failures} failures"
+                )
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to pick the hedge delay"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class ResilientCaller:
+    """Runs upstream calls with retries, optional hedging and a circuit breaker"""
+
+    def __init__(
+        self,
+        name: str,
+        retry_policy: RetryPolicy,
+        circuit_breaker: CircuitBreaker,
+        hedge_enabled: bool = False,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+    ):
+        self.name = name
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latency = LatencyTracker()
+
+    async def call(
+        self, fn: Callable[[], Awaitable[Any]], hedge: bool = False
+    ) -> Any:
+        """Call `fn` until it succeeds, the retry budget runs out or the circuit opens"""
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_call()
+            started = time.monotonic()
+            try:
+                if hedge and self.hedge_enabled:
+                    result = await self._hedged(fn)
+                else:
+                    result = await fn()
+            except Exception as e:
+                if isinstance(e, httpx.HTTPStatusError) and not (
+                    self.retry_policy.is_upstream_failure(e)
+                ):
+                    # A client error means the upstream itself is reachable
+                    self.circuit_breaker.record_success()
+                else:
+                    # Upstream failures, and anything unexpected, so that a
+                    # half-open probe always gets a verdict
+                    self.circuit_breaker.record_failure()
+
+                if not self.retry_policy.is_retryable(e):
+                    raise
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+
+                delay = self.retry_policy.compute_delay(attempt, e)
+                if delay is None:
+                    raise
+                logger.warning(
+                    f"{self.name} call failed ({e}), retry {attempt + 1}/"
+                    f"{self.retry_policy.max_retries} in {delay:.2f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Cancelled by a deadline or a disconnect
+                self.circuit_breaker.release_probe()
+                raise
+
+            self.latency.record(time.monotonic() - started)
+            self.circuit_breaker.record_success()
+            return result
+
+    async def _hedged(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Send a second request if the first is slower than the latency percentile"""
+        if len(self.latency) < self.hedge_min_samples:
+            return await fn()
+
+        hedge_delay = self.latency.percentile(self.hedge_percentile)
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        error = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+            if done:
+                return primary.result()
+
+            logger.info(
+                f"{self.name} call exceeded p{self.hedge_percentile:g}, hedging"
+            )
+            pending.add(asyncio.ensure_future(fn()))
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also reached when our caller is cancelled: no request outlives us
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
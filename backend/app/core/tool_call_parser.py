@@ -0,0 +1,80 @@
+from typing import List, Dict, Any, Optional
+import json
+
+
+class ToolCallAssembler:
+    """
+    Incrementally assembles OpenAI-style `tool_calls` deltas from a stream.
+
+    `feed` returns tool calls as soon as their arguments are complete, so
+    they can be executed while the rest of the stream is still arriving.
+    A call is complete once its arguments parse as a JSON object, or when
+    the stream moves on to the next call index.
+    """
+
+    def __init__(self):
+        self._calls: Dict[int, Dict[str, Any]] = {}
+        self._order: List[int] = []
+        self._emitted = set()
+
+    def feed(self, deltas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fold in one chunk's `tool_calls` deltas, return newly completed calls"""
+        completed = []
+
+        for delta in deltas:
+            index = delta.get("index", 0)
+
+            if index not in self._calls:
+                # A new index means every earlier call has been fully streamed
+                for previous in self._order:
+                    completed.extend(self._complete(previous))
+
+                self._calls[index] = {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""},
+                }
+                self._order.append(index)
+
+            call = self._calls[index]
+            if delta.get("id"):
+                call["id"] = delta["id"]
+
+            function = delta.get("function") or {}
+            if function.get("name"):
+                call["function"]["name"] += function["name"]
+
+            fragment = function.get("arguments")
+            if fragment:
+                call["function"]["arguments"] += fragment
+                # Only closing fragments can finish a JSON object
+                if "}" in fragment and self._arguments_complete(call):
+                    completed.extend(self._complete(index))
+
+        return completed
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Flush calls that were still open when the stream ended"""
+        completed = []
+        for index in self._order:
+            completed.extend(self._complete(index))
+        return completed
+
+    @property
+    def tool_calls(self) -> List[Dict[str, Any]]:
+        """All calls seen so far, in stream order"""
+        return [self._calls[index] for index in self._order]
+
+    def _complete(self, index: int) -> List[Dict[str, Any]]:
+        if index in self._emitted:
+            return []
+        self._emitted.add(index)
+        return [self._calls[index]]
+
+    @staticmethod
+    def _arguments_complete(call: Dict[str, Any]) -> bool:
+        try:
+            parsed: Optional[Any] = json.loads(call["function"]["arguments"])
+        except json.JSONDecodeError:
+            return False
+        return isinstance(parsed, dict) and bool(call["function"]["name"])
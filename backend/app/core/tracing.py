@@ -0,0 +1,345 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_EXPORTERS = ("none", "jsonl", "otel")
+
+# Trace of the chat turn being handled, and the innermost open span. Tasks
+# and to_thread() calls copy the context, so tools, tool threads and the
+# stream producer all record into the turn that started them.
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+
+# Set by setup_tracing() when spans are also sent to OpenTelemetry
+_otel_tracer = None
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = (
+        "trace",
+        "name",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "start",
+        "end",
+        "error",
+        "_otel",
+    )
+
+    def __init__(self, trace: "Trace", name: str, parent: Optional["Span"], **attrs):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Any] = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.error: Optional[str] = None
+        self._otel = _start_otel_span(name, parent, attrs)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+        if self._otel is not None and value is not None:
+            self._otel.set_attribute(key, value)
+
+    def set_attributes(self, **attrs):
+        for key, value in attrs.items():
+            self.set_attribute(key, value)
+
+    def finish(self, error: Optional[BaseException] = None):
+        if self.end is not None:
+            return
+        self.end = time.perf_counter()
+        if error is not None:
+            self.error = f"{error.__class__.__name__}: {error}"
+        self.trace.record(self)
+        if self._otel is not None:
+            _end_otel_span(self._otel, error)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - self.trace.root.start) * 1000, 2),
+            "duration_ms": round(self.duration_ms, 2),
+        }
+        if self.attributes:
+            record["attributes"] = self.attributes
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+class _NoopSpan:
+    """Returned when no trace is active, so call sites need no checks"""
+
+    name = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attrs):
+        pass
+
+    def finish(self, error: Optional[BaseException] = None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """Spans of one chat turn, with a per-phase latency breakdown"""
+
+    def __init__(self, name: str, **attrs):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()  # spans finish in tool threads too
+        self.root = Span(self, name, None, **attrs)
+
+    def record(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> Dict[str, Any]:
+        """Totals per span name plus every span, ordered by start time"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+
+        phases: Dict[str, Dict[str, Any]] = {}
+        for s in spans:
+            if s is self.root:
+                continue
+            phase = phases.setdefault(s.name, {"count": 0, "total_ms": 0.0})
+            phase["count"] += 1
+            phase["total_ms"] = round(phase["total_ms"] + s.duration_ms, 2)
+
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "total_ms": round(self.root.duration_ms, 2),
+            "attributes": self.root.attributes,
+            "phases": phases,
+            "spans": [s.to_dict() for s in spans if s is not self.root],
+        }
+
+    def finish(self, error: Optional[BaseException] = None):
+        if self.root.end is not None:
+            return
+        self.root.finish(error)
+        _export(self)
+
+
+@contextmanager
+def activate(trace: Trace) -> Iterator[Trace]:
+    """Make `trace` current; tasks created inside inherit it"""
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+@contextmanager
+def start_trace(name: str, **attrs) -> Iterator[Trace]:
+    """Trace a whole turn; finished and exported on exit"""
+    trace = Trace(name, **attrs)
+    with activate(trace):
+        try:
+            yield trace
+        except BaseException as e:
+            trace.finish(e)
+            raise
+    trace.finish()
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_span(name: str, **attrs):
+    """
+    A span that is not made current, for work that outlives the caller's
+    frame (async generators, callbacks). The caller must finish() it.
+    """
+    trace = _current_trace.get()
+    if trace is None or not settings.TRACING_ENABLED:
+        return NOOP_SPAN
+    return Span(trace, name, _current_span.get(), **attrs)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a block as a child of the current span"""
+    current = start_span(name, **attrs)
+    if current is NOOP_SPAN:
+        yield current
+        return
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def instrument_engine(engine):
+    """Record every SQL statement run during a traced turn as a db.query span"""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if _current_trace.get() is None:
+            return
+        conn.info.setdefault("trace_spans", []).append(
+            start_span(
+                "db.query",
+                statement=" ".join(statement.split())[:120],
+                executemany=many,
+            )
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            current = spans.pop()
+            current.set_attribute("rowcount", cursor.rowcount)
+            current.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        spans = (
+            context.connection.info.get("trace_spans") if context.connection else None
+        )
+        if spans:
+            spans.pop().finish(context.original_exception)
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+_export_lock = threading.Lock()
+
+
+def _export(trace: Trace):
+    if trace.root.duration_ms >= settings.TRACE_SLOW_TURN_MS > 0:
+        phases = trace.breakdown()["phases"]
+        summary = ", ".join(
+            f"{name} {phase['total_ms']:.0f}ms x{phase['count']}"
+            for name, phase in sorted(
+                phases.items(), key=lambda item: -item[1]["total_ms"]
+            )
+        )
+        logger.warning(
+            f"Slow turn {trace.trace_id}: {trace.root.duration_ms:.0f}ms ({summary})"
+        )
+
+    if settings.TRACE_EXPORTER == "jsonl":
+        line = json.dumps(trace.breakdown(), default=str)
+        try:
+            with _export_lock, open(settings.TRACE_FILE, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.error(f"Failed to write trace: {e}")
+
+
+def setup_tracing():
+    """Configure the exporter chosen by TRACE_EXPORTER"""
+    global _otel_tracer
+
+    if settings.TRACE_EXPORTER not in TRACE_EXPORTERS:
+        raise ValueError(
+            f"Unknown TRACE_EXPORTER {settings.TRACE_EXPORTER!r}, "
+            f"expected one of {TRACE_EXPORTERS}"
+        )
+    if settings.TRACE_EXPORTER == "jsonl":
+        os.makedirs(os.path.dirname(settings.TRACE_FILE) or ".", exist_ok=True)
+        logger.info(f"Writing turn traces to {settings.TRACE_FILE}")
+    if settings.TRACE_EXPORTER != "otel":
+        return
+
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:
+        logger.warning("TRACE_EXPORTER=otel but opentelemetry is not installed")
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+        )
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": settings.APP_NAME})
+        )
+        if os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            exporter = OTLPSpanExporter()
+        else:
+            # Local exporter: spans as JSON on stdout
+            exporter = ConsoleSpanExporter()
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+        otel_trace.set_tracer_provider(provider)
+    except ImportError:
+        # API only: spans go to whatever provider the host configured
+        logger.info("opentelemetry-sdk not installed, using the global provider")
+
+    _otel_tracer = otel_trace.get_tracer("partselect.chat")
+
+
+def _start_otel_span(name: str, parent: Optional[Span], attrs: Dict[str, Any]):
+    if _otel_tracer is None:
+        return None
+    from opentelemetry import trace as otel_trace
+
+    # Parents are passed explicitly rather than through OTel's own context,
+    # so spans opened in generators never have to be detached
+    context = None
+    if parent is not None and parent._otel is not None:
+        context = otel_trace.set_span_in_context(parent._otel)
+    return _otel_tracer.start_span(
+        name,
+        context=context,
+        attributes={k: v for k, v in attrs.items() if v is not None},
+    )
+
+
+def _end_otel_span(otel_span, error: Optional[BaseException]):
+    if error is not None:
+        from opentelemetry.trace import Status, StatusCode
+
+        otel_span.record_exception(error)
+        otel_span.set_status(Status(StatusCode.ERROR, str(error)))
+    otel_span.end()
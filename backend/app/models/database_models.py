@@ -4,10 +4,13 @@ from sqlalchemy import (
     String,
     Float,
     Boolean,
+    Date,
     DateTime,
     JSON,
     ForeignKey,
     Text,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -48,6 +51,13 @@ class Compatibility(Base):
     # Relationships
     product = relationship("Product", back_populates="compatibilities")
 
+    # Natural key for ingestion upserts
+    __table_args__ = (
+        UniqueConstraint(
+            "product_id", "model_number", name="uq_compatibility_product_model"
+        ),
+    )
+
 
 class Conversation(Base):
     __tablename__ = "conversations"
@@ -73,3 +83,38 @@ class Message(Base):
 
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
+
+    # Keyset pagination of a conversation's history in (timestamp, id) order
+    __table_args__ = (
+        Index(
+            "idx_messages_conversation_timestamp_id",
+            "conversation_id",
+            "timestamp",
+            "id",
+        ),
+    )
+
+
+class TokenUsage(Base):
+    """
+    LLM token usage deltas, flushed periodically by each worker; reports sum
+    them. Not linked to `conversations` so accounting outlives retention.
+    """
+
+    __tablename__ = "token_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    conversation_id = Column(String)  # None for calls outside a chat turn
+    phase = Column(String, nullable=False)  # scope_check, planning, answer, other
+    model = Column(String, nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    cached_tokens = Column(Integer, nullable=False, default=0)
+    recorded_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("idx_token_usage_day_phase", "day", "phase"),
+        Index("idx_token_usage_conversation_day", "conversation_id", "day"),
+    )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any, Literal
+from typing import List, Optional, Dict, Any, Literal, NamedTuple
 from datetime import datetime, timezone
 
 
@@ -12,7 +12,14 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[str] = None
+    # Only used without a conversation_id; known conversations load server-side
     conversation_history: List[ChatMessage] = Field(default_factory=list)
+    # Return the turn's per-phase latency breakdown in the response metadata
+    # (in the "done" event when streaming)
+    debug: bool = False
+    # Sample the worker while this message is handled (/chat/message only;
+    # needs PROFILING_ENABLED and X-Admin-Key); stacks land in the metadata
+    profile: bool = False
 
 
 class ProductInfo(BaseModel):
@@ -58,3 +65,13 @@ class StreamChunk(BaseModel):
     type: Literal["text", "product", "compatibility", "thinking", "done", "error"]
     content: Any
     timestamp: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class StreamEvent(NamedTuple):
+    """
+    A StreamChunk as it travels through the server, one per token: no
+    validation or timestamp until SSEWriter stamps the frame it ends up in
+    """
+
+    type: str
+    content: Any
@@ -0,0 +1,140 @@
+from typing import Deque, Dict, List
+from collections import OrderedDict, deque
+import asyncio
+import logging
+import time
+
+from sqlalchemy import select
+
+from app.core.metrics import record_cache
+from app.models.database_models import Conversation, Message
+from app.services.database import SessionLocal
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Context entries are plain {"role", "content"} dicts, ready for the LLM
+ContextMessage = Dict[str, str]
+
+
+class ConversationStore:
+    """
+    Recent context window per conversation: a hot LRU in front of the
+    `messages` table. The write-behind writer appends every persisted
+    turn here, so the cache stays ahead of the database.
+
+    With several workers, turns of one conversation can land on other
+    workers' caches, so an entry is reloaded from the database once it is
+    `ttl` seconds old. A local append keeps it for at least `write_grace`
+    seconds, until the writer has flushed that turn.
+    """
+
+    def __init__(
+        self,
+        max_conversations: int,
+        window: int,
+        ttl: float = 0.0,
+        write_grace: float = 0.0,
+    ):
+        self.max_conversations = max_conversations
+        self.window = window
+        self.ttl = ttl
+        self.write_grace = write_grace
+        self._cache: "OrderedDict[str, Deque[ContextMessage]]" = OrderedDict()
+        # conversation_id -> monotonic time the entry goes stale
+        self._expires: Dict[str, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    async def get_window(self, conversation_id: str) -> List[ContextMessage]:
+        """The most recent messages of a conversation, oldest first"""
+        cached = self._cache.get(conversation_id)
+        if cached is not None and self._stale(conversation_id):
+            self.evict(conversation_id)
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            record_cache("conversation", True)
+            self._cache.move_to_end(conversation_id)
+            return list(cached)
+
+        self.misses += 1
+        record_cache("conversation", False)
+        try:
+            loaded = await asyncio.to_thread(self._load, conversation_id)
+        except Exception as e:
+            logger.error(f"Failed to load context for {conversation_id}: {e}")
+            return []
+
+        # An append may have created the entry while we were loading
+        if conversation_id not in self._cache:
+            self._put(conversation_id, deque(loaded, maxlen=self.window))
+        return list(self._cache[conversation_id])
+
+    def start(self, conversation_id: str):
+        """Register a brand new conversation, so its first turns are cached"""
+        if conversation_id not in self._cache:
+            self._put(conversation_id, deque(maxlen=self.window))
+
+    def append(self, conversation_id: str, messages: List[ContextMessage]):
+        """Add turns to a cached conversation; uncached ones load from the DB later"""
+        cached = self._cache.get(conversation_id)
+        if cached is None:
+            return
+        cached.extend(messages)
+        self._cache.move_to_end(conversation_id)
+        if self.ttl > 0:
+            self._expires[conversation_id] = max(
+                self._expires.get(conversation_id, 0.0),
+                time.monotonic() + self.write_grace,
+            )
+
+    def evict(self, conversation_id: str):
+        self._cache.pop(conversation_id, None)
+        self._expires.pop(conversation_id, None)
+
+    def _stale(self, conversation_id: str) -> bool:
+        expires = self._expires.get(conversation_id)
+        return expires is not None and expires <= time.monotonic()
+
+    def _put(self, conversation_id: str, messages: Deque[ContextMessage]):
+        self._cache[conversation_id] = messages
+        self._cache.move_to_end(conversation_id)
+        if self.ttl > 0:
+            self._expires[conversation_id] = time.monotonic() + self.ttl
+        while len(self._cache) > self.max_conversations:
+            evicted, _ = self._cache.popitem(last=False)
+            self._expires.pop(evicted, None)
+
+    def _load(self, conversation_id: str) -> List[ContextMessage]:
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                select(Message.role, Message.content)
+                .join(Conversation, Message.conversation_id == Conversation.id)
+                .where(Conversation.conversation_id == conversation_id)
+                .order_by(Message.timestamp.desc(), Message.id.desc())
+                .limit(self.window)
+            ).all()
+        finally:
+            db.close()
+
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+
+# Global instance
+_conversation_store = None
+
+
+def get_conversation_store() -> ConversationStore:
+    global _conversation_store
+    if _conversation_store is None:
+        _conversation_store = ConversationStore(
+            max_conversations=settings.CONVERSATION_CACHE_SIZE,
+            window=settings.CONVERSATION_CONTEXT_WINDOW,
+            ttl=settings.CONVERSATION_CACHE_TTL,
+            # Long enough for the write-behind writer to flush a turn
+            write_grace=max(5.0, settings.PERSISTENCE_FLUSH_INTERVAL * 10),
+        )
+    return _conversation_store
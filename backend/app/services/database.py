@@ -1,5 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from app.core.metrics import TimedQueuePool
+from app.core.tracing import instrument_engine
 from app.models.database_models import Base
 from config import settings
 import logging
@@ -9,9 +11,14 @@ logger = logging.getLogger(__name__)
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    # Records checkout wait in db_pool_checkout_wait_seconds
+    poolclass=TimedQueuePool,
     echo=settings.ENVIRONMENT == "development",
 )
 
+# SQL statements show up as db.query spans in turn traces
+instrument_engine(engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -0,0 +1,204 @@
+from typing import Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+
+import numpy as np
+
+from app.services.embeddings import create_embedding_backend
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Per-process backend, loaded once by the pool initializer
+_worker_backend = None
+
+
+def _init_worker(backend: str, model_name: str, threads: int):
+    global _worker_backend
+    # Workers share the cores; don't let each one spawn a full thread pool
+    _worker_backend = create_embedding_backend(
+        backend, threads=threads, model_name=model_name
+    )
+    _worker_backend.load()
+
+
+def _dimension() -> int:
+    return _worker_backend.encode(["dimension probe"]).shape[1]
+
+
+def _encode_shard(
+    path: str, shape: tuple, start: int, texts: List[str], batch_size: int
+) -> int:
+    """Encode one shard and write it straight into the shared memmap"""
+    embeddings = _worker_backend.encode(texts, batch_size=batch_size)
+    output = np.memmap(path, dtype=np.float32, mode="r+", shape=shape)
+    output[start : start + len(texts)] = embeddings
+    output.flush()
+    del output
+    return start
+
+
+class ParallelEmbeddingBuilder:
+    """
+    Encodes a large document set across a process pool.
+
+    Documents are split into shards; each worker loads the configured
+    embedding backend (EMBEDDING_BACKEND, as for queries) once and writes
+    its shards into a memory-mapped float32 matrix. A manifest
+    records finished shards, so a crashed build resumes where it stopped
+    when called again with the same documents.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        work_dir: str,
+        workers: int,
+        shard_size: int,
+        batch_size: int,
+        backend: Optional[str] = None,
+    ):
+        self.model_name = model_name
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        self.work_dir = Path(work_dir)
+        self.workers = max(1, workers)
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+
+    def build_dir(self, documents: List[str]) -> Path:
+        """Builds are keyed by their input, so only identical work resumes"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.model_id.encode())
+        for text in documents:
+            digest.update(hashlib.blake2b(text.encode(), digest_size=16).digest())
+        return self.work_dir / digest.hexdigest()
+
+    @property
+    def model_id(self) -> str:
+        """What produced the vectors; builds by another model never resume"""
+        if self.backend == "onnx":
+            variant = "int8" if settings.EMBEDDING_ONNX_QUANTIZED else "fp32"
+            return f"onnx:{settings.EMBEDDING_ONNX_DIR}:{variant}"
+        return f"{self.backend}:{self.model_name}"
+
+    def build(self, documents: List[str]) -> np.ndarray:
+        """Embeddings for `documents`, row-aligned, as a read-only memmap"""
+        if not documents:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        build_dir = self.build_dir(documents)
+        build_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = build_dir / "manifest.json"
+        output_path = build_dir / "embeddings.f32"
+        manifest = self._load_manifest(manifest_path, len(documents))
+
+        starts = range(0, len(documents), self.shard_size)
+        pending = [s for s in starts if s not in manifest["done"]]
+        if manifest["done"]:
+            logger.info(
+                f"Resuming embedding build: {len(manifest['done'])} of "
+                f"{len(starts)} shards already done"
+            )
+
+        if pending:
+            self._run(documents, pending, manifest, manifest_path, output_path)
+
+        shape = (manifest["count"], manifest["dim"])
+        return np.memmap(output_path, dtype=np.float32, mode="r", shape=shape)
+
+    def cleanup(self, documents: List[str]):
+        """Remove a finished build once its vectors are stored"""
+        shutil.rmtree(self.build_dir(documents), ignore_errors=True)
+
+    def _run(
+        self,
+        documents: List[str],
+        pending: List[int],
+        manifest: Dict,
+        manifest_path: Path,
+        output_path: Path,
+    ):
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        started = time.perf_counter()
+        encoded = 0
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.backend, self.model_name, threads),
+        ) as pool:
+            if manifest["dim"] is None:
+                manifest["dim"] = pool.submit(_dimension).result()
+                self._save_manifest(manifest_path, manifest)
+
+            shape = (manifest["count"], manifest["dim"])
+            if not output_path.exists():
+                np.memmap(output_path, dtype=np.float32, mode="w+", shape=shape).flush()
+
+            futures = {
+                pool.submit(
+                    _encode_shard,
+                    str(output_path),
+                    shape,
+                    start,
+                    documents[start : start + self.shard_size],
+                    self.batch_size,
+                ): start
+                for start in pending
+            }
+            for future in as_completed(futures):
+                start = future.result()
+                manifest["done"].append(start)
+                self._save_manifest(manifest_path, manifest)
+
+                encoded += min(self.shard_size, len(documents) - start)
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"Embedded shard {len(manifest['done'])}/"
+                    f"{-(-len(documents) // self.shard_size)} "
+                    f"({encoded / elapsed:.0f} docs/s, {self.workers} workers)"
+                )
+
+    def _load_manifest(self, path: Path, count: int) -> Dict:
+        if path.exists():
+            manifest = json.loads(path.read_text())
+            if (
+                manifest.get("count") == count
+                and manifest.get("shard_size") == self.shard_size
+            ):
+                return manifest
+            logger.warning(f"Discarding incompatible build manifest {path}")
+            (path.parent / "embeddings.f32").unlink(missing_ok=True)
+
+        return {
+            "model": self.model_id,
+            "count": count,
+            "shard_size": self.shard_size,
+            "dim": None,
+            "done": [],
+        }
+
+    @staticmethod
+    def _save_manifest(path: Path, manifest: Dict):
+        # Atomic replace: a crash never leaves a half-written manifest
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, path)
+
+
+def get_embedding_builder(workers: Optional[int] = None) -> ParallelEmbeddingBuilder:
+    return ParallelEmbeddingBuilder(
+        model_name=settings.EMBEDDING_MODEL,
+        work_dir=settings.EMBEDDING_BUILD_DIR,
+        workers=workers or settings.EMBEDDING_WORKERS,
+        shard_size=settings.EMBEDDING_SHARD_SIZE,
+        batch_size=settings.EMBEDDING_BATCH_SIZE,
+    )
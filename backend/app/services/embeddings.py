@@ -0,0 +1,185 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import List, Optional
+import json
+import logging
+
+import numpy as np
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("sentence_transformers", "onnx")
+
+# Written next to the exported model by scripts/export_onnx.py
+ONNX_CONFIG = "embedding_config.json"
+ONNX_MODEL = "model.onnx"
+ONNX_QUANTIZED_MODEL = "model.int8.onnx"
+TOKENIZER = "tokenizer.json"
+
+
+class EmbeddingBackend(ABC):
+    """Turns text into vectors for the vector store"""
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Backend name"""
+        pass
+
+    @abstractmethod
+    def load(self):
+        """Load the model; called once, off the event loop"""
+        pass
+
+    @abstractmethod
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """float32 matrix with one row per text"""
+        pass
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """The reference PyTorch model"""
+
+    def __init__(self, model_name: str, threads: int = 0):
+        self.model_name = model_name
+        self.threads = threads
+        self.model = None
+
+    @property
+    def name(self) -> str:
+        return "sentence_transformers"
+
+    def load(self):
+        if self.threads:
+            import torch
+
+            torch.set_num_threads(self.threads)
+
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(self.model_name)
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        return self.model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        ).astype(np.float32, copy=False)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    The same transformer exported to ONNX (scripts/export_onnx.py) and run
+    with ONNX Runtime, optionally int8-quantized. Pooling and normalization
+    follow the exported model's config, so vectors match the PyTorch
+    backend within the tolerance the export script checks.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = False, threads: int = 0):
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+        self.threads = threads
+        self.session = None
+        self.tokenizer = None
+        self.config = None
+        self.input_names: List[str] = []
+
+    @property
+    def name(self) -> str:
+        return "onnx-int8" if self.quantized else "onnx"
+
+    def load(self):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.config = json.loads((self.model_dir / ONNX_CONFIG).read_text())
+        model_path = self.model_dir / (
+            ONNX_QUANTIZED_MODEL if self.quantized else ONNX_MODEL
+        )
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"{model_path} not found, run scripts/export_onnx.py first"
+            )
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = (
+            onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        )
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_path), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / TOKENIZER))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config.get("pad_token_id", 0),
+            pad_token=self.config.get("pad_token", "[PAD]"),
+        )
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.config["dimension"]), dtype=np.float32)
+        return np.concatenate(
+            [
+                self._encode_batch(texts[start : start + batch_size])
+                for start in range(0, len(texts), batch_size)
+            ]
+        )
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array(
+                [e.attention_mask for e in encodings], dtype=np.int64
+            ),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(
+            None, {name: inputs[name] for name in self.input_names}
+        )[0]
+
+        if self.config["pooling"] == "cls":
+            embeddings = token_embeddings[:, 0]
+        else:
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(
+                mask.sum(axis=1), 1e-9, None
+            )
+
+        if self.config["normalize"]:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32, copy=False)
+
+
+def create_embedding_backend(
+    backend: Optional[str] = None,
+    threads: Optional[int] = None,
+    quantized: Optional[bool] = None,
+    model_name: Optional[str] = None,
+) -> EmbeddingBackend:
+    """The configured backend, unloaded; arguments override settings"""
+    backend = backend or settings.EMBEDDING_BACKEND
+    threads = settings.EMBEDDING_THREADS if threads is None else threads
+    if backend == "onnx":
+        return OnnxBackend(
+            settings.EMBEDDING_ONNX_DIR,
+            quantized=(
+                settings.EMBEDDING_ONNX_QUANTIZED if quantized is None else quantized
+            ),
+            threads=threads,
+        )
+    if backend == "sentence_transformers":
+        return SentenceTransformerBackend(
+            model_name or settings.EMBEDDING_MODEL, threads=threads
+        )
+    raise ValueError(
+        f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}"
+    )
@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.database_models import Message
+
+# Columns a client may request; the keyset columns are always read
+HISTORY_FIELDS = {
+    "id": Message.id,
+    "role": Message.role,
+    "content": Message.content,
+    "timestamp": Message.timestamp,
+    "message_metadata": Message.message_metadata,
+}
+DEFAULT_FIELDS = ["role", "content", "timestamp", "message_metadata"]
+
+# Rows fetched per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
+Cursor = Tuple[datetime, int]
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Comma-separated field projection; raises ValueError on unknown fields"""
+    if not fields:
+        return DEFAULT_FIELDS
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(unknown)} "
+            f"(allowed: {', '.join(HISTORY_FIELDS)})"
+        )
+    return requested
+
+
+def encode_cursor(timestamp: datetime, message_id: int) -> str:
+    """Opaque cursor pointing just after a (timestamp, id) position"""
+    raw = json.dumps([timestamp.isoformat(), message_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of `encode_cursor`; raises ValueError on malformed input"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, message_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(message_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def history_query(conversation_pk: int, fields: List[str], after: Optional[Cursor]):
+    """
+    Messages of one conversation in (timestamp, id) order, projected to
+    `fields`. Served by the (conversation_id, timestamp, id) index, so each
+    page is a range scan regardless of how deep the cursor is.
+    """
+    columns = [HISTORY_FIELDS[f] for f in fields if f not in ("timestamp", "id")]
+    statement = select(Message.timestamp, Message.id, *columns).where(
+        Message.conversation_id == conversation_pk
+    )
+    if after is not None:
+        statement = statement.where(tuple_(Message.timestamp, Message.id) > after)
+    return statement.order_by(Message.timestamp, Message.id)
+
+
+def _project(row, fields: List[str]) -> Dict[str, Any]:
+    values = row._mapping
+    return {f: values[HISTORY_FIELDS[f].key] for f in fields}
+
+
+def fetch_page(
+    db: Session,
+    conversation_pk: int,
+    fields: List[str],
+    limit: int,
+    after: Optional[Cursor] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of messages plus the cursor for the next page (None at the end)"""
+    rows = db.execute(
+        history_query(conversation_pk, fields, after).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+
+    return [_project(row, fields) for row in rows], next_cursor
+
+
+def iter_history(
+    db: Session,
+    conversation_pk: int,
+    fields: List[str],
+    after: Optional[Cursor] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Stream messages from a server-side cursor without materializing them"""
+    statement = history_query(conversation_pk, fields, after)
+    if limit:
+        statement = statement.limit(limit)
+
+    result = db.execute(
+        statement.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)
+    )
+    for row in result:
+        yield _project(row, fields)
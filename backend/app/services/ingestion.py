@@ -0,0 +1,318 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import delete, or_, select
+
+from app.models.database_models import Compatibility, Product
+from app.services.database import SessionLocal, engine
+from config import settings
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - ijson is optional
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_FIELDS = [
+    "part_number",
+    "name",
+    "description",
+    "price",
+    "image_url",
+    "category",
+    "appliance_type",
+    "brand",
+    "in_stock",
+]
+
+
+class IngestStats:
+    """Row counts and throughput for one ingestion run"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.rows = 0
+        self.changed = 0
+        self.skipped = 0
+        self.deleted = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def unchanged(self) -> int:
+        return self.rows - self.changed - self.skipped
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "inserted_or_updated": self.changed,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "deleted": self.deleted,
+            "seconds": round(self.elapsed, 2),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+        }
+
+
+def iter_records(path: Path, key: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from `{"<key>": [...]}` JSON or from NDJSON (one record
+    per line) without loading the whole file. Plain JSON needs `ijson`
+    to stream; without it the file is parsed in one go.
+    """
+    path = Path(path)
+    if path.suffix in (".ndjson", ".jsonl"):
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if ijson is not None:
+        with open(path, "rb") as f:
+            # use_float keeps prices as floats instead of Decimal
+            yield from ijson.items(f, f"{key}.item", use_float=True)
+        return
+
+    logger.warning(f"ijson not installed, loading {path.name} into memory")
+    with open(path, "r") as f:
+        yield from json.load(f)[key]
+
+
+def batched(records: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _dialect_insert():
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"Bulk upserts are not supported on {engine.dialect.name!r}")
+    return insert
+
+
+def _upsert(model, rows: List[Dict[str, Any]], keys: List[str], columns: List[str]):
+    """
+    INSERT ... ON CONFLICT DO UPDATE that only touches rows whose values
+    actually differ, so re-ingesting an unchanged catalog writes nothing.
+    Returns the number of rows inserted or updated.
+    """
+    statement = _dialect_insert()(model)
+    excluded = statement.excluded
+    changed = or_(
+        *(getattr(model, c).is_distinct_from(getattr(excluded, c)) for c in columns)
+    )
+    set_ = {c: getattr(excluded, c) for c in columns}
+    if hasattr(model, "updated_at"):
+        set_["updated_at"] = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    # One cached statement with a parameter list: SQLAlchemy's
+    # insertmanyvalues sends it as multi-row VALUES batches, and RETURNING
+    # only yields rows the upsert actually wrote
+    statement = statement.on_conflict_do_update(
+        index_elements=keys, set_=set_, where=changed
+    ).returning(getattr(model, keys[0]))
+
+    with engine.begin() as connection:
+        return len(connection.execute(statement, rows).all())
+
+
+def _dedupe(rows: List[Dict[str, Any]], keys: List[str]) -> List[Dict[str, Any]]:
+    # A single upsert statement may not touch the same row twice
+    return list({tuple(row[k] for k in keys): row for row in rows}.values())
+
+
+def write_products(
+    batch: List[Dict[str, Any]], stats: IngestStats, seen: Optional[Set[str]] = None
+):
+    rows = [{field: record.get(field) for field in PRODUCT_FIELDS} for record in batch]
+    rows = _dedupe(rows, ["part_number"])
+    if seen is not None:
+        seen.update(row["part_number"] for row in rows)
+    stats.rows += len(batch)
+    stats.changed += _upsert(
+        Product, rows, keys=["part_number"], columns=PRODUCT_FIELDS[1:]
+    )
+
+
+def load_part_ids() -> Dict[str, int]:
+    """part_number -> products.id, in a single query"""
+    db = SessionLocal()
+    try:
+        return dict(db.execute(select(Product.part_number, Product.id)).all())
+    finally:
+        db.close()
+
+
+def write_compatibility(
+    batch: List[Dict[str, Any]],
+    stats: IngestStats,
+    part_ids: Dict[str, int],
+    seen: Optional[Set[Tuple[int, str]]] = None,
+):
+    rows = []
+    for record in batch:
+        model_numbers = record.get("model_numbers") or []
+        stats.rows += len(model_numbers)
+
+        product_id = part_ids.get(record["part_number"])
+        if product_id is None:
+            stats.skipped += len(model_numbers)
+            logger.warning(
+                f"Product {record['part_number']} not found, skipping compatibility"
+            )
+            continue
+
+        rows.extend(
+            {
+                "product_id": product_id,
+                "model_number": model_number.upper(),
+                "brand": record.get("brand"),
+                "appliance_type": record.get("appliance_type"),
+            }
+            for model_number in model_numbers
+        )
+
+    # One record can expand to many rows; keep statements within parameter limits
+    rows = _dedupe(rows, ["product_id", "model_number"])
+    if seen is not None:
+        seen.update((row["product_id"], row["model_number"]) for row in rows)
+    for chunk in batched(rows, settings.INGEST_BATCH_SIZE):
+        stats.changed += _upsert(
+            Compatibility,
+            chunk,
+            keys=["product_id", "model_number"],
+            columns=["brand", "appliance_type"],
+        )
+
+
+def prune_products(seen: Set[str], stats: IngestStats):
+    """Delete products missing from the source, with their compatibility rows"""
+    orphans = [
+        pk for part_number, pk in load_part_ids().items() if part_number not in seen
+    ]
+    for chunk in batched(orphans, settings.INGEST_BATCH_SIZE):
+        with engine.begin() as connection:
+            connection.execute(
+                delete(Compatibility).where(Compatibility.product_id.in_(chunk))
+            )
+            stats.deleted += connection.execute(
+                delete(Product).where(Product.id.in_(chunk))
+            ).rowcount
+
+
+def prune_compatibility(seen: Set[Tuple[int, str]], stats: IngestStats):
+    """Delete compatibility rows missing from the source"""
+    with engine.connect() as connection:
+        rows = connection.execute(
+            select(
+                Compatibility.id, Compatibility.product_id, Compatibility.model_number
+            )
+        ).all()
+    orphans = [pk for pk, product_id, model in rows if (product_id, model) not in seen]
+    for chunk in batched(orphans, settings.INGEST_BATCH_SIZE):
+        with engine.begin() as connection:
+            stats.deleted += connection.execute(
+                delete(Compatibility).where(Compatibility.id.in_(chunk))
+            ).rowcount
+
+
+def _should_prune(stats: IngestStats) -> bool:
+    if stats.rows == 0:
+        # An empty or truncated export must not wipe the catalog
+        logger.warning(f"No {stats.name} rows ingested, not pruning")
+        return False
+    return True
+
+
+async def run_pipeline(
+    batches: Iterator[List[Dict[str, Any]]],
+    write: Callable[[List[Dict[str, Any]]], None],
+    depth: int = 2,
+):
+    """
+    Parse and write concurrently: a reader thread keeps up to `depth`
+    batches ready while the previous batch is being written.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    done = object()
+
+    async def read():
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, done)
+                await queue.put(batch)
+                if batch is done:
+                    return
+        except Exception:
+            # Unblock the writer; the error surfaces from `await reader`
+            await queue.put(done)
+            raise
+
+    reader = asyncio.create_task(read())
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is done:
+                break
+            await asyncio.to_thread(write, batch)
+        await reader
+    finally:
+        reader.cancel()
+
+
+async def ingest_products(
+    path: Path, batch_size: Optional[int] = None, prune: bool = True
+) -> IngestStats:
+    """
+    Upsert products from `path`. With `prune`, the file is the whole
+    catalog: products missing from it are deleted once it loaded fully.
+    """
+    stats = IngestStats("products")
+    seen: Set[str] = set()
+    batches = batched(
+        iter_records(path, "products"), batch_size or settings.INGEST_BATCH_SIZE
+    )
+    await run_pipeline(batches, lambda batch: write_products(batch, stats, seen))
+    if prune and _should_prune(stats):
+        await asyncio.to_thread(prune_products, seen, stats)
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
+
+
+async def ingest_compatibility(
+    path: Path, batch_size: Optional[int] = None, prune: bool = True
+) -> IngestStats:
+    """Upsert compatibility rows from `path`; `prune` as for products"""
+    stats = IngestStats("compatibility")
+    seen: Set[Tuple[int, str]] = set()
+    part_ids = await asyncio.to_thread(load_part_ids)
+    batches = batched(
+        iter_records(path, "compatibility"), batch_size or settings.INGEST_BATCH_SIZE
+    )
+    await run_pipeline(
+        batches, lambda batch: write_compatibility(batch, stats, part_ids, seen)
+    )
+    if prune and _should_prune(stats):
+        await asyncio.to_thread(prune_compatibility, seen, stats)
+    stats.elapsed = time.perf_counter() - stats.started
+    return stats
@@ -0,0 +1,339 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+import asyncio
+import json
+import logging
+
+from sqlalchemy import insert, select, update
+
+from app.models.database_models import Conversation, Message
+from app.services.conversation_store import get_conversation_store
+from app.services.database import SessionLocal, engine
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def message_record(
+    role: str, content: str, metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """A message row to persist, timestamped when the turn happened"""
+    return {
+        "role": role,
+        "content": content,
+        "message_metadata": metadata,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+class ConversationWriter:
+    """
+    Write-behind persistence for chat history.
+
+    Routes enqueue `(conversation_id, messages)` events and return
+    immediately; a single worker drains the bounded queue in batches and
+    writes each batch with one conversation upsert and one multi-row
+    message insert, off the event loop. A full queue applies backpressure
+    to `record` instead of growing without bound.
+
+    A failed batch is retried `max_retries` times with exponential backoff
+    (the queue keeps absorbing turns meanwhile), then event by event so one
+    bad event can't sink the others. Whatever still fails is appended to
+    `dead_letter_file` as JSON lines, if set.
+    """
+
+    def __init__(
+        self,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        max_retries: int = 3,
+        retry_delay: float = 0.5,
+        dead_letter_file: str = "",
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.dead_letter_file = dead_letter_file
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._worker: Optional[asyncio.Task] = None
+
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+
+    async def record(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        """Queue messages for persistence, waiting if the queue is full"""
+        _update_context(conversation_id, messages)
+        await self.queue.put((conversation_id, messages))
+
+    def record_nowait(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        """Queue without waiting (e.g. from a cancelled task); drops when full"""
+        _update_context(conversation_id, messages)
+        try:
+            self.queue.put_nowait((conversation_id, messages))
+        except asyncio.QueueFull:
+            self.dropped += len(messages)
+            logger.warning(
+                f"Persistence queue full, dropped {len(messages)} messages "
+                f"for conversation {conversation_id}"
+            )
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Flush everything still queued, then stop the worker. Whatever isn't
+        written within `timeout` is dead-lettered without touching the DB.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        if self._worker is not None:
+            # The sentinel lets the worker finish its current batch cleanly;
+            # with a full queue and a stuck worker it may never fit, so the
+            # wait below is bounded by the same deadline either way
+            try:
+                self.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                try:
+                    await asyncio.wait_for(self.queue.put(None), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                # On timeout the worker is cancelled and dead-letters its batch
+                await asyncio.wait_for(self._worker, max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                logger.error(
+                    f"Shutdown flush timed out with {self.queue.qsize()} events queued"
+                )
+            self._worker = None
+
+        # Events queued behind the sentinel, while time is left
+        while not self.queue.empty():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._flush(self._drain_nowait()), remaining)
+            except asyncio.TimeoutError:
+                break
+
+        while not self.queue.empty():
+            self._dead_letter(self._drain_nowait())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await self.queue.get()
+            if event is None:
+                return
+            batch = [event]
+            stopping = False
+
+            # Collect more events until the batch is full or the window closes
+            deadline = loop.time() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    if self.queue.empty():
+                        remaining = deadline - loop.time()
+                        if remaining <= 0:
+                            break
+                        try:
+                            event = await asyncio.wait_for(self.queue.get(), remaining)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        event = self.queue.get_nowait()
+
+                    if event is None:
+                        stopping = True
+                        break
+                    batch.append(event)
+            except asyncio.CancelledError:
+                self._dead_letter(batch)
+                raise
+
+            await self._flush(batch)
+            if stopping:
+                return
+
+    def _drain_nowait(self) -> List:
+        batch = []
+        while not self.queue.empty() and len(batch) < self.batch_size:
+            event = self.queue.get_nowait()
+            if event is not None:
+                batch.append(event)
+        return batch
+
+    async def _flush(self, batch: List):
+        if not batch:
+            return
+        # Events not yet written; dead-lettered if the flush is cancelled (a
+        # write cut off mid-flight may still commit: check before replaying)
+        pending = list(batch)
+        try:
+            await self._write_with_retries(pending)
+        except asyncio.CancelledError:
+            self._dead_letter(pending)
+            raise
+
+    async def _write_with_retries(self, pending: List):
+        batch = list(pending)
+        count = sum(len(messages) for _, messages in batch)
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+                self.written += count
+                self.batches += 1
+                pending.clear()
+                return
+            except Exception as e:
+                error = e
+            if attempt < self.max_retries:
+                delay = self.retry_delay * 2**attempt
+                logger.warning(
+                    f"Failed to persist a batch of {len(batch)} events "
+                    f"(attempt {attempt + 1}), retrying in {delay:.1f}s: {error}"
+                )
+                await asyncio.sleep(delay)
+
+        logger.error(
+            f"Failed to persist {count} messages in a batch of "
+            f"{len(batch)} events: {error}",
+            exc_info=error,
+        )
+        if len(batch) > 1:
+            # Isolate the events that can't be written
+            for event in batch:
+                try:
+                    await asyncio.to_thread(self._write_batch, [event])
+                except Exception:
+                    continue
+                self.written += len(event[1])
+                pending.remove(event)
+        self._dead_letter(pending)
+        pending.clear()
+
+    def _dead_letter(self, batch: List):
+        count = sum(len(messages) for _, messages in batch)
+        if not count:
+            return
+        self.dropped += count
+        if not self.dead_letter_file:
+            logger.error(f"Dropped {count} messages that could not be persisted")
+            return
+        try:
+            with open(self.dead_letter_file, "a") as f:
+                for conversation_id, messages in batch:
+                    record = {"conversation_id": conversation_id, "messages": messages}
+                    f.write(json.dumps(record, default=str) + "\n")
+            logger.error(
+                f"Wrote {count} messages that could not be persisted to "
+                f"{self.dead_letter_file}"
+            )
+        except OSError as e:
+            logger.error(f"Dropped {count} messages, dead-letter write failed: {e}")
+
+    @staticmethod
+    def _write_batch(batch: List):
+        conversation_ids = list(dict.fromkeys(cid for cid, _ in batch))
+        now = datetime.now(timezone.utc)
+
+        db = SessionLocal()
+        try:
+            _upsert_conversations(db, conversation_ids, now)
+
+            ids = dict(
+                db.execute(
+                    select(Conversation.conversation_id, Conversation.id).where(
+                        Conversation.conversation_id.in_(conversation_ids)
+                    )
+                ).all()
+            )
+
+            rows = [
+                {"conversation_id": ids[cid], **message}
+                for cid, messages in batch
+                for message in messages
+            ]
+            if rows:
+                # executemany is sent as multi-row INSERT ... VALUES batches
+                db.execute(insert(Message), rows)
+
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def _update_context(conversation_id: str, messages: List[Dict[str, Any]]):
+    # The context cache sees turns immediately, before they reach the DB
+    get_conversation_store().append(
+        conversation_id,
+        [{"role": m["role"], "content": m["content"]} for m in messages],
+    )
+
+
+def _upsert_conversations(db, conversation_ids: List[str], now: datetime):
+    """Create missing conversations and bump updated_at on existing ones"""
+    values = [
+        {"conversation_id": cid, "created_at": now, "updated_at": now}
+        for cid in conversation_ids
+    ]
+
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        dialect_insert = None
+
+    if dialect_insert is not None:
+        statement = dialect_insert(Conversation).values(values)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[Conversation.conversation_id],
+                set_={"updated_at": statement.excluded.updated_at},
+            )
+        )
+        return
+
+    existing = set(
+        db.scalars(
+            select(Conversation.conversation_id).where(
+                Conversation.conversation_id.in_(conversation_ids)
+            )
+        )
+    )
+    missing = [v for v in values if v["conversation_id"] not in existing]
+    if missing:
+        db.execute(insert(Conversation), missing)
+    if existing:
+        db.execute(
+            update(Conversation)
+            .where(Conversation.conversation_id.in_(existing))
+            .values(updated_at=now)
+        )
+
+
+# Global instance
+_conversation_writer = None
+
+
+def get_conversation_writer() -> ConversationWriter:
+    global _conversation_writer
+    if _conversation_writer is None:
+        _conversation_writer = ConversationWriter(
+            max_queue=settings.PERSISTENCE_QUEUE_SIZE,
+            batch_size=settings.PERSISTENCE_BATCH_SIZE,
+            flush_interval=settings.PERSISTENCE_FLUSH_INTERVAL,
+            max_retries=settings.PERSISTENCE_MAX_RETRIES,
+            retry_delay=settings.PERSISTENCE_RETRY_DELAY,
+            dead_letter_file=settings.PERSISTENCE_DEAD_LETTER_FILE,
+        )
+    return _conversation_writer
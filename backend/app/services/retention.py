@@ -0,0 +1,288 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import asyncio
+import logging
+import threading
+import time
+
+from sqlalchemy import and_, delete, func, select, text
+
+from app.models.database_models import Conversation, Message
+from app.services.conversation_store import get_conversation_store
+from app.services.database import SessionLocal, engine
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RETENTION_MODES = ("age", "inactivity")
+
+
+class RetentionPolicy:
+    """
+    Which conversations have expired: by `age` (created_at) or by
+    `inactivity` (updated_at, bumped on every persisted turn).
+    """
+
+    def __init__(self, mode: str, days: float):
+        if mode not in RETENTION_MODES:
+            raise ValueError(f"Unknown retention mode {mode!r}")
+        self.mode = mode
+        self.days = days
+
+    def cutoff(self) -> datetime:
+        # Timestamp columns hold naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return now - timedelta(days=self.days)
+
+    def expired(self, cutoff: datetime):
+        column = (
+            Conversation.created_at if self.mode == "age" else Conversation.updated_at
+        )
+        return column < cutoff
+
+
+class RetentionService:
+    """
+    Purges expired conversations in bounded batches. Each batch is its own
+    short transaction, so a large purge never holds long locks or a huge
+    undo log, and the pause between batches leaves room for live traffic.
+    """
+
+    def __init__(
+        self,
+        policy: RetentionPolicy,
+        batch_size: int,
+        pause: float,
+        partitioned: bool = False,
+    ):
+        self.policy = policy
+        self.batch_size = batch_size
+        self.pause = pause
+        self.partitioned = partitioned
+        self._task: Optional[asyncio.Task] = None
+        # Set by stop(); the purge thread checks it between batches
+        self._stopping = threading.Event()
+
+    def report(self) -> Dict[str, Any]:
+        """Dry run: what a purge would delete right now"""
+        cutoff = self.policy.cutoff()
+        expired_ids = select(Conversation.id).where(self.policy.expired(cutoff))
+
+        db = SessionLocal()
+        try:
+            conversations = db.scalar(
+                select(func.count()).select_from(expired_ids.subquery())
+            )
+            messages, message_bytes = db.execute(
+                select(func.count(Message.id), _row_bytes()).where(
+                    Message.conversation_id.in_(expired_ids)
+                )
+            ).one()
+        finally:
+            db.close()
+
+        return {
+            "mode": self.policy.mode,
+            "days": self.policy.days,
+            "cutoff": cutoff.isoformat(),
+            "conversations": conversations,
+            "messages": messages,
+            "bytes": int(message_bytes or 0),
+            "bytes_estimated": engine.dialect.name != "postgresql",
+        }
+
+    def purge(
+        self,
+        max_batches: Optional[int] = None,
+        on_batch: Optional[Callable[[List[str]], None]] = None,
+    ) -> Dict[str, int]:
+        """Delete expired conversations and their messages, chunk by chunk"""
+        cutoff = self.policy.cutoff()
+        totals = {"conversations": 0, "messages": 0, "partitions": 0}
+        started = time.monotonic()
+
+        if self.partitioned:
+            totals["partitions"] = self._maintain_partitions(cutoff)
+
+        batches = 0
+        while not self._stopping.is_set() and (
+            max_batches is None or batches < max_batches
+        ):
+            conversation_ids = self._purge_batch(cutoff, totals)
+            if conversation_ids is None:
+                break
+            batches += 1
+            if on_batch is not None and conversation_ids:
+                on_batch(conversation_ids)
+
+            if self.pause:
+                self._stopping.wait(self.pause)
+
+        logger.info(
+            f"Retention purge ({self.policy.mode}, {self.policy.days}d): "
+            f"{totals['conversations']} conversations, {totals['messages']} "
+            f"messages, {totals['partitions']} partitions in "
+            f"{time.monotonic() - started:.1f}s"
+        )
+        return totals
+
+    def _purge_batch(
+        self, cutoff: datetime, totals: Dict[str, int]
+    ) -> Optional[List[str]]:
+        """Purge one batch: the conversation ids deleted, None when none are left"""
+        db = SessionLocal()
+        try:
+            # The batch is locked and deleted in one transaction, so a turn
+            # persisted meanwhile either lands first (and the re-check below
+            # keeps that conversation whole) or waits for the purge and then
+            # starts a fresh conversation. Rows a writer holds are skipped.
+            batch: List[Tuple[int, str]] = db.execute(
+                select(Conversation.id, Conversation.conversation_id)
+                .where(self.policy.expired(cutoff))
+                .order_by(Conversation.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not batch:
+                return None
+            # Without row locks (SQLite) a turn can still land between the
+            # select and the first delete, so every delete re-checks expiry
+            still_expired = and_(
+                Conversation.id.in_([pk for pk, _ in batch]),
+                self.policy.expired(cutoff),
+            )
+
+            # Long conversations are cleared in bounded message chunks
+            messages = 0
+            while True:
+                chunk = (
+                    select(Message.id)
+                    .where(
+                        Message.conversation_id.in_(
+                            select(Conversation.id).where(still_expired)
+                        )
+                    )
+                    .limit(self.batch_size)
+                )
+                deleted = db.execute(
+                    delete(Message).where(Message.id.in_(chunk))
+                ).rowcount
+                messages += deleted
+                if deleted < self.batch_size:
+                    break
+
+            deleted_ids = list(
+                db.scalars(
+                    delete(Conversation)
+                    .where(still_expired)
+                    .returning(Conversation.conversation_id)
+                )
+            )
+            db.commit()
+            totals["messages"] += messages
+            totals["conversations"] += len(deleted_ids)
+            if len(deleted_ids) < len(batch):
+                logger.info(
+                    f"Retention skipped {len(batch) - len(deleted_ids)} "
+                    "conversations that were active again"
+                )
+            return deleted_ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _maintain_partitions(self, cutoff: datetime) -> int:
+        """
+        Pre-create upcoming monthly partitions and drop expired ones
+        (see postgres/partition_messages.sql)
+        """
+        if engine.dialect.name != "postgresql":
+            logger.warning("RETENTION_PARTITIONED is only supported on PostgreSQL")
+            return 0
+
+        db = SessionLocal()
+        try:
+            db.execute(text("SELECT create_message_partitions()"))
+            dropped = db.scalar(
+                text("SELECT drop_message_partitions_before(:cutoff)"),
+                {"cutoff": cutoff},
+            )
+            db.commit()
+            return dropped or 0
+        finally:
+            db.close()
+
+    async def _run(self, interval: float):
+        loop = asyncio.get_running_loop()
+        store = get_conversation_store()
+
+        def evict(conversation_ids: List[str]):
+            for conversation_id in conversation_ids:
+                store.evict(conversation_id)
+
+        while True:
+            # The purge runs in a thread; cache evictions hop back to the loop
+            purge = asyncio.ensure_future(
+                asyncio.to_thread(
+                    self.purge,
+                    on_batch=lambda ids: loop.call_soon_threadsafe(evict, ids),
+                )
+            )
+            try:
+                await asyncio.shield(purge)
+            except asyncio.CancelledError:
+                # Cancelling doesn't stop the thread; it stops after its
+                # current batch once stop() has set the event
+                await asyncio.gather(purge, return_exceptions=True)
+                raise
+            except Exception as e:
+                logger.error(f"Retention purge failed: {e}", exc_info=True)
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float):
+        """Purge periodically in the background"""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run(interval))
+
+    async def stop(self, timeout: float = 10.0):
+        """Stop the background purge, waiting for its current batch"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(self._task, return_exceptions=True), timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Retention purge still running after {timeout}s")
+        self._task = None
+
+
+def _row_bytes():
+    """Stored size of message rows: exact on PostgreSQL, payload length elsewhere"""
+    if engine.dialect.name == "postgresql":
+        return func.sum(func.pg_column_size(text("messages.*")))
+    return func.sum(
+        func.length(Message.content)
+        + func.coalesce(func.length(Message.message_metadata), 0)
+    )
+
+
+# Global instance
+_retention_service = None
+
+
+def get_retention_service() -> RetentionService:
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService(
+            RetentionPolicy(settings.RETENTION_MODE, settings.RETENTION_DAYS),
+            batch_size=settings.RETENTION_BATCH_SIZE,
+            pause=settings.RETENTION_BATCH_PAUSE,
+            partitioned=settings.RETENTION_PARTITIONED,
+        )
+    return _retention_service
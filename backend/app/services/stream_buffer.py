@@ -0,0 +1,450 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+import asyncio
+import logging
+import time
+
+from app.core.metrics import STREAMS_ACTIVE
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stored SSE frames: (event id, encoded frame)
+Event = Tuple[int, bytes]
+
+
+class StreamBufferBackend(ABC):
+    """Bounded per-stream replay storage for encoded SSE frames"""
+
+    # Whether other workers read the same buffers (and may host subscribers)
+    shared = False
+
+    @abstractmethod
+    async def append(self, stream_id: str, event_id: int, frame: bytes):
+        """Store a frame"""
+
+    @abstractmethod
+    async def read_after(self, stream_id: str, last_event_id: int) -> List[Event]:
+        """Frames with an id greater than `last_event_id`"""
+
+    @abstractmethod
+    async def mark_finished(self, stream_id: str):
+        """Record that the producer has written its last frame"""
+
+    @abstractmethod
+    async def is_finished(self, stream_id: str) -> bool:
+        """Whether the producer has finished"""
+
+    @abstractmethod
+    async def exists(self, stream_id: str) -> bool:
+        """Whether the stream is still buffered"""
+
+    async def evict_expired(self) -> int:
+        """Drop abandoned buffers; backends with native expiry do nothing"""
+        return 0
+
+    async def heartbeat(self, stream_id: str, subscriber_id: str, ttl: float):
+        """Record that a subscriber is attached for at least `ttl` more seconds"""
+
+    async def detach(self, stream_id: str, subscriber_id: str):
+        """Forget a subscriber that has gone"""
+
+    async def has_subscribers(self, stream_id: str) -> bool:
+        """Whether any worker has a live subscriber (shared backends only)"""
+        return False
+
+
+class _Buffer:
+    def __init__(self):
+        self.events: List[Event] = []
+        self.finished = False
+        self.touched = time.monotonic()
+
+
+class InMemoryStreamBufferBackend(StreamBufferBackend):
+    """Per-process ring buffers, evicted after `ttl` seconds of inactivity"""
+
+    def __init__(self, max_events: int, ttl: float):
+        self.max_events = max_events
+        self.ttl = ttl
+        self._buffers: Dict[str, _Buffer] = {}
+
+    async def append(self, stream_id: str, event_id: int, frame: bytes):
+        buffer = self._buffers.setdefault(stream_id, _Buffer())
+        buffer.events.append((event_id, frame))
+        buffer.touched = time.monotonic()
+
+        # Trim in batches so the ring stays O(1) amortized per append
+        overflow = len(buffer.events) - self.max_events
+        if overflow > self.max_events // 10:
+            del buffer.events[:overflow]
+
+    async def read_after(self, stream_id: str, last_event_id: int) -> List[Event]:
+        buffer = self._buffers.get(stream_id)
+        if not buffer or not buffer.events:
+            return []
+
+        # Event ids are contiguous, so the offset can be computed directly
+        start = max(0, last_event_id - buffer.events[0][0] + 1)
+        return buffer.events[start:]
+
+    async def mark_finished(self, stream_id: str):
+        buffer = self._buffers.setdefault(stream_id, _Buffer())
+        buffer.finished = True
+        buffer.touched = time.monotonic()
+
+    async def is_finished(self, stream_id: str) -> bool:
+        buffer = self._buffers.get(stream_id)
+        return buffer is None or buffer.finished
+
+    async def exists(self, stream_id: str) -> bool:
+        return stream_id in self._buffers
+
+    async def evict_expired(self) -> int:
+        cutoff = time.monotonic() - self.ttl
+        expired = [sid for sid, buf in self._buffers.items() if buf.touched < cutoff]
+        for stream_id in expired:
+            del self._buffers[stream_id]
+        return len(expired)
+
+
+class RedisStreamBufferBackend(StreamBufferBackend):
+    """
+    Shared replay buffer on Redis Streams, so a reconnect can land on any
+    worker. Entries use explicit ids `0-<event id>` and expire natively.
+    Subscribers on every worker heartbeat into a sorted set (score =
+    expiry), so the producing worker knows its stream is still watched.
+    """
+
+    shared = True
+
+    def __init__(self, url: str, max_events: int, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "STREAM_BUFFER_BACKEND=redis requires the 'redis' package"
+            ) from e
+
+        self.redis = redis.from_url(url)
+        self.max_events = max_events
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _key(stream_id: str) -> str:
+        return f"sse:{stream_id}:events"
+
+    @staticmethod
+    def _done_key(stream_id: str) -> str:
+        return f"sse:{stream_id}:done"
+
+    @staticmethod
+    def _subscribers_key(stream_id: str) -> str:
+        return f"sse:{stream_id}:subscribers"
+
+    async def append(self, stream_id: str, event_id: int, frame: bytes):
+        key = self._key(stream_id)
+        pipe = self.redis.pipeline()
+        pipe.xadd(
+            key,
+            {"f": frame},
+            id=f"0-{event_id}",
+            maxlen=self.max_events,
+            approximate=True,
+        )
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def read_after(self, stream_id: str, last_event_id: int) -> List[Event]:
+        entries = await self.redis.xrange(
+            self._key(stream_id), min=f"(0-{last_event_id}"
+        )
+        events = []
+        for entry_id, fields in entries:
+            if isinstance(entry_id, bytes):
+                entry_id = entry_id.decode()
+            events.append((int(entry_id.split("-")[1]), fields[b"f"]))
+        return events
+
+    async def mark_finished(self, stream_id: str):
+        pipe = self.redis.pipeline()
+        pipe.set(self._done_key(stream_id), 1, ex=self.ttl)
+        pipe.expire(self._key(stream_id), self.ttl)
+        await pipe.execute()
+
+    async def is_finished(self, stream_id: str) -> bool:
+        # An expired stream counts as finished, so followers never hang
+        done, present = await asyncio.gather(
+            self.redis.exists(self._done_key(stream_id)),
+            self.redis.exists(self._key(stream_id)),
+        )
+        return bool(done) or not present
+
+    async def exists(self, stream_id: str) -> bool:
+        return bool(await self.redis.exists(self._key(stream_id)))
+
+    async def heartbeat(self, stream_id: str, subscriber_id: str, ttl: float):
+        key = self._subscribers_key(stream_id)
+        pipe = self.redis.pipeline()
+        pipe.zadd(key, {subscriber_id: time.time() + ttl})
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
+
+    async def detach(self, stream_id: str, subscriber_id: str):
+        await self.redis.zrem(self._subscribers_key(stream_id), subscriber_id)
+
+    async def has_subscribers(self, stream_id: str) -> bool:
+        key = self._subscribers_key(stream_id)
+        return await self.redis.zcount(key, time.time(), "+inf") > 0
+
+
+class StreamManager:
+    """
+    Runs stream producers independently of the HTTP connection and lets any
+    number of subscribers replay from a Last-Event-ID, then follow live.
+    """
+
+    # How often subscribers re-check the backend when no local signal arrives
+    # (a producer on another worker can't signal us)
+    POLL_INTERVAL = 0.5
+    # Shared backends: how long a subscriber heartbeat stays valid
+    HEARTBEAT_TTL = 15.0
+    # A new stream's first subscriber normally attaches straight away; this
+    # covers a client that left before the response started
+    FIRST_ATTACH_TIMEOUT = 10.0
+
+    def __init__(self, backend: StreamBufferBackend):
+        self.backend = backend
+        self._producers: Dict[str, asyncio.Task] = {}
+        self._subscribers: Dict[str, int] = {}
+        self._signals: Dict[str, asyncio.Event] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        # One pending abandonment check per stream, replaced on each detach
+        self._abandon_timers: Dict[str, asyncio.Handle] = {}
+        # Pending shared-backend abandonment checks
+        self._checks: Set[asyncio.Task] = set()
+
+    def start(
+        self, stream_id: str, frames: AsyncIterator[Tuple[int, bytes]]
+    ) -> asyncio.Task:
+        """Start buffering `(event id, frame)` pairs for `stream_id` in the background"""
+        task = asyncio.create_task(self._produce(stream_id, frames))
+        self._producers[stream_id] = task
+        self._schedule_abandon_check(
+            stream_id,
+            max(settings.STREAM_RESUME_GRACE_SECONDS, self.FIRST_ATTACH_TIMEOUT),
+        )
+        return task
+
+    def is_live(self, stream_id: str) -> bool:
+        return stream_id in self._producers
+
+    async def _produce(self, stream_id: str, frames: AsyncIterator[Tuple[int, bytes]]):
+        try:
+            async for event_id, frame in frames:
+                await self.backend.append(stream_id, event_id, frame)
+                self._notify(stream_id)
+        except Exception as e:
+            logger.error(f"Stream {stream_id} producer failed: {e}", exc_info=True)
+        finally:
+            try:
+                await self.backend.mark_finished(stream_id)
+            finally:
+                self._producers.pop(stream_id, None)
+                self._clear_abandon_check(stream_id)
+                self._notify(stream_id)
+
+    async def subscribe(
+        self, stream_id: str, last_event_id: int = 0
+    ) -> AsyncIterator[bytes]:
+        """Replay frames after `last_event_id`, then follow the live producer"""
+        loop = asyncio.get_running_loop()
+        self._subscribers[stream_id] = self._subscribers.get(stream_id, 0) + 1
+        self._clear_abandon_check(stream_id)
+        subscriber_id = uuid4().hex if self.backend.shared else None
+        STREAMS_ACTIVE.inc()
+        try:
+            async for frame in self._follow(
+                stream_id, last_event_id, loop, subscriber_id
+            ):
+                yield frame
+        finally:
+            STREAMS_ACTIVE.dec()
+            if subscriber_id is not None:
+                await self._detach(stream_id, subscriber_id)
+            remaining = self._subscribers.get(stream_id, 1) - 1
+            if remaining > 0:
+                self._subscribers[stream_id] = remaining
+            else:
+                self._subscribers.pop(stream_id, None)
+                self._schedule_abandon_check(stream_id)
+
+    async def _follow(
+        self,
+        stream_id: str,
+        last_event_id: int,
+        loop: asyncio.AbstractEventLoop,
+        subscriber_id: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        heartbeat_at = 0.0
+        while True:
+            if subscriber_id is not None and loop.time() >= heartbeat_at:
+                # Tell the producing worker, wherever it is, we're attached
+                await self.backend.heartbeat(
+                    stream_id, subscriber_id, self.HEARTBEAT_TTL
+                )
+                heartbeat_at = loop.time() + self.HEARTBEAT_TTL / 3
+
+            signal = self._signals.get(stream_id)
+            if signal is None or signal.is_set():
+                # A poll timer set it without popping; a set event never waits
+                signal = self._signals[stream_id] = asyncio.Event()
+
+            events = await self.backend.read_after(stream_id, last_event_id)
+            if events:
+                if events[0][0] > last_event_id + 1:
+                    logger.warning(
+                        f"Stream {stream_id}: events {last_event_id + 1}-"
+                        f"{events[0][0] - 1} already evicted from the replay buffer"
+                    )
+                for event_id, frame in events:
+                    yield frame
+                    last_event_id = event_id
+                continue
+
+            # A local producer may simply not have written anything yet
+            if not self.is_live(stream_id) and await self.backend.is_finished(
+                stream_id
+            ):
+                self._signals.pop(stream_id, None)
+                return
+
+            timer = loop.call_later(self.POLL_INTERVAL, signal.set)
+            try:
+                await signal.wait()
+            finally:
+                timer.cancel()
+
+    def _schedule_abandon_check(self, stream_id: str, delay: Optional[float] = None):
+        """Cancel the producer if nobody (re)attaches within the grace period"""
+        if not self.is_live(stream_id):
+            return
+
+        self._clear_abandon_check(stream_id)
+        if delay is None:
+            delay = settings.STREAM_RESUME_GRACE_SECONDS
+        loop = asyncio.get_running_loop()
+        if delay <= 0:
+            # Still a tick later: the caller may be about to attach
+            handle = loop.call_soon(self._cancel_if_abandoned, stream_id)
+        else:
+            handle = loop.call_later(delay, self._cancel_if_abandoned, stream_id)
+        self._abandon_timers[stream_id] = handle
+
+    def _clear_abandon_check(self, stream_id: str):
+        handle = self._abandon_timers.pop(stream_id, None)
+        if handle is not None:
+            handle.cancel()
+
+    def _cancel_if_abandoned(self, stream_id: str):
+        self._abandon_timers.pop(stream_id, None)
+        task = self._producers.get(stream_id)
+        if task is None or task.done() or self._subscribers.get(stream_id):
+            return
+
+        if self.backend.shared:
+            # A resume may be attached to another worker; ask the backend
+            check = asyncio.create_task(self._cancel_unless_watched(stream_id))
+            self._checks.add(check)
+            check.add_done_callback(self._checks.discard)
+            return
+        self._cancel(stream_id, task)
+
+    async def _cancel_unless_watched(self, stream_id: str):
+        try:
+            watched = await self.backend.has_subscribers(stream_id)
+        except Exception as e:
+            logger.warning(f"Stream {stream_id} subscriber check failed: {e}")
+            watched = True
+
+        task = self._producers.get(stream_id)
+        if task is None or task.done() or self._subscribers.get(stream_id):
+            return
+        if watched:
+            # Look again later: a remote subscriber leaving can't tell us
+            self._schedule_abandon_check(
+                stream_id,
+                max(settings.STREAM_RESUME_GRACE_SECONDS, self.POLL_INTERVAL),
+            )
+            return
+        self._cancel(stream_id, task)
+
+    async def _detach(self, stream_id: str, subscriber_id: str):
+        try:
+            await self.backend.detach(stream_id, subscriber_id)
+        except Exception as e:
+            # The heartbeat expires on its own
+            logger.warning(f"Stream {stream_id} detach failed: {e}")
+
+    def _cancel(self, stream_id: str, task: asyncio.Task):
+        # Cancellation unwinds the orchestrator generator, which closes the
+        # upstream httpx stream and cancels in-flight tool executions
+        logger.info(f"Stream {stream_id} abandoned by client, cancelling")
+        task.cancel()
+
+    def _notify(self, stream_id: str):
+        signal = self._signals.pop(stream_id, None)
+        if signal is not None:
+            signal.set()
+
+    async def _sweep(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                evicted = await self.backend.evict_expired()
+                if evicted:
+                    logger.info(f"Evicted {evicted} expired stream buffers")
+            except Exception as e:
+                logger.error(f"Stream buffer eviction failed: {e}")
+
+    def start_sweeper(self):
+        """Periodically evict abandoned buffers"""
+        if self._sweeper is None:
+            interval = max(1.0, settings.STREAM_BUFFER_TTL / 4)
+            self._sweeper = asyncio.create_task(self._sweep(interval))
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for handle in self._abandon_timers.values():
+            handle.cancel()
+        self._abandon_timers.clear()
+        producers = list(self._producers.values())
+        for task in producers:
+            task.cancel()
+        # Let cancelled producers unwind (and record partial turns) before returning
+        await asyncio.gather(*producers, return_exceptions=True)
+
+
+# Global instance
+_stream_manager = None
+
+
+def get_stream_manager() -> StreamManager:
+    global _stream_manager
+    if _stream_manager is None:
+        if settings.STREAM_BUFFER_BACKEND == "redis":
+            backend = RedisStreamBufferBackend(
+                settings.REDIS_URL,
+                max_events=settings.STREAM_BUFFER_MAX_EVENTS,
+                ttl=settings.STREAM_BUFFER_TTL,
+            )
+        else:
+            backend = InMemoryStreamBufferBackend(
+                max_events=settings.STREAM_BUFFER_MAX_EVENTS,
+                ttl=settings.STREAM_BUFFER_TTL,
+            )
+        _stream_manager = StreamManager(backend)
+    return _stream_manager
@@ -0,0 +1,258 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import func, insert, select
+
+from app.models.database_models import TokenUsage
+from app.services.database import SessionLocal
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Which flow an LLM call served
+SCOPE_CHECK = "scope_check"
+PLANNING = "planning"
+ANSWER = "answer"
+OTHER = "other"
+# An agent round plans if the model asks for tools and answers otherwise;
+# that is only known once the response is in
+AGENT = "agent"
+
+REPORT_GROUPS = {
+    "conversation": TokenUsage.conversation_id,
+    "phase": TokenUsage.phase,
+    "day": TokenUsage.day,
+    "model": TokenUsage.model,
+}
+
+# Conversation of the turn being handled; set around the turn by the routes
+_conversation: ContextVar[Optional[str]] = ContextVar(
+    "usage_conversation", default=None
+)
+
+# (day, conversation_id, phase, model) -> [calls, prompt, completion, cached]
+UsageKey = Tuple[date, Optional[str], str, str]
+
+
+@contextmanager
+def usage_conversation(conversation_id: Optional[str]) -> Iterator[None]:
+    """Attribute LLM usage in this block (and tasks it starts) to a conversation"""
+    token = _conversation.set(conversation_id)
+    try:
+        yield
+    finally:
+        _conversation.reset(token)
+
+
+def resolve_phase(phase: Optional[str], tool_calls: bool) -> str:
+    if phase == AGENT:
+        return PLANNING if tool_calls else ANSWER
+    return phase or OTHER
+
+
+def cached_prompt_tokens(usage: Dict[str, Any]) -> int:
+    """Prompt tokens served from the upstream's context cache"""
+    cached = usage.get("prompt_cache_hit_tokens")
+    if cached is None:
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    return cached or 0
+
+
+def estimate_cost(prompt: float, completion: float, cached: float) -> float:
+    """USD at the configured per-million-token prices"""
+    return (
+        (prompt - cached) * settings.LLM_PRICE_INPUT_PER_MTOK
+        + cached * settings.LLM_PRICE_CACHED_INPUT_PER_MTOK
+        + completion * settings.LLM_PRICE_OUTPUT_PER_MTOK
+    ) / 1_000_000
+
+
+class UsageAccumulator:
+    """
+    Sums token usage in memory per (day, conversation, phase, model) and
+    flushes the deltas to `token_usage` periodically. Rows are appended,
+    never updated, so every worker can flush its own totals and reports
+    simply sum them.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._totals: Dict[UsageKey, List[int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.flushed_rows = 0
+
+    def record(
+        self,
+        usage: Dict[str, Any],
+        model: str,
+        phase: Optional[str] = None,
+        tool_calls: bool = False,
+    ):
+        key = (
+            datetime.now(timezone.utc).date(),
+            _conversation.get(),
+            resolve_phase(phase, tool_calls),
+            model,
+        )
+        totals = self._totals.get(key)
+        if totals is None:
+            totals = self._totals[key] = [0, 0, 0, 0]
+        totals[0] += 1
+        totals[1] += usage.get("prompt_tokens") or 0
+        totals[2] += usage.get("completion_tokens") or 0
+        totals[3] += cached_prompt_tokens(usage)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._totals:
+            return
+        # Swap on the loop; calls recorded during the write land in the new dict
+        totals, self._totals = self._totals, {}
+        try:
+            await asyncio.to_thread(self._write, totals)
+            self.flushed_rows += len(totals)
+        except Exception as e:
+            logger.error(f"Failed to flush token usage: {e}", exc_info=True)
+            # Keep the counts for the next attempt
+            for key, values in totals.items():
+                current = self._totals.setdefault(key, [0, 0, 0, 0])
+                for i, value in enumerate(values):
+                    current[i] += value
+
+    @staticmethod
+    def _write(totals: Dict[UsageKey, List[int]]):
+        rows = [
+            {
+                "day": day,
+                "conversation_id": conversation_id,
+                "phase": phase,
+                "model": model,
+                "calls": calls,
+                "prompt_tokens": prompt,
+                "completion_tokens": completion,
+                "cached_tokens": cached,
+            }
+            for (day, conversation_id, phase, model), (
+                calls,
+                prompt,
+                completion,
+                cached,
+            ) in totals.items()
+        ]
+        db = SessionLocal()
+        try:
+            db.execute(insert(TokenUsage), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+def usage_report(
+    group_by: List[str],
+    days: int = 7,
+    conversation_id: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """Flushed token usage and estimated cost, grouped and ordered by cost"""
+    unknown = [name for name in group_by if name not in REPORT_GROUPS]
+    if unknown or not group_by:
+        raise ValueError(
+            f"group_by must be a subset of {sorted(REPORT_GROUPS)}, got {group_by}"
+        )
+
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    columns = [REPORT_GROUPS[name] for name in group_by]
+    calls = func.sum(TokenUsage.calls)
+    prompt = func.sum(TokenUsage.prompt_tokens)
+    completion = func.sum(TokenUsage.completion_tokens)
+    cached = func.sum(TokenUsage.cached_tokens)
+
+    totals_query = select(calls, prompt, completion, cached).where(
+        TokenUsage.day >= since
+    )
+    if conversation_id:
+        totals_query = totals_query.where(TokenUsage.conversation_id == conversation_id)
+    query = (
+        totals_query.add_columns(*columns)
+        .group_by(*columns)
+        .order_by(estimate_cost(prompt, completion, cached).desc())
+        .limit(limit)
+    )
+
+    db = SessionLocal()
+    try:
+        results = db.execute(query).all()
+        totals = db.execute(totals_query).one()
+    finally:
+        db.close()
+
+    rows = []
+    for result in results:
+        keys = result[4:]
+        rows.append(
+            {
+                **{
+                    name: key.isoformat() if isinstance(key, date) else key
+                    for name, key in zip(group_by, keys)
+                },
+                **_summary(*result[:4]),
+            }
+        )
+
+    return {
+        "since": since.isoformat(),
+        "group_by": group_by,
+        "rows": rows,
+        "totals": _summary(*totals),
+    }
+
+
+def _summary(calls: int, prompt: int, completion: int, cached: int) -> Dict[str, Any]:
+    # SUM() over no rows is NULL
+    calls, prompt, completion, cached = (
+        value or 0 for value in (calls, prompt, completion, cached)
+    )
+    return {
+        "calls": calls,
+        "prompt_tokens": prompt,
+        "completion_tokens": completion,
+        "cached_tokens": cached,
+        "cache_hit_ratio": round(cached / prompt, 3) if prompt else 0.0,
+        "cost_usd": round(estimate_cost(prompt, completion, cached), 6),
+    }
+
+
+# Global instance
+_usage_accumulator = None
+
+
+def get_usage_accumulator() -> UsageAccumulator:
+    global _usage_accumulator
+    if _usage_accumulator is None:
+        _usage_accumulator = UsageAccumulator(
+            flush_interval=settings.USAGE_FLUSH_INTERVAL
+        )
+    return _usage_accumulator
@@ -0,0 +1,187 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from collections import Counter
+import hashlib
+import json
+import logging
+import time
+
+from app.services.embedding_builder import ParallelEmbeddingBuilder
+
+logger = logging.getLogger(__name__)
+
+# Bookkeeping keys stored alongside each document's metadata
+CONTENT_HASH = "_content_hash"
+METADATA_HASH = "_metadata_hash"
+INTERNAL_KEYS = (CONTENT_HASH, METADATA_HASH)
+
+# (id, document text, metadata)
+IndexItem = Tuple[str, str, Dict[str, Any]]
+
+# Page size when listing the existing index, and for metadata-only updates
+PAGE_SIZE = 5000
+
+
+def content_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def metadata_hash(metadata: Dict[str, Any]) -> str:
+    return content_hash(json.dumps(metadata, sort_keys=True, default=str))
+
+
+def stable_id(prefix: str, key: str) -> str:
+    """Deterministic id for documents without a natural key"""
+    return f"{prefix}_{content_hash(key)}"
+
+
+def public_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata without the indexer's bookkeeping keys"""
+    return {k: v for k, v in metadata.items() if k not in INTERNAL_KEYS}
+
+
+class IncrementalIndexer:
+    """
+    Keeps a Chroma collection in sync with a source of documents.
+
+    Each entry stores a hash of its embedded text and of its metadata.
+    New or re-worded documents are embedded in batches and upserted;
+    documents whose text is unchanged but whose metadata changed (e.g. a
+    price) only get a metadata update, with no re-embedding. With `prune`,
+    ids missing from the source are deleted.
+    """
+
+    def __init__(
+        self,
+        collection,
+        encode: Callable[[List[str]], List[List[float]]],
+        batch_size: int,
+        name: str,
+        builder: Optional[ParallelEmbeddingBuilder] = None,
+    ):
+        self.collection = collection
+        self.encode = encode
+        self.batch_size = batch_size
+        self.name = name
+        # Large re-indexes can be encoded by a process pool instead
+        self.builder = builder
+
+    def existing_hashes(self) -> Dict[str, Tuple[str, str]]:
+        """id -> (content hash, metadata hash) for everything indexed"""
+        hashes = {}
+        offset = 0
+        while True:
+            page = self.collection.get(
+                include=["metadatas"], limit=PAGE_SIZE, offset=offset
+            )
+            for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+                metadata = metadata or {}
+                hashes[doc_id] = (
+                    metadata.get(CONTENT_HASH),
+                    metadata.get(METADATA_HASH),
+                )
+            if len(page["ids"]) < PAGE_SIZE:
+                return hashes
+            offset += PAGE_SIZE
+
+    def sync(self, items: Iterable[IndexItem], prune: bool = True) -> Dict[str, int]:
+        """Apply only the difference between `items` and the index"""
+        started = time.perf_counter()
+        existing = self.existing_hashes()
+        stats: Counter = Counter()
+        seen = set()
+        to_embed: List[IndexItem] = []
+        to_update: List[Tuple[str, Dict[str, Any]]] = []
+
+        for doc_id, text, metadata in items:
+            if doc_id in seen:
+                stats["duplicate"] += 1
+                continue
+            seen.add(doc_id)
+            stats["scanned"] += 1
+
+            hashes = (content_hash(text), metadata_hash(metadata))
+            metadata = {**metadata, CONTENT_HASH: hashes[0], METADATA_HASH: hashes[1]}
+            previous = existing.get(doc_id)
+
+            if previous is None:
+                stats["added"] += 1
+                to_embed.append((doc_id, text, metadata))
+            elif previous[0] != hashes[0]:
+                stats["reembedded"] += 1
+                to_embed.append((doc_id, text, metadata))
+            elif previous[1] != hashes[1]:
+                stats["metadata_updated"] += 1
+                to_update.append((doc_id, metadata))
+            else:
+                stats["unchanged"] += 1
+
+            if self.builder is None and len(to_embed) >= self.batch_size:
+                self._embed_and_upsert(to_embed, stats, started)
+                to_embed = []
+            if len(to_update) >= PAGE_SIZE:
+                self._update_metadata(to_update)
+                to_update = []
+
+        if to_embed and self.builder is not None:
+            self._build_and_upsert(to_embed, stats)
+        elif to_embed:
+            self._embed_and_upsert(to_embed, stats, started)
+        if to_update:
+            self._update_metadata(to_update)
+
+        if prune:
+            orphans = [doc_id for doc_id in existing if doc_id not in seen]
+            for start in range(0, len(orphans), PAGE_SIZE):
+                self.collection.delete(ids=orphans[start : start + PAGE_SIZE])
+            stats["deleted"] = len(orphans)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"{self.name}: synced {stats['scanned']} docs in {elapsed:.1f}s "
+            f"(added {stats['added']}, re-embedded {stats['reembedded']}, "
+            f"metadata-only {stats['metadata_updated']}, unchanged "
+            f"{stats['unchanged']}, deleted {stats['deleted']})"
+        )
+        return dict(stats)
+
+    def _embed_and_upsert(self, batch: List[IndexItem], stats: Counter, started: float):
+        ids = [doc_id for doc_id, _, _ in batch]
+        documents = [text for _, text, _ in batch]
+        metadatas = [metadata for _, _, metadata in batch]
+
+        embeddings = self.encode(documents)
+        self.collection.upsert(
+            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+        )
+
+        stats["embedded"] += len(batch)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"{self.name}: embedded {stats['embedded']} "
+            f"(scanned {stats['scanned']}, "
+            f"{stats['embedded'] / elapsed if elapsed else 0:.0f} docs/s)"
+        )
+
+    def _build_and_upsert(self, items: List[IndexItem], stats: Counter):
+        """Encode everything in parallel, then merge into the collection"""
+        documents = [text for _, text, _ in items]
+        embeddings = self.builder.build(documents)
+
+        for start in range(0, len(items), self.batch_size):
+            batch = items[start : start + self.batch_size]
+            self.collection.upsert(
+                ids=[doc_id for doc_id, _, _ in batch],
+                embeddings=embeddings[start : start + len(batch)].tolist(),
+                documents=[text for _, text, _ in batch],
+                metadatas=[metadata for _, _, metadata in batch],
+            )
+            stats["embedded"] += len(batch)
+
+        # Kept until here so a crash during the merge doesn't lose the vectors
+        self.builder.cleanup(documents)
+
+    def _update_metadata(self, batch: List[Tuple[str, Dict[str, Any]]]):
+        self.collection.update(
+            ids=[doc_id for doc_id, _ in batch],
+            metadatas=[metadata for _, metadata in batch],
+        )
@@ -0,0 +1,384 @@
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+import orjson
+
+from app.core.metrics import EMBEDDING_BATCH_SIZE
+from app.core.readiness import FAILED, READY, get_readiness
+from app.core.tracing import span
+from app.services.vector_store import (
+    CHROMA,
+    EMBEDDING_MODEL,
+    VectorStore,
+    start_vector_store_warm_up,
+)
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Wire format: every frame is a 5-byte header, then `length` payload bytes.
+# Requests carry an opcode in the header, responses a status.
+HEADER = struct.Struct("!BI")
+MAX_FRAME = 64 * 1024 * 1024
+
+OP_STATUS = 1
+OP_ENCODE = 2
+OP_SEARCH_PRODUCTS = 3
+OP_SEARCH_TROUBLESHOOTING = 4
+OP_KEYWORD_TROUBLESHOOTING = 5
+OP_COUNT = 6
+OP_NAMES = {
+    OP_STATUS: "status",
+    OP_ENCODE: "encode",
+    OP_SEARCH_PRODUCTS: "search_products",
+    OP_SEARCH_TROUBLESHOOTING: "search_troubleshooting",
+    OP_KEYWORD_TROUBLESHOOTING: "keyword_troubleshooting",
+    OP_COUNT: "count",
+}
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Payload pieces: a u32 count or length, a u16 result limit
+U32 = struct.Struct("!I")
+U16 = struct.Struct("!H")
+MATRIX = struct.Struct("!II")
+
+
+def pack_texts(texts: List[str]) -> bytes:
+    parts = [U32.pack(len(texts))]
+    for text in texts:
+        data = text.encode("utf-8")
+        parts += [U32.pack(len(data)), data]
+    return b"".join(parts)
+
+
+def unpack_texts(payload: bytes, offset: int = 0) -> List[str]:
+    (count,) = U32.unpack_from(payload, offset)
+    offset += U32.size
+    texts = []
+    for _ in range(count):
+        (length,) = U32.unpack_from(payload, offset)
+        offset += U32.size
+        texts.append(payload[offset : offset + length].decode("utf-8"))
+        offset += length
+    return texts
+
+
+def pack_matrix(matrix: np.ndarray) -> bytes:
+    """Rows and columns, then raw little-endian float32 values"""
+    rows, dim = matrix.shape
+    return MATRIX.pack(rows, dim) + matrix.astype("<f4", copy=False).tobytes()
+
+
+def unpack_matrix(payload: bytes) -> np.ndarray:
+    rows, dim = MATRIX.unpack_from(payload)
+    return np.frombuffer(payload, dtype="<f4", offset=MATRIX.size).reshape(rows, dim)
+
+
+def pack_search(query: str, n_results: int) -> bytes:
+    return U16.pack(n_results) + query.encode("utf-8")
+
+
+def unpack_search(payload: bytes) -> Tuple[str, int]:
+    (n_results,) = U16.unpack_from(payload)
+    return payload[U16.size :].decode("utf-8"), n_results
+
+
+class SidecarError(Exception):
+    """The sidecar rejected a request or could not be reached"""
+
+
+class EncodeBatcher:
+    """
+    Coalesces concurrent encode requests from all workers into one model
+    call; a single consumer also keeps the model from being oversubscribed
+    by parallel threads.
+    """
+
+    def __init__(self, store: VectorStore, max_batch: int):
+        self.store = store
+        self.max_batch = max_batch
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((texts, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            pending = [await self.queue.get()]
+            size = len(pending[0][0])
+            while size < self.max_batch and not self.queue.empty():
+                pending.append(self.queue.get_nowait())
+                size += len(pending[-1][0])
+
+            texts = [text for batch, _ in pending for text in batch]
+            EMBEDDING_BATCH_SIZE.observe(len(texts))
+            try:
+                matrix = await asyncio.to_thread(
+                    self.store.embedder.encode, texts, self.max_batch
+                )
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            start = 0
+            for batch, future in pending:
+                if not future.done():
+                    future.set_result(matrix[start : start + len(batch)])
+                start += len(batch)
+
+
+class VectorSidecarServer:
+    """Serves one VectorStore to every worker over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, store: Optional[VectorStore] = None):
+        self.socket_path = socket_path
+        self.store = store or VectorStore()
+        self.batcher = EncodeBatcher(self.store, settings.VECTOR_SIDECAR_MAX_BATCH)
+
+    async def serve(self):
+        self._remove_stale_socket()
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        # Workers run as the same user or group; nobody else may query
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"Vector sidecar listening on {self.socket_path}")
+
+        warm_up = start_vector_store_warm_up(self.store)
+        self.batcher.start()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            warm_up.cancel()
+            self.batcher.task.cancel()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _remove_stale_socket(self):
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"A sidecar is already serving {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                op, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+                if length > MAX_FRAME:
+                    logger.warning(f"Dropping sidecar client: {length}-byte frame")
+                    return
+                payload = await reader.readexactly(length)
+
+                try:
+                    status, body = STATUS_OK, await self._dispatch(op, payload)
+                except Exception as e:
+                    status, body = STATUS_ERROR, str(e).encode("utf-8")
+                writer.write(HEADER.pack(status, len(body)) + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, op: int, payload: bytes) -> bytes:
+        if op == OP_STATUS:
+            return orjson.dumps(get_readiness().snapshot())
+
+        if op == OP_KEYWORD_TROUBLESHOOTING:
+            self._require(CHROMA)
+            (n_results,) = U16.unpack_from(payload)
+            terms = unpack_texts(payload, U16.size)
+            return orjson.dumps(
+                await asyncio.to_thread(
+                    self.store.keyword_search_troubleshooting, terms, n_results
+                )
+            )
+
+        if op == OP_COUNT:
+            self._require(CHROMA)
+            return orjson.dumps(await asyncio.to_thread(self.store.count))
+
+        if op == OP_ENCODE:
+            self._require(EMBEDDING_MODEL)
+            return pack_matrix(await self.batcher.encode(unpack_texts(payload)))
+
+        if op in (OP_SEARCH_PRODUCTS, OP_SEARCH_TROUBLESHOOTING):
+            self._require(CHROMA, EMBEDDING_MODEL)
+            query, n_results = unpack_search(payload)
+            embedding = (await self.batcher.encode([query]))[0].tolist()
+            search = (
+                self.store.search_products
+                if op == OP_SEARCH_PRODUCTS
+                else self.store.search_troubleshooting
+            )
+            return orjson.dumps(
+                await asyncio.to_thread(search, query, n_results, embedding)
+            )
+
+        raise ValueError(f"Unknown sidecar opcode {op}")
+
+    @staticmethod
+    def _require(*names: str):
+        if not get_readiness().is_ready(*names):
+            raise RuntimeError(f"Sidecar not ready: {', '.join(names)}")
+
+
+class VectorSidecarClient:
+    """
+    Stands in for VectorStore in the API workers: same query methods, but
+    the model and index live in the sidecar. Blocking sockets, like the
+    in-process store's calls; idle connections are pooled per worker.
+    """
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        self.socket_path = socket_path
+        self.timeout = timeout or settings.VECTOR_SIDECAR_TIMEOUT
+        self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+        self._stopped = threading.Event()
+
+    def close(self):
+        """Stop any warm-up wait and drop the pooled connections"""
+        self._stopped.set()
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _call(self, op: int, payload: bytes = b"") -> bytes:
+        with span("vector_sidecar.call", op=OP_NAMES.get(op, op)):
+            return self._request(op, payload)
+
+    def _request(self, op: int, payload: bytes) -> bytes:
+        try:
+            sock, reused = self._idle.get_nowait(), True
+        except queue.Empty:
+            try:
+                sock, reused = self._connect(), False
+            except OSError as e:
+                raise SidecarError(f"Vector sidecar unavailable: {e}") from e
+
+        try:
+            status, body = self._exchange(sock, op, payload)
+        except ConnectionError as e:
+            sock.close()
+            if not reused:
+                raise SidecarError(f"Vector sidecar unavailable: {e}") from e
+            # The sidecar may have restarted since this connection was idle
+            return self._request(op, payload)
+        except OSError as e:
+            # Timeouts leave a response in flight, so the socket is unusable
+            sock.close()
+            raise SidecarError(f"Vector sidecar request failed: {e}") from e
+
+        self._idle.put(sock)
+        if status != STATUS_OK:
+            raise SidecarError(body.decode("utf-8"))
+        return body
+
+    @staticmethod
+    def _exchange(sock: socket.socket, op: int, payload: bytes) -> Tuple[int, bytes]:
+        sock.sendall(HEADER.pack(op, len(payload)) + payload)
+        status, length = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+        return status, _recv_exactly(sock, length)
+
+    def status(self) -> Dict[str, Any]:
+        return orjson.loads(self._call(OP_STATUS))
+
+    def _wait_for(self, name: str):
+        """Block until the sidecar reports `name` loaded (startup warm-up)"""
+        timeout = settings.VECTOR_SIDECAR_STARTUP_TIMEOUT
+        deadline = time.monotonic() + timeout
+        delay = 0.1
+        while True:
+            try:
+                component = self.status()["components"].get(name, {})
+            except (OSError, SidecarError) as e:
+                logger.debug(f"Waiting for vector sidecar: {e}")
+                component = {}
+
+            if component.get("status") == READY:
+                return
+            if component.get("status") == FAILED:
+                raise SidecarError(f"Sidecar failed to load {name}: {component}")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SidecarError(f"Sidecar did not load {name} within {timeout}s")
+            if self._stopped.wait(min(delay, remaining)):
+                raise SidecarError(f"Stopped waiting for sidecar to load {name}")
+            delay = min(delay * 2, 2.0)
+
+    # Warm-up hooks, mirroring VectorStore
+    def initialize_collections(self):
+        self._wait_for(CHROMA)
+
+    def load_embedding_model(self):
+        self._wait_for(EMBEDDING_MODEL)
+
+    def count(self) -> Dict[str, int]:
+        return orjson.loads(self._call(OP_COUNT))
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return unpack_matrix(self._call(OP_ENCODE, pack_texts(texts)))
+
+    def search_products(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        return orjson.loads(
+            self._call(OP_SEARCH_PRODUCTS, pack_search(query, n_results))
+        )
+
+    def search_troubleshooting(
+        self, query: str, n_results: int = 3
+    ) -> List[Dict[str, Any]]:
+        return orjson.loads(
+            self._call(OP_SEARCH_TROUBLESHOOTING, pack_search(query, n_results))
+        )
+
+    def keyword_search_troubleshooting(
+        self, terms: List[str], n_results: int = 3
+    ) -> List[Dict[str, Any]]:
+        return orjson.loads(
+            self._call(
+                OP_KEYWORD_TROUBLESHOOTING, U16.pack(n_results) + pack_texts(terms)
+            )
+        )
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    while view:
+        received = sock.recv_into(view)
+        if not received:
+            raise ConnectionError("Vector sidecar closed the connection")
+        view = view[received:]
+    return bytes(buffer)
@@ -1,29 +1,78 @@
-import chromadb
-from chromadb.config import Settings as ChromaSettings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional
+import asyncio
 import logging
+import threading
+import numpy as np
+from app.core.metrics import EMBEDDING_BATCH_SIZE
+from app.core.readiness import get_readiness
+from app.core.tracing import span
+from app.services.embeddings import EmbeddingBackend, create_embedding_backend
+from app.services.embedding_builder import get_embedding_builder
+from app.services.vector_indexer import IncrementalIndexer, public_metadata, stable_id
 from config import settings
 
 logger = logging.getLogger(__name__)
 
 
+# Readiness components; tools wait on both before searching semantically
+CHROMA = "chroma"
+EMBEDDING_MODEL = "embedding_model"
+COMPONENTS = (CHROMA, EMBEDDING_MODEL)
+
+
 class VectorStore:
-    def __init__(self):
-        self.client = chromadb.PersistentClient(
-            path=settings.CHROMA_PERSIST_DIR,
-            settings=ChromaSettings(
-                anonymized_telemetry=False,
-            ),
-        )
-        self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    """
+    Chroma collections plus an embedding backend. Both are heavy (torch or
+    ONNX Runtime, model weights, the persistent client), so they are
+    imported and loaded on first use rather than when this module is
+    imported.
+    """
+
+    def __init__(self, embedder: Optional[EmbeddingBackend] = None):
+        self._client = None
+        self._embedder = embedder or create_embedding_backend()
+        self._embedder_loaded = False
+        self._client_lock = threading.Lock()
+        self._model_lock = threading.Lock()
 
         # Collections
         self.products_collection = None
         self.troubleshooting_collection = None
 
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import chromadb
+                    from chromadb.config import Settings as ChromaSettings
+
+                    self._client = chromadb.PersistentClient(
+                        path=settings.CHROMA_PERSIST_DIR,
+                        settings=ChromaSettings(
+                            anonymized_telemetry=False,
+                        ),
+                    )
+        return self._client
+
+    @property
+    def embedder(self) -> EmbeddingBackend:
+        if not self._embedder_loaded:
+            with self._model_lock:
+                if not self._embedder_loaded:
+                    self._embedder.load()
+                    self._embedder_loaded = True
+                    logger.info(f"Embedding backend: {self._embedder.name}")
+        return self._embedder
+
+    def load_embedding_model(self):
+        self.embedder
+
     def initialize_collections(self):
         """Initialize Chroma collections"""
+        if self.products_collection and self.troubleshooting_collection:
+            return
+
         try:
             # Products collection
             self.products_collection = self.client.get_or_create_collection(
@@ -41,51 +90,86 @@ class VectorStore:
             logger.error(f"Error initializing collections: {e}")
             raise
 
-    def add_products(self, products: List[Dict[str, Any]]):
-        """Add products to vector store"""
+    def count(self) -> Dict[str, int]:
+        """Documents per collection"""
+        return {
+            "products": self.products_collection.count(),
+            "troubleshooting": self.troubleshooting_collection.count(),
+        }
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.embedder.encode(texts)
+
+    def _encode(self, documents: List[str]) -> List[List[float]]:
+        return self.embedder.encode(
+            documents, batch_size=settings.EMBEDDING_BATCH_SIZE
+        ).tolist()
+
+    def _encode_query(self, query: str) -> List[float]:
+        EMBEDDING_BATCH_SIZE.observe(1)
+        with span("embedding.encode", backend=self._embedder.name):
+            return self.embedder.encode([query])[0].tolist()
+
+    def _indexer(self, collection, name: str) -> IncrementalIndexer:
+        builder = None
+        if settings.EMBEDDING_WORKERS > 1:
+            builder = get_embedding_builder()
+        return IncrementalIndexer(
+            collection, self._encode, settings.EMBEDDING_BATCH_SIZE, name, builder
+        )
+
+    def sync_products(
+        self, products: Iterable[Dict[str, Any]], prune: bool = True
+    ) -> Dict[str, int]:
+        """
+        Incrementally index products: only new or re-worded products are
+        embedded. With `prune`, `products` is the full catalog and anything
+        else is removed from the index.
+        """
         if not self.products_collection:
             raise ValueError("Products collection not initialized")
 
-        documents = []
-        metadatas = []
-        ids = []
-
-        for product in products:
-            # Create searchable document
-            doc = f"{product['name']} {product['description']} {product['part_number']} {product['category']}"
-            documents.append(doc)
-            metadatas.append(
+        items = (
+            (
+                product["part_number"],
+                # Create searchable document
+                f"{product['name']} {product['description']} {product['part_number']} {product['category']}",
                 {
                     "part_number": product["part_number"],
                     "name": product["name"],
                     "price": product["price"],
                     "category": product["category"],
                     "appliance_type": product["appliance_type"],
-                }
+                },
             )
-            ids.append(product["part_number"])
-
-        # Generate embeddings
-        embeddings = self.embedding_model.encode(documents).tolist()
-
-        # Add to collection
-        self.products_collection.add(
-            embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids
+            for product in products
         )
-        logger.info(f"Added {len(products)} products to vector store")
+        return self._indexer(self.products_collection, "products").sync(items, prune)
 
-    def search_products(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def add_products(self, products: List[Dict[str, Any]]):
+        """Add or update products in the vector store"""
+        stats = self.sync_products(products, prune=False)
+        logger.info(f"Indexed {len(products)} products ({stats})")
+
+    def search_products(
+        self,
+        query: str,
+        n_results: int = 5,
+        query_embedding: Optional[List[float]] = None,
+    ) -> List[Dict[str, Any]]:
         """Search products using semantic similarity"""
         if not self.products_collection:
             raise ValueError("Products collection not initialized")
 
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query])[0].tolist()
+        # Generate query embedding (the sidecar passes one it batched)
+        if query_embedding is None:
+            query_embedding = self._encode_query(query)
 
         # Search
-        results = self.products_collection.query(
-            query_embeddings=[query_embedding], n_results=n_results
-        )
+        with span("chroma.query", collection="products", n_results=n_results):
+            results = self.products_collection.query(
+                query_embeddings=[query_embedding], n_results=n_results
+            )
 
         # Format results
         products = []
@@ -93,7 +177,7 @@ class VectorStore:
             for i, metadata in enumerate(results["metadatas"][0]):
                 products.append(
                     {
-                        **metadata,
+                        **public_metadata(metadata),
                         "relevance_score": 1
                         - results["distances"][0][i],  # Convert distance to similarity
                     }
@@ -101,47 +185,51 @@ class VectorStore:
 
         return products
 
-    def add_troubleshooting_docs(self, docs: List[Dict[str, str]]):
-        """Add troubleshooting documents to vector store"""
+    def sync_troubleshooting_docs(
+        self, docs: Iterable[Dict[str, str]], prune: bool = True
+    ) -> Dict[str, int]:
+        """Incrementally index troubleshooting docs, keyed by source or title"""
         if not self.troubleshooting_collection:
             raise ValueError("Troubleshooting collection not initialized")
 
-        documents = []
-        metadatas = []
-        ids = []
-
-        for idx, doc in enumerate(docs):
-            documents.append(doc["content"])
-            metadatas.append(
+        items = (
+            (
+                stable_id("troubleshooting", doc.get("source") or doc["title"]),
+                doc["content"],
                 {
                     "title": doc["title"],
                     "category": doc.get("category", "general"),
                     "appliance_type": doc.get("appliance_type", "general"),
-                }
+                },
             )
-            ids.append(f"troubleshooting_{idx}")
-
-        # Generate embeddings
-        embeddings = self.embedding_model.encode(documents).tolist()
-
-        # Add to collection
-        self.troubleshooting_collection.add(
-            embeddings=embeddings, documents=documents, metadatas=metadatas, ids=ids
+            for doc in docs
         )
-        logger.info(f"Added {len(docs)} troubleshooting docs to vector store")
+        return self._indexer(self.troubleshooting_collection, "troubleshooting").sync(
+            items, prune
+        )
+
+    def add_troubleshooting_docs(self, docs: List[Dict[str, str]]):
+        """Add or update troubleshooting documents in the vector store"""
+        stats = self.sync_troubleshooting_docs(docs, prune=False)
+        logger.info(f"Indexed {len(docs)} troubleshooting docs ({stats})")
 
     def search_troubleshooting(
-        self, query: str, n_results: int = 3
+        self,
+        query: str,
+        n_results: int = 3,
+        query_embedding: Optional[List[float]] = None,
     ) -> List[Dict[str, Any]]:
         """Search troubleshooting guides"""
         if not self.troubleshooting_collection:
             raise ValueError("Troubleshooting collection not initialized")
 
-        query_embedding = self.embedding_model.encode([query])[0].tolist()
+        if query_embedding is None:
+            query_embedding = self._encode_query(query)
 
-        results = self.troubleshooting_collection.query(
-            query_embeddings=[query_embedding], n_results=n_results
-        )
+        with span("chroma.query", collection="troubleshooting", n_results=n_results):
+            results = self.troubleshooting_collection.query(
+                query_embeddings=[query_embedding], n_results=n_results
+            )
 
         docs = []
         if results["documents"] and len(results["documents"][0]) > 0:
@@ -149,26 +237,123 @@ class VectorStore:
                 docs.append(
                     {
                         "content": doc,
-                        "metadata": results["metadatas"][0][i],
+                        "metadata": public_metadata(results["metadatas"][0][i]),
                         "relevance_score": 1 - results["distances"][0][i],
                     }
                 )
 
         return docs
 
+    def keyword_search_troubleshooting(
+        self, terms: List[str], n_results: int = 3
+    ) -> List[Dict[str, Any]]:
+        """Substring match on guide text; needs Chroma but not the model"""
+        if not self.troubleshooting_collection or not terms:
+            return []
+
+        clauses = [{"$contains": term} for term in terms]
+        where = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        with span("chroma.get", collection="troubleshooting", terms=len(terms)):
+            results = self.troubleshooting_collection.get(
+                where_document=where,
+                limit=n_results,
+                include=["documents", "metadatas"],
+            )
+
+        return [
+            {
+                "content": doc,
+                "metadata": public_metadata(metadata or {}),
+                "relevance_score": sum(term in doc for term in terms) / len(terms),
+            }
+            for doc, metadata in zip(results["documents"], results["metadatas"])
+        ]
+
 
 # Global instance
 _vector_store = None
+_vector_store_lock = threading.Lock()
 
 
-def get_vector_store() -> VectorStore:
+def _instance() -> VectorStore:
     global _vector_store
-    if _vector_store is None:
-        _vector_store = VectorStore()
-        _vector_store.initialize_collections()
+    with _vector_store_lock:
+        if _vector_store is None:
+            if settings.VECTOR_SIDECAR_SOCKET:
+                # Model and index live in one sidecar process shared by
+                # all workers (scripts/run_vector_sidecar.py)
+                from app.services.vector_sidecar import VectorSidecarClient
+
+                _vector_store = VectorSidecarClient(settings.VECTOR_SIDECAR_SOCKET)
+            else:
+                _vector_store = VectorStore()
     return _vector_store
 
 
-def initialize_vector_store():
-    """Initialize vector store on startup"""
-    get_vector_store()
+def get_vector_store() -> VectorStore:
+    """The loaded store; blocks while Chroma and the model load on first use"""
+    store = _instance()
+    store.initialize_collections()
+    store.load_embedding_model()
+    return store
+
+
+def get_local_vector_store() -> VectorStore:
+    """
+    A loaded in-process store, even when a sidecar is configured. The
+    indexing scripts use it: the sidecar only serves queries, so restart
+    it after reseeding.
+    """
+    store = VectorStore()
+    store.initialize_collections()
+    store.load_embedding_model()
+    return store
+
+
+def peek_vector_store() -> VectorStore:
+    """The store without loading anything; check readiness before using it"""
+    return _instance()
+
+
+async def _warm_up(store: VectorStore):
+    readiness = get_readiness()
+    await asyncio.gather(
+        readiness.load(CHROMA, store.initialize_collections),
+        readiness.load(EMBEDDING_MODEL, store.load_embedding_model),
+    )
+
+
+def start_vector_store_warm_up(store: Optional[VectorStore] = None) -> asyncio.Task:
+    """Load Chroma and the embedding model in the background"""
+    readiness = get_readiness()
+    for name in COMPONENTS:
+        readiness.register(name, required=settings.READINESS_REQUIRE_VECTOR_STORE)
+    return asyncio.create_task(_warm_up(store or _instance()))
+
+
+async def stop_vector_store_warm_up(warm_up: asyncio.Task):
+    """Cancel the warm-up, releasing a thread still waiting on the sidecar"""
+    warm_up.cancel()
+    if settings.VECTOR_SIDECAR_SOCKET and _vector_store is not None:
+        _vector_store.close()
+    await asyncio.gather(warm_up, return_exceptions=True)
+
+
+# Set once a wait has run out: until the store is ready, tools fall back
+# straight away rather than each spending the timeout again within a turn
+_wait_expired = False
+
+
+async def wait_for_vector_store(timeout: float) -> bool:
+    """Whether semantic search is usable, waiting up to `timeout` seconds"""
+    global _wait_expired
+    readiness = get_readiness()
+    if readiness.is_ready(*COMPONENTS):
+        return True
+    if _wait_expired:
+        return False
+
+    ready = await readiness.wait(COMPONENTS, timeout)
+    if not ready:
+        _wait_expired = True
+    return ready
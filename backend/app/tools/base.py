@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any
+import inspect
 
 
 class BaseTool(ABC):
@@ -21,3 +22,12 @@ class BaseTool(ABC):
     async def execute(self, **kwargs) -> Dict[str, Any]:
         """Execute the tool"""
         pass
+
+    def normalize_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Arguments with defaults filled in, so calls that `execute` treats
+        the same compare equal. Raises TypeError if they don't fit.
+        """
+        bound = inspect.signature(self.execute).bind(**arguments)
+        bound.apply_defaults()
+        return bound.arguments
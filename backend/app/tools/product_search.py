@@ -2,18 +2,23 @@ from typing import Dict, Any, Optional
 import logging
 import re
 
-from sqlalchemy import or_
+from sqlalchemy import case, or_
 
 from app.tools.base import BaseTool
-from app.services.vector_store import get_vector_store
+from app.services.vector_store import peek_vector_store, wait_for_vector_store
 from app.services.database import SessionLocal
 from app.models.database_models import Product
+from config import settings
 
 logger = logging.getLogger(__name__)
 
 # Simple heuristic: most appliance part numbers are alphanumeric, 5–12 chars.
 PART_NUMBER_PATTERN = re.compile(r"^[A-Z0-9\-]{4,15}$", re.I)
 
+# Lexical fallback: ignore short words, cap the number of ILIKE clauses
+MIN_TERM_LENGTH = 3
+MAX_TERMS = 8
+
 
 class ProductSearchTool(BaseTool):
     @property
@@ -24,6 +29,13 @@ class ProductSearchTool(BaseTool):
     def description(self) -> str:
         return "Search for refrigerator or dishwasher parts"
 
+    def normalize_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        arguments = super().normalize_arguments(arguments)
+        # execute() only ever looks at the cleaned query
+        if isinstance(arguments["query"], str):
+            arguments["query"] = arguments["query"].strip().upper()
+        return arguments
+
     async def execute(
         self, query: str, appliance_type: Optional[str] = "any", limit: int = 5
     ) -> Dict[str, Any]:
@@ -99,7 +111,11 @@ class ProductSearchTool(BaseTool):
             # ---------------------------------------------------------
             # 3. VECTOR SEARCH (semantic match, last resort)
             # ---------------------------------------------------------
-            vector_store = get_vector_store()
+            if not await wait_for_vector_store(settings.VECTOR_STORE_WAIT_TIMEOUT):
+                # Model still loading (or failed): match individual words
+                return self._lexical_search(db, query_clean, limit)
+
+            vector_store = peek_vector_store()
             results = vector_store.search_products(query_clean, n_results=limit)
 
             if not results:
@@ -143,3 +159,57 @@ class ProductSearchTool(BaseTool):
 
         finally:
             db.close()
+
+    def _lexical_search(self, db, query: str, limit: int) -> Dict[str, Any]:
+        """Rank products by how many query words their name/description contain"""
+        terms = [
+            term
+            for term in dict.fromkeys(re.findall(r"\w+", query.lower()))
+            if len(term) >= MIN_TERM_LENGTH
+        ][:MAX_TERMS]
+        if not terms:
+            return {
+                "success": True,
+                "products": [],
+                "search_mode": "lexical",
+                "degraded": True,
+            }
+
+        matches = [
+            or_(Product.name.ilike(f"%{term}%"), Product.description.ilike(f"%{term}%"))
+            for term in terms
+        ]
+        score = sum(case((match, 1), else_=0) for match in matches)
+        rows = (
+            db.query(Product, score)
+            .filter(or_(*matches))
+            .order_by(score.desc())
+            .limit(limit)
+            .all()
+        )
+        logger.info(
+            f"[ProductSearch] Lexical fallback for '{query}': {len(rows)} products"
+        )
+
+        products = [
+            {
+                "part_number": p.part_number,
+                "name": p.name,
+                "description": p.description,
+                "price": p.price,
+                "image_url": p.image_url,
+                "category": p.category,
+                "appliance_type": p.appliance_type,
+                "in_stock": p.in_stock,
+                "relevance_score": round(0.6 * hits / len(terms), 3),
+            }
+            for p, hits in rows
+        ]
+        return {
+            "success": True,
+            "products": products,
+            "count": len(products),
+            "search_mode": "lexical",
+            # A stand-in for semantic search: not worth reusing
+            "degraded": True,
+        }
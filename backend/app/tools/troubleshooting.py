@@ -1,8 +1,15 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 import logging
+import re
+from app.core.readiness import get_readiness
 from app.tools.base import BaseTool
-from app.services.vector_store import get_vector_store
+from app.services.vector_store import (
+    CHROMA,
+    peek_vector_store,
+    wait_for_vector_store,
+)
 from app.tools.product_search import ProductSearchTool
+from config import settings
 
 logger = logging.getLogger(__name__)
 
@@ -26,21 +33,19 @@ class TroubleshootingTool(BaseTool):
         Troubleshoot appliance issues
         """
         try:
-            vector_store = get_vector_store()
-
             # Search troubleshooting knowledge base
             query = f"{appliance_type} {problem}"
             if brand:
                 query = f"{brand} {query}"
 
-            guides = vector_store.search_troubleshooting(query, n_results=1)
+            guides, degraded = await self._search_guides(query, problem)
 
             # Also search for relevant parts
             parts_result = await self.product_search.execute(
                 query=problem, appliance_type=appliance_type, limit=3
             )
 
-            return {
+            result = {
                 "success": True,
                 "problem": problem,
                 "appliance_type": appliance_type,
@@ -50,11 +55,34 @@ class TroubleshootingTool(BaseTool):
                     problem, appliance_type
                 ),
             }
+            if degraded or parts_result.get("degraded"):
+                result["degraded"] = True
+            return result
 
         except Exception as e:
             logger.error(f"Error in troubleshooting: {e}")
             return {"success": False, "error": str(e)}
 
+    async def _search_guides(self, query: str, problem: str) -> Tuple[list, bool]:
+        """
+        Semantic search, or keyword matching while the model is loading;
+        also whether the guides came from a fallback
+        """
+        vector_store = peek_vector_store()
+        if await wait_for_vector_store(settings.VECTOR_STORE_WAIT_TIMEOUT):
+            return vector_store.search_troubleshooting(query, n_results=1), False
+
+        if not get_readiness().is_ready(CHROMA):
+            logger.warning("Troubleshooting guides unavailable, vector store not ready")
+            return [], True
+
+        terms = [term for term in re.findall(r"\w+", problem.lower()) if len(term) > 3]
+        logger.info(f"Embedding model not ready, keyword search for {terms}")
+        return (
+            vector_store.keyword_search_troubleshooting(terms[:5], n_results=1),
+            True,
+        )
+
     def _generate_diagnostic_steps(self, problem: str, appliance_type: str) -> list:
         """Generate basic diagnostic steps based on problem"""
         problem_lower = problem.lower()
@@ -0,0 +1,164 @@
+from typing import AsyncIterator, Deque, Optional, List
+from collections import deque
+from datetime import datetime, timezone
+import asyncio
+import json
+import time
+
+from app.models.schemas import StreamEvent
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, separators=(",", ":"), default=_default).encode()
+
+
+class SSEWriter:
+    """
+    Encodes StreamEvents as Server-Sent Events in the StreamChunk format,
+    timestamped when the frame is written.
+
+    Frames carry an incrementing `id:` so clients can resume with
+    Last-Event-ID. Consecutive text chunks can be coalesced into one frame,
+    flushed once `coalesce_chars` characters are buffered or `coalesce_ms` has passed.
+    """
+
+    def __init__(
+        self, coalesce_ms: float = 0, coalesce_chars: int = 0, start_id: int = 0
+    ):
+        self.coalesce_interval = coalesce_ms / 1000
+        self.coalesce_chars = coalesce_chars
+        self.last_id = start_id
+
+    @property
+    def coalescing(self) -> bool:
+        return self.coalesce_interval > 0 or self.coalesce_chars > 0
+
+    def encode(self, chunk: StreamEvent) -> bytes:
+        """Encode one chunk as an SSE frame"""
+        return self._frame(chunk.type, chunk.content)
+
+    def _frame(self, chunk_type: str, content) -> bytes:
+        self.last_id += 1
+        data = dumps(
+            {
+                "type": chunk_type,
+                "content": content,
+                "timestamp": datetime.now(timezone.utc),
+            }
+        )
+        return b"id: %d\ndata: %s\n\n" % (self.last_id, data)
+
+    async def stream(self, chunks: AsyncIterator[StreamEvent]) -> AsyncIterator[bytes]:
+        """Encode a chunk stream, coalescing text deltas when enabled"""
+        if not self.coalescing:
+            async for chunk in chunks:
+                yield self.encode(chunk)
+            return
+
+        buffer: List[str] = []
+        buffered_chars = 0
+        buffer_started: Optional[float] = None
+
+        def flush() -> bytes:
+            nonlocal buffer, buffered_chars, buffer_started
+            frame = self._frame("text", "".join(buffer))
+            buffer, buffered_chars, buffer_started = [], 0, None
+            return frame
+
+        # A single pump task reads upstream, so waiting for the next chunk
+        # with a flush deadline doesn't cost a future per token
+        loop = asyncio.get_running_loop()
+        pending: Deque[StreamEvent] = deque()
+        ready = asyncio.Event()
+        state = {"finished": False, "error": None}
+
+        async def pump():
+            try:
+                async for chunk in chunks:
+                    pending.append(chunk)
+                    ready.set()
+            except Exception as e:
+                state["error"] = e
+            finally:
+                state["finished"] = True
+                ready.set()
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            while True:
+                while pending:
+                    chunk = pending.popleft()
+
+                    if chunk.type == "text" and isinstance(chunk.content, str):
+                        if not buffer:
+                            buffer_started = time.monotonic()
+                        buffer.append(chunk.content)
+                        buffered_chars += len(chunk.content)
+
+                        if (
+                            self.coalesce_chars
+                            and buffered_chars >= self.coalesce_chars
+                        ) or (
+                            self.coalesce_interval
+                            and time.monotonic() - buffer_started
+                            >= self.coalesce_interval
+                        ):
+                            yield flush()
+                        continue
+
+                    if buffer:
+                        yield flush()
+                    yield self.encode(chunk)
+
+                if state["finished"] and not pending:
+                    break
+
+                ready.clear()
+                if pending or state["finished"]:
+                    continue
+
+                timer = None
+                if buffer and self.coalesce_interval:
+                    remaining = self.coalesce_interval - (
+                        time.monotonic() - buffer_started
+                    )
+                    timer = loop.call_later(max(0.0, remaining), ready.set)
+                try:
+                    await ready.wait()
+                finally:
+                    if timer is not None:
+                        timer.cancel()
+
+                if (
+                    not pending
+                    and buffer
+                    and time.monotonic() - buffer_started >= self.coalesce_interval
+                ):
+                    # Upstream is quiet; don't hold text back any longer
+                    yield flush()
+
+            if buffer:
+                yield flush()
+            if state["error"] is not None:
+                raise state["error"]
+        finally:
+            if not pump_task.done():
+                pump_task.cancel()
+            # Let the upstream generator close before we report done
+            await asyncio.gather(pump_task, return_exceptions=True)
@@ -14,6 +14,26 @@ class Settings(BaseSettings):
     DEEPSEEK_MODEL: str = "deepseek-chat"
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
 
+    # LLM resilience
+    LLM_REQUEST_TIMEOUT: float = 60.0
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BASE_DELAY: float = 0.5
+    LLM_RETRY_MAX_DELAY: float = 8.0
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = 5
+    LLM_CIRCUIT_RESET_TIMEOUT: float = 30.0
+
+    # Token usage accounting; prices are USD per million tokens
+    USAGE_TRACKING_ENABLED: bool = True
+    USAGE_FLUSH_INTERVAL: float = 60.0
+    # Ask for the usage block on the last stream chunk (stream_options)
+    LLM_STREAM_INCLUDE_USAGE: bool = True
+    LLM_PRICE_INPUT_PER_MTOK: float = 0.27
+    LLM_PRICE_CACHED_INPUT_PER_MTOK: float = 0.07
+    LLM_PRICE_OUTPUT_PER_MTOK: float = 1.10
+
     # Database
     DATABASE_URL: str
 
@@ -23,11 +43,135 @@ class Settings(BaseSettings):
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:3000"
 
+    # Streaming (coalescing is off when both thresholds are 0)
+    SSE_COALESCE_MS: float = 0
+    SSE_COALESCE_CHARS: int = 0
+
+    # Resumable streams ("memory" or "redis")
+    STREAM_BUFFER_BACKEND: str = "memory"
+    STREAM_BUFFER_MAX_EVENTS: int = 2000
+    STREAM_BUFFER_TTL: float = 300.0
+    # Cancel a stream once no client has been attached for this long
+    STREAM_RESUME_GRACE_SECONDS: float = 10.0
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Admission control: chat turns a worker processes at once (0 = no
+    # limit) and how many may queue, for how long, before a 503
+    ADMISSION_MAX_IN_FLIGHT: int = 32
+    ADMISSION_MAX_QUEUE: int = 64
+    ADMISSION_QUEUE_TIMEOUT: float = 5.0
+
+    # Per-client chat rate limit (token bucket keyed by API key, user or IP);
+    # "memory" limits per worker, "redis" shares buckets across workers
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_PER_MINUTE: float = 20.0
+    RATE_LIMIT_BURST: int = 10
+
+    # Write-behind conversation persistence
+    PERSISTENCE_QUEUE_SIZE: int = 10000
+    PERSISTENCE_BATCH_SIZE: int = 200
+    PERSISTENCE_FLUSH_INTERVAL: float = 0.25
+    # Retries of a failed batch (exponential backoff from the delay), then
+    # the events that still fail go to the dead-letter file (JSON lines)
+    PERSISTENCE_MAX_RETRIES: int = 3
+    PERSISTENCE_RETRY_DELAY: float = 0.5
+    PERSISTENCE_DEAD_LETTER_FILE: str = ""
+
+    # Server-side conversation context
+    CONVERSATION_CACHE_SIZE: int = 10000
+    CONVERSATION_CONTEXT_WINDOW: int = 5
+    # Reload cached context from the database after this long (0 = never),
+    # so turns served by other workers show up
+    CONVERSATION_CACHE_TTL: float = 30.0
+
+    # Conversation history pagination
+    HISTORY_PAGE_SIZE: int = 100
+    HISTORY_MAX_PAGE_SIZE: int = 1000
+
+    # Conversation retention ("age" uses created_at, "inactivity" updated_at)
+    RETENTION_ENABLED: bool = False
+    RETENTION_MODE: str = "inactivity"
+    RETENTION_DAYS: float = 90
+    RETENTION_INTERVAL: float = 3600.0
+    RETENTION_BATCH_SIZE: int = 1000
+    RETENTION_BATCH_PAUSE: float = 0.05
+    # Also drop whole monthly partitions (postgres/partition_messages.sql)
+    RETENTION_PARTITIONED: bool = False
+
+    # Catalog ingestion
+    INGEST_BATCH_SIZE: int = 1000
+
     # Embeddings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 256
+    # Process-pool encoding for bulk re-indexing (1 = encode in-process)
+    EMBEDDING_WORKERS: int = 1
+    EMBEDDING_SHARD_SIZE: int = 10000
+    EMBEDDING_BUILD_DIR: str = "./embedding_builds"
+    # Query/indexing backend: "sentence_transformers" (PyTorch) or "onnx"
+    EMBEDDING_BACKEND: str = "sentence_transformers"
+    # Output of scripts/export_onnx.py
+    EMBEDDING_ONNX_DIR: str = "./onnx_models/all-MiniLM-L6-v2"
+    EMBEDDING_ONNX_QUANTIZED: bool = False
+    # Intra-op threads for inference (0 = runtime default)
+    EMBEDDING_THREADS: int = 0
+
+    # Staged startup: Chroma and the model load in the background
+    # How long a tool waits for them before falling back to lexical search
+    VECTOR_STORE_WAIT_TIMEOUT: float = 2.0
+    # Report not-ready (503) until they are loaded, instead of degraded
+    READINESS_REQUIRE_VECTOR_STORE: bool = False
+    # Also report not-ready while Deepseek is unreachable
+    READINESS_REQUIRE_LLM: bool = False
+
+    # Background dependency probes; health endpoints serve the cached results
+    HEALTH_CHECK_ENABLED: bool = True
+    HEALTH_CHECK_INTERVAL: float = 15.0
+    HEALTH_PROBE_TIMEOUT: float = 5.0
+    # Consecutive failed probes before a dependency is marked degraded
+    HEALTH_FAILURE_THRESHOLD: int = 2
+
+    # Vector sidecar: one process holds the model and Chroma for all
+    # workers (scripts/run_vector_sidecar.py); empty = load in-process
+    VECTOR_SIDECAR_SOCKET: str = ""
+    VECTOR_SIDECAR_TIMEOUT: float = 10.0
+    # How long warm-up waits for the sidecar to load before giving up
+    VECTOR_SIDECAR_STARTUP_TIMEOUT: float = 300.0
+    # Concurrent query encodes the sidecar batches into one model call
+    VECTOR_SIDECAR_MAX_BATCH: int = 64
+
+    # Prometheus /metrics (set PROMETHEUS_MULTIPROC_DIR with several workers)
+    METRICS_ENABLED: bool = True
+
+    # Admin endpoints (X-Admin-Key); admin surfaces are closed while empty
+    ADMIN_API_KEY: str = ""
+
+    # Sampling profiler (/admin/profile and ChatRequest.profile)
+    PROFILING_ENABLED: bool = False
+    PROFILING_INTERVAL_MS: float = 10.0
+    PROFILING_MAX_SECONDS: float = 60.0
+
+    # Tracing: per-turn spans ("none", "jsonl" local file, or "otel")
+    TRACING_ENABLED: bool = True
+    TRACE_EXPORTER: str = "none"
+    TRACE_FILE: str = "./traces/turns.jsonl"
+    # Log a phase breakdown for turns slower than this (0 = off)
+    TRACE_SLOW_TURN_MS: float = 0
+    # Honor ChatRequest.debug; turn off where traces shouldn't reach clients
+    TRACE_DEBUG_ENABLED: bool = True
 
     # Agent Settings
     MAX_TOOL_ITERATIONS: int = 5
+    AGENT_ROUND_TIMEOUT: float = 30.0
+    INTENT_ROUTING_ENABLED: bool = True
+    # Identical concurrent tool calls share one execution; successful
+    # results are reused for TOOL_RESULT_CACHE_TTL seconds (0 = no reuse)
+    TOOL_COALESCING_ENABLED: bool = True
+    TOOL_RESULT_CACHE_TTL: float = 30.0
+    TOOL_RESULT_CACHE_SIZE: int = 1024
+    # Also share identical non-streamed scope-check and planning LLM calls
+    LLM_COALESCING_ENABLED: bool = False
     TEMPERATURE: float = 0.7
     MAX_TOKENS: int = 2000
 
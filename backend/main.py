@@ -4,9 +4,20 @@ from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 import logging
 
-from app.api.routes import chat, health
+from app.api.routes import admin, chat, health, metrics, usage
 from app.services.database import init_db
-from app.services.vector_store import initialize_vector_store
+from app.core.health import get_health_monitor
+from app.core.metrics import MetricsMiddleware, mark_worker_dead
+from app.core.readiness import get_readiness
+from app.core.tracing import setup_tracing
+from app.services.vector_store import (
+    start_vector_store_warm_up,
+    stop_vector_store_warm_up,
+)
+from app.services.stream_buffer import get_stream_manager
+from app.services.persistence import get_conversation_writer
+from app.services.retention import get_retention_service
+from app.services.usage import get_usage_accumulator
 from config import settings
 
 # Configure logging
@@ -23,13 +34,35 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting PartSelect Chat Assistant...")
     try:
+        setup_tracing()
+
         # Initialize database
-        init_db()
+        if not await get_readiness().load("database", init_db):
+            raise RuntimeError("Database initialization failed")
         logger.info("Database initialized")
 
-        # Initialize vector store
-        initialize_vector_store()
-        logger.info("Vector store initialized")
+        # Chroma and the embedding model load while we serve; tools fall
+        # back to lexical search until they are ready
+        warm_up = start_vector_store_warm_up()
+
+        # Probe dependencies in the background; health endpoints serve
+        # the cached results
+        if settings.HEALTH_CHECK_ENABLED:
+            get_health_monitor().start()
+
+        # Evict abandoned stream replay buffers
+        get_stream_manager().start_sweeper()
+
+        # Write-behind conversation persistence
+        get_conversation_writer().start()
+
+        # Periodic token usage flush
+        if settings.USAGE_TRACKING_ENABLED:
+            get_usage_accumulator().start()
+
+        # Expire old conversations
+        if settings.RETENTION_ENABLED:
+            get_retention_service().start(settings.RETENTION_INTERVAL)
 
         logger.info("Application startup complete")
         yield
@@ -39,6 +72,14 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down...")
+    await stop_vector_store_warm_up(warm_up)
+    await get_health_monitor().stop()
+    await get_retention_service().stop()
+    await get_stream_manager().stop()
+    # Cancelled streams record their partial turns, so flush after them
+    await get_conversation_writer().stop()
+    await get_usage_accumulator().stop()
+    mark_worker_dead()
 
 
 app = FastAPI(title=settings.APP_NAME, version=settings.VERSION, lifespan=lifespan)
@@ -50,11 +91,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Stream-ID", "X-Conversation-ID"],
 )
 
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(chat.router, prefix="/api/v1", tags=["chat"])
+app.include_router(usage.router, prefix="/api/v1", tags=["usage"])
+app.include_router(admin.router, prefix="/api/v1", tags=["admin"])
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router, tags=["metrics"])
 
 
 @app.exception_handler(Exception)
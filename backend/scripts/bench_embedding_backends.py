@@ -0,0 +1,125 @@
+# scripts/bench_embedding_backends.py
+"""
+Compare embedding backends on a CPU-only host.
+
+    python scripts/export_onnx.py          # once, to create the ONNX models
+    python scripts/bench_embedding_backends.py --threads 4
+
+Each backend runs in a fresh process so its RSS is measured on its own.
+Reports model load time, single-query latency (p50/p95, the chat path),
+batch throughput (the indexing path) and resident memory.
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from scripts.bench_embeddings import make_documents
+from config import settings
+
+BACKENDS = ("sentence_transformers", "onnx", "onnx-int8")
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def create(backend: str, args):
+    from app.services.embeddings import OnnxBackend, SentenceTransformerBackend
+
+    if backend == "sentence_transformers":
+        return SentenceTransformerBackend(args.model, threads=args.threads)
+    return OnnxBackend(
+        args.onnx_dir, quantized=backend == "onnx-int8", threads=args.threads
+    )
+
+
+def run_backend(backend: str, args) -> dict:
+    """Measure one backend in this process"""
+    queries = make_documents(args.queries, 8, seed=1)
+    documents = make_documents(args.docs, args.words, seed=2)
+    baseline_rss = rss_mb()
+
+    started = time.perf_counter()
+    embedder = create(backend, args)
+    embedder.load()
+    embedder.encode(queries[:4])  # warm-up
+    load_seconds = time.perf_counter() - started
+
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        embedder.encode([query])
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    embedder.encode(documents, batch_size=args.batch_size)
+    throughput = len(documents) / (time.perf_counter() - started)
+
+    return {
+        "backend": backend,
+        "load_s": load_seconds,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1],
+        "docs_per_s": throughput,
+        "rss_mb": rss_mb() - baseline_rss,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding backend benchmark")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--onnx-dir", default=settings.EMBEDDING_ONNX_DIR)
+    parser.add_argument(
+        "--threads", type=int, default=settings.EMBEDDING_THREADS, help="0 = default"
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=30, help="Words per document")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args)))
+        return
+
+    print(
+        f"{os.cpu_count()} CPUs, threads={args.threads or 'default'}, "
+        f"{args.queries} queries, {args.docs} docs x {args.words} words\n"
+    )
+    print(
+        f"{'backend':>22}{'load s':>8}{'p50 ms':>8}{'p95 ms':>8}"
+        f"{'docs/s':>9}{'RSS MB':>8}{'peak MB':>9}"
+    )
+    for backend in args.backends.split(","):
+        result = subprocess.run(
+            [sys.executable, __file__, "--worker", backend, *sys.argv[1:]],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(f"{backend:>22}  failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{r['backend']:>22}{r['load_s']:>8.2f}{r['p50_ms']:>8.2f}"
+            f"{r['p95_ms']:>8.2f}{r['docs_per_s']:>9.0f}{r['rss_mb']:>8.0f}"
+            f"{r['peak_rss_mb']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# scripts/bench_embeddings.py
+"""
+Embedding throughput across process counts on a CPU-only host.
+
+    python scripts/bench_embeddings.py --docs 20000 --workers 1,2,4,8
+
+Encodes the same synthetic catalog with ParallelEmbeddingBuilder at each
+worker count and reports docs/sec and speedup over one worker. Model
+load time is included, as it is in a real build.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.embedding_builder import ParallelEmbeddingBuilder
+from app.services.embeddings import EMBEDDING_BACKENDS
+from config import settings
+
+WORDS = (
+    "refrigerator dishwasher door shelf bin ice maker water filter drain pump "
+    "spray arm gasket hinge valve thermostat rack wheel motor assembly genuine "
+    "oem replacement whirlpool kenmore maytag samsung lg compatible"
+).split()
+
+
+def make_documents(count: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [
+        f"PS{i:08d} " + " ".join(rng.choice(WORDS) for _ in range(words))
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel embedding benchmark")
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=30, help="Words per document")
+    parser.add_argument(
+        "--workers",
+        default=",".join(
+            str(n) for n in (1, 2, 4, 8, 16) if n <= (os.cpu_count() or 1)
+        ),
+        help="Comma-separated worker counts",
+    )
+    parser.add_argument("--shard-size", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument(
+        "--backend",
+        default=settings.EMBEDDING_BACKEND,
+        choices=EMBEDDING_BACKENDS,
+        help="onnx uses EMBEDDING_ONNX_DIR instead of --model",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    documents = make_documents(args.docs, args.words)
+    print(
+        f"{args.docs} docs, {args.backend} model {args.model}, {os.cpu_count()} CPUs, "
+        f"shard size {args.shard_size}\n"
+    )
+    print(f"{'workers':>8}{'seconds':>10}{'docs/s':>10}{'speedup':>10}")
+
+    baseline = None
+    for workers in (int(n) for n in args.workers.split(",")):
+        with tempfile.TemporaryDirectory() as work_dir:
+            builder = ParallelEmbeddingBuilder(
+                model_name=args.model,
+                work_dir=work_dir,
+                workers=workers,
+                shard_size=args.shard_size,
+                batch_size=args.batch_size,
+                backend=args.backend,
+            )
+            started = time.perf_counter()
+            embeddings = builder.build(documents)
+            elapsed = time.perf_counter() - started
+            assert embeddings.shape[0] == len(documents)
+
+        rate = len(documents) / elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8}{elapsed:>10.1f}{rate:>10.0f}{rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
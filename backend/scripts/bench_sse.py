@@ -0,0 +1,90 @@
+# scripts/bench_sse.py
+"""
+Microbenchmark: legacy per-token SSE encoding vs SSEWriter.
+
+    python scripts/bench_sse.py --tokens 20000
+
+Reports output bytes/sec and CPU milliseconds per 1k tokens for each encoder.
+Each run also builds its per-token chunks, as the orchestrator does: a
+validated StreamChunk for the legacy path, a StreamEvent for SSEWriter.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.models.schemas import StreamChunk, StreamEvent
+from app.utils.sse import SSEWriter, orjson
+
+WORDS = "the drain pump on this dishwasher model is easy to replace yourself".split()
+
+
+def make_tokens(tokens: int):
+    return [WORDS[i % len(WORDS)] + " " for i in range(tokens)]
+
+
+async def source(tokens):
+    for token in tokens:
+        yield StreamEvent("text", token)
+
+
+async def legacy(tokens):
+    """What /chat/stream did per token before SSEWriter"""
+    out = 0
+    for token in tokens:
+        chunk = StreamChunk(type="text", content=token)
+        chunk_data = chunk.model_dump(mode="json")
+        out += len(f"data: {json.dumps(chunk_data)}\n\n".encode())
+    return out
+
+
+async def writer(tokens, **kwargs):
+    out = 0
+    async for frame in SSEWriter(**kwargs).stream(source(tokens)):
+        out += len(frame)
+    return out
+
+
+def measure(name, fn, chunks, tokens):
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    size = asyncio.run(fn(chunks))
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    print(
+        f"{name:<32}{size / wall / 1e6:>10.2f} MB/s"
+        f"{cpu * 1000 / (tokens / 1000):>12.3f} ms/1k tok{size:>12} bytes"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE encoder microbenchmark")
+    parser.add_argument("--tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    chunks = make_tokens(args.tokens)
+    print(f"serializer: {'orjson' if orjson else 'json (orjson not installed)'}\n")
+
+    measure("legacy model_dump + json.dumps", legacy, chunks, args.tokens)
+    measure("SSEWriter", writer, chunks, args.tokens)
+    measure(
+        "SSEWriter coalesce 64 chars",
+        lambda c: writer(c, coalesce_chars=64),
+        chunks,
+        args.tokens,
+    )
+    measure(
+        "SSEWriter coalesce 256 chars",
+        lambda c: writer(c, coalesce_chars=256),
+        chunks,
+        args.tokens,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# scripts/export_onnx.py
+"""
+Export the sentence-transformers embedding model to ONNX for the "onnx"
+embedding backend.
+
+    python scripts/export_onnx.py
+    python scripts/export_onnx.py --model all-MiniLM-L6-v2 --out ./onnx_models/all-MiniLM-L6-v2
+
+Writes model.onnx, model.int8.onnx (dynamic int8 quantization, unless
+--no-quantize), tokenizer.json and embedding_config.json, then checks both
+ONNX models against the PyTorch model: every sample sentence must reach
+the stated cosine similarity, or the export fails. Vectors that pass can
+be queried against an index built with the PyTorch backend.
+"""
+
+import argparse
+import inspect
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import torch
+
+from app.services.embeddings import (
+    ONNX_CONFIG,
+    ONNX_MODEL,
+    ONNX_QUANTIZED_MODEL,
+    TOKENIZER,
+    OnnxBackend,
+    SentenceTransformerBackend,
+)
+from config import settings
+
+# Minimum cosine similarity to the PyTorch vector, per sample sentence
+FP32_TOLERANCE = 0.9999
+INT8_TOLERANCE = 0.98
+
+SAMPLES = [
+    "ice maker not working",
+    "PS11752778",
+    "Whirlpool refrigerator water filter replacement",
+    "dishwasher not draining, water left at the bottom of the tub",
+    "Is this part compatible with my WDT780SAEM1 model?",
+    "door shelf bin",
+    "My Kenmore fridge is not cooling but the freezer is fine",
+    "How do I install the lower spray arm on a Bosch dishwasher?",
+    "drain pump motor assembly genuine OEM",
+    "gasket",
+]
+
+
+class TokenEmbeddings(torch.nn.Module):
+    """Wraps the Hugging Face model so the graph returns token embeddings only"""
+
+    def __init__(self, auto_model):
+        super().__init__()
+        self.model = auto_model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        kwargs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if token_type_ids is not None:
+            kwargs["token_type_ids"] = token_type_ids
+        return self.model(**kwargs)[0]
+
+
+def export(model_name: str, out: Path, opset: int) -> dict:
+    from sentence_transformers import SentenceTransformer, models
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling = next(m for m in model if isinstance(m, models.Pooling))
+    if not (pooling.pooling_mode_mean_tokens or pooling.pooling_mode_cls_token):
+        sys.exit("Only mean or CLS pooling can be exported")
+
+    tokenizer = transformer.tokenizer
+    uses_token_types = "token_type_ids" in tokenizer.model_input_names
+    input_names = ["input_ids", "attention_mask"] + (
+        ["token_type_ids"] if uses_token_types else []
+    )
+    dummy = tokenizer(["an example query"], return_tensors="pt")
+    args = tuple(dummy[name] for name in input_names)
+
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # The TorchScript exporter handles dynamic axes without onnxscript
+        export_kwargs["dynamo"] = False
+
+    out.mkdir(parents=True, exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            TokenEmbeddings(transformer.auto_model).eval(),
+            args,
+            str(out / ONNX_MODEL),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                **{name: {0: "batch", 1: "sequence"} for name in input_names},
+                "token_embeddings": {0: "batch", 1: "sequence"},
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            **export_kwargs,
+        )
+
+    tokenizer.backend_tokenizer.save(str(out / TOKENIZER))
+    config = {
+        "source_model": model_name,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": "cls" if pooling.pooling_mode_cls_token else "mean",
+        "normalize": any(isinstance(m, models.Normalize) for m in model),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    (out / ONNX_CONFIG).write_text(json.dumps(config, indent=2))
+    return config
+
+
+def quantize(out: Path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        str(out / ONNX_MODEL),
+        str(out / ONNX_QUANTIZED_MODEL),
+        weight_type=QuantType.QInt8,
+    )
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def verify(model_name: str, out: Path, quantized: bool) -> bool:
+    reference = SentenceTransformerBackend(model_name)
+    reference.load()
+    expected = reference.encode(SAMPLES)
+
+    passed = True
+    checks = [(False, FP32_TOLERANCE)] + ([(True, INT8_TOLERANCE)] if quantized else [])
+    for use_int8, tolerance in checks:
+        backend = OnnxBackend(str(out), quantized=use_int8)
+        backend.load()
+        similarity = cosine(backend.encode(SAMPLES), expected)
+        ok = bool(similarity.min() >= tolerance)
+        passed &= ok
+        print(
+            f"{backend.name:>10}: min cosine {similarity.min():.6f}, "
+            f"mean {similarity.mean():.6f} (tolerance {tolerance}) "
+            f"{'OK' if ok else 'FAILED'}"
+        )
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL)
+    parser.add_argument("--out", default=settings.EMBEDDING_ONNX_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument(
+        "--no-quantize", action="store_true", help="Skip the int8 model"
+    )
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    config = export(args.model, out, args.opset)
+    print(f"Exported {args.model} to {out / ONNX_MODEL}: {config}")
+    if not args.no_quantize:
+        quantize(out)
+        print(f"Quantized to {out / ONNX_QUANTIZED_MODEL}")
+
+    for name in (ONNX_MODEL, ONNX_QUANTIZED_MODEL):
+        if (out / name).exists():
+            print(f"{name}: {(out / name).stat().st_size / 1e6:.1f} MB")
+
+    if not verify(args.model, out, quantized=not args.no_quantize):
+        sys.exit("ONNX output differs from the PyTorch model beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+# scripts/load_benchmark.py
+"""
+End-to-end load generator for the chat endpoints.
+
+    python scripts/load_benchmark.py --url http://localhost:8000 \\
+        --endpoint both --concurrency 32 --duration 30
+
+Reports requests/sec, latency, time-to-first-chunk, inter-chunk latency and
+time to the first chunk of each type ("phase") with p50/p95/p99.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    "PS11752778",
+    "Is W10190965 compatible with WRF555SDFZ?",
+    "The ice maker on my Whirlpool fridge is not working. How can I fix it?",
+    "My dishwasher is not draining",
+    "How can I install part number PS11752778?",
+]
+
+
+def percentile(samples: List[float], pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Results:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.ttfc: List[float] = []
+        self.inter_chunk: List[float] = []
+        self.phases: Dict[str, List[float]] = defaultdict(list)
+        self.chunks = 0
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Optional[float]]]:
+        def stats(samples: List[float]) -> Dict[str, Optional[float]]:
+            return {
+                "count": len(samples),
+                "p50_ms": _ms(percentile(samples, 50)),
+                "p95_ms": _ms(percentile(samples, 95)),
+                "p99_ms": _ms(percentile(samples, 99)),
+            }
+
+        report = {
+            "totals": {
+                "requests": self.requests,
+                "errors": self.errors,
+                "elapsed_s": round(elapsed, 2),
+                "requests_per_sec": round(self.requests / elapsed, 2) if elapsed else None,
+                "chunks": self.chunks,
+            },
+            "time_to_first_chunk": stats(self.ttfc),
+            "inter_chunk": stats(self.inter_chunk),
+        }
+        for endpoint, samples in self.latencies.items():
+            report[f"latency.{endpoint}"] = stats(samples)
+        for phase, samples in sorted(self.phases.items()):
+            report[f"phase.{phase}"] = stats(samples)
+        return report
+
+
+def _ms(value: Optional[float]) -> Optional[float]:
+    return round(value * 1000, 1) if value is not None else None
+
+
+async def run_message(client: httpx.AsyncClient, message: str, results: Results):
+    started = time.perf_counter()
+    response = await client.post("/api/v1/chat/message", json={"message": message})
+    response.raise_for_status()
+    results.latencies["message"].append(time.perf_counter() - started)
+
+
+async def run_stream(client: httpx.AsyncClient, message: str, results: Results):
+    started = time.perf_counter()
+    last_chunk = None
+    seen_types = set()
+
+    async with client.stream(
+        "POST", "/api/v1/chat/stream", json={"message": message}
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            now = time.perf_counter()
+            chunk = json.loads(line[6:])
+            results.chunks += 1
+
+            if last_chunk is None:
+                results.ttfc.append(now - started)
+            else:
+                results.inter_chunk.append(now - last_chunk)
+            last_chunk = now
+
+            chunk_type = chunk.get("type", "unknown")
+            if chunk_type not in seen_types:
+                seen_types.add(chunk_type)
+                results.phases[chunk_type].append(now - started)
+
+            if chunk_type == "error":
+                raise RuntimeError(chunk.get("content"))
+
+    results.latencies["stream"].append(time.perf_counter() - started)
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    endpoints: List[str],
+    messages: List[str],
+    results: Results,
+    deadline: float,
+    remaining: Optional[List[int]],
+):
+    while time.perf_counter() < deadline:
+        if remaining is not None:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+
+        endpoint = random.choice(endpoints)
+        message = random.choice(messages)
+        try:
+            if endpoint == "message":
+                await run_message(client, message, results)
+            else:
+                await run_stream(client, message, results)
+        except Exception as e:
+            results.errors += 1
+            print(f"[{endpoint}] request failed: {e}")
+        finally:
+            results.requests += 1
+
+
+async def run(args: argparse.Namespace):
+    endpoints = ["message", "stream"] if args.endpoint == "both" else [args.endpoint]
+    messages = DEFAULT_MESSAGES
+    if args.messages:
+        with open(args.messages, "r") as f:
+            messages = [line.strip() for line in f if line.strip()]
+
+    results = Results()
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    remaining = [args.requests] if args.requests else None
+
+    async with httpx.AsyncClient(
+        base_url=args.url, timeout=args.timeout, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(
+                worker(client, endpoints, messages, results, deadline, remaining)
+                for _ in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+
+    report = results.summary(elapsed)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"\n{'metric':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in report.items():
+        if name == "totals":
+            continue
+        print(
+            f"{name:<28}{row['count']:>8}"
+            + "".join(f"{str(row[k]):>10}" for k in ("p50_ms", "p95_ms", "p99_ms"))
+        )
+    totals = report["totals"]
+    print(
+        f"\n{totals['requests']} requests ({totals['errors']} errors) in "
+        f"{totals['elapsed_s']}s -> {totals['requests_per_sec']} req/s, "
+        f"{totals['chunks']} chunks"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for the chat API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", choices=["message", "stream", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after N requests (0 = duration only)")
+    parser.add_argument("--messages", help="File with one message per line")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
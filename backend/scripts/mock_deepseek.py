@@ -0,0 +1,275 @@
+# scripts/mock_deepseek.py
+"""
+OpenAI-compatible fake Deepseek server for local benchmarking.
+
+Point the backend at it with DEEPSEEK_BASE_URL=http://localhost:9000 and run:
+
+    python scripts/mock_deepseek.py --port 9000 --latency 0.3 --tokens-per-sec 80
+
+Tool-call scripts are JSON lists of rules; the first rule whose `match` regex
+finds the last user message produces the given tool calls, e.g.
+
+    [{"match": "PS\\\\d{8}", "tool_calls": [{"name": "product_search",
+      "arguments": {"query": "PS11752778"}}]}]
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_ANSWER = (
+    "Thanks for reaching out! Based on what you described, the part you are "
+    "looking for is available and ships quickly. Let me know your model number "
+    "and I can double check compatibility for you."
+)
+
+
+class MockConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.latency = args.latency
+        self.latency_jitter = args.latency_jitter
+        self.tokens_per_sec = args.tokens_per_sec
+        self.answer_tokens = args.answer_tokens
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.retry_after = args.retry_after
+        self.tool_rules = self._load_tool_script(args.tool_script)
+
+    @staticmethod
+    def _load_tool_script(path: Optional[str]) -> List[Dict[str, Any]]:
+        if not path:
+            return []
+        with open(path, "r") as f:
+            rules = json.load(f)
+        for rule in rules:
+            rule["pattern"] = re.compile(rule["match"], re.I)
+        return rules
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock Deepseek")
+    stats = {"requests": 0, "streams": 0, "errors_injected": 0}
+    # First messages seen so far, to mimic Deepseek's prefix context cache
+    seen_prefixes = set()
+
+    def pick_tool_calls(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Only plan tools when tools are offered and the user spoke last"""
+        messages = payload.get("messages") or []
+        if not payload.get("tools") or not messages:
+            return []
+        if messages[-1].get("role") != "user":
+            return []
+
+        text = messages[-1].get("content") or ""
+        for rule in config.tool_rules:
+            if rule["pattern"].search(text):
+                return [
+                    {
+                        "id": f"call_{uuid4().hex[:12]}",
+                        "type": "function",
+                        "function": {
+                            "name": call["name"],
+                            "arguments": json.dumps(call.get("arguments", {})),
+                        },
+                    }
+                    for call in rule["tool_calls"]
+                ]
+        return []
+
+    def answer_tokens(payload: Dict[str, Any]) -> List[str]:
+        messages = payload.get("messages") or []
+        if messages and "IN_SCOPE" in (messages[-1].get("content") or ""):
+            # The orchestrator's guard-rail prompt
+            return ["IN_SCOPE"]
+
+        words = DEFAULT_ANSWER.split(" ")
+        tokens = []
+        while len(tokens) < config.answer_tokens:
+            tokens.extend(f"{w} " for w in words)
+        return tokens[: config.answer_tokens]
+
+    def usage(prompt: Dict[str, Any], completion_tokens: int) -> Dict[str, int]:
+        messages = prompt.get("messages") or []
+        prompt_tokens = sum(len((m.get("content") or "").split()) for m in messages)
+        prefix = (messages[0].get("content") or "") if messages else ""
+        cached = len(prefix.split()) if prefix in seen_prefixes else 0
+        seen_prefixes.add(prefix)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_cache_hit_tokens": cached,
+            "prompt_cache_miss_tokens": prompt_tokens - cached,
+        }
+
+    async def simulate_latency():
+        delay = config.latency + random.uniform(0, config.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def injected_error() -> Optional[JSONResponse]:
+        if config.error_rate and random.random() < config.error_rate:
+            stats["errors_injected"] += 1
+            headers = {}
+            if config.retry_after is not None:
+                headers["Retry-After"] = str(config.retry_after)
+            return JSONResponse(
+                status_code=config.error_status,
+                content={"error": {"message": "injected failure"}},
+                headers=headers,
+            )
+        return None
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        stats["requests"] += 1
+
+        await simulate_latency()
+        error = injected_error()
+        if error is not None:
+            return error
+
+        tool_calls = pick_tool_calls(payload)
+        completion_id = f"chatcmpl-{uuid4().hex[:12]}"
+
+        if payload.get("stream"):
+            stats["streams"] += 1
+            return StreamingResponse(
+                stream_chunks(payload, completion_id, tool_calls),
+                media_type="text/event-stream",
+            )
+
+        tokens = [] if tool_calls else answer_tokens(payload)
+        message: Dict[str, Any] = {"role": "assistant", "content": "".join(tokens)}
+        if tool_calls:
+            message["tool_calls"] = tool_calls
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "deepseek-chat"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                }
+            ],
+            "usage": usage(payload, len(tokens)),
+        }
+
+    async def stream_chunks(
+        payload: Dict[str, Any], completion_id: str, tool_calls: List[Dict[str, Any]]
+    ):
+        def frame(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": payload.get("model", "deepseek-chat"),
+                "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                ],
+                **extra,
+            }
+            return f"data: {json.dumps(chunk)}\n\n"
+
+        interval = 1.0 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+        yield frame({"role": "assistant", "content": ""})
+
+        if tool_calls:
+            # Emit arguments in small fragments like the real API does
+            for index, call in enumerate(tool_calls):
+                yield frame(
+                    {
+                        "tool_calls": [
+                            {
+                                "index": index,
+                                "id": call["id"],
+                                "type": "function",
+                                "function": {"name": call["function"]["name"], "arguments": ""},
+                            }
+                        ]
+                    }
+                )
+                arguments = call["function"]["arguments"]
+                for start in range(0, len(arguments), 8):
+                    if interval:
+                        await asyncio.sleep(interval)
+                    yield frame(
+                        {
+                            "tool_calls": [
+                                {
+                                    "index": index,
+                                    "function": {"arguments": arguments[start : start + 8]},
+                                }
+                            ]
+                        }
+                    )
+            completion_tokens = 0
+            finish_reason = "tool_calls"
+        else:
+            tokens = answer_tokens(payload)
+            for token in tokens:
+                if interval:
+                    await asyncio.sleep(interval)
+                yield frame({"content": token})
+            completion_tokens = len(tokens)
+            finish_reason = "stop"
+
+        yield frame({}, finish_reason)
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            yield (
+                "data: "
+                + json.dumps(
+                    {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "choices": [],
+                        "usage": usage(payload, completion_tokens),
+                    }
+                )
+                + "\n\n"
+            )
+        yield "data: [DONE]\n\n"
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "deepseek-chat", "object": "model"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible Deepseek server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first byte")
+    parser.add_argument("--latency-jitter", type=float, default=0.0, help="Extra random latency (seconds)")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Streaming token rate (0 = unthrottled)")
+    parser.add_argument("--answer-tokens", type=int, default=60, help="Tokens per generated answer")
+    parser.add_argument("--tool-script", help="JSON file with tool-call rules")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header on injected errors")
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(MockConfig(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# scripts/profile_startup.py
+"""
+Import-time profile of the app's startup path.
+
+    python scripts/profile_startup.py
+    python scripts/profile_startup.py --module app.tools.product_search --top 30
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter
+and prints the total import time, the slowest imports (cumulative), and
+whether the heavy vector-store dependencies were pulled in.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Modules that should only load in the background warm-up
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "chromadb")
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(module: str):
+    """(module, self µs, cumulative µs, depth) for every import"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile startup import time")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    total = sum(self_us for _, self_us, _, _ in rows)
+    print(f"import {args.module}: {total / 1000:.0f} ms, {len(rows)} modules\n")
+
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for name, self_us, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[
+        : args.top
+    ]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    loaded = {name.split(".")[0] for name, _, _, _ in rows}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    print(f"\nheavy modules imported at startup: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
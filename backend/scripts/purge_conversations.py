@@ -0,0 +1,70 @@
+# scripts/purge_conversations.py
+"""
+Purge expired conversations according to the retention policy.
+
+    python scripts/purge_conversations.py --dry-run
+    python scripts/purge_conversations.py --mode inactivity --days 30
+
+Defaults come from the RETENTION_* settings.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.retention import RETENTION_MODES, RetentionPolicy, RetentionService
+from config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purge expired conversations")
+    parser.add_argument(
+        "--mode", choices=RETENTION_MODES, default=settings.RETENTION_MODE
+    )
+    parser.add_argument("--days", type=float, default=settings.RETENTION_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.RETENTION_BATCH_SIZE)
+    parser.add_argument(
+        "--pause",
+        type=float,
+        default=settings.RETENTION_BATCH_PAUSE,
+        help="Seconds to sleep between batches",
+    )
+    parser.add_argument(
+        "--max-batches", type=int, default=None, help="Stop after N batches"
+    )
+    parser.add_argument(
+        "--partitioned",
+        action="store_true",
+        default=settings.RETENTION_PARTITIONED,
+        help="Also drop expired monthly partitions (PostgreSQL)",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what would be deleted"
+    )
+    args = parser.parse_args()
+
+    service = RetentionService(
+        RetentionPolicy(args.mode, args.days),
+        batch_size=args.batch_size,
+        pause=args.pause,
+        partitioned=args.partitioned,
+    )
+
+    report = service.report()
+    print(json.dumps(report, indent=2))
+    if args.dry_run:
+        return
+
+    totals = service.purge(max_batches=args.max_batches)
+    print(json.dumps(totals, indent=2))
+
+
+if __name__ == "__main__":
+    main()
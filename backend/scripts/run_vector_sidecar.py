@@ -0,0 +1,78 @@
+# scripts/run_vector_sidecar.py
+"""
+Run the embedding model and Chroma in one process shared by all API workers.
+
+    python scripts/run_vector_sidecar.py --socket /tmp/partselect-vectors.sock
+    VECTOR_SIDECAR_SOCKET=/tmp/partselect-vectors.sock \\
+        uvicorn main:app --workers 4
+
+Workers started with VECTOR_SIDECAR_SOCKET query the sidecar over the Unix
+socket instead of loading their own model and Chroma client.
+
+    python scripts/run_vector_sidecar.py --socket ... --ping "ice maker"
+
+checks a running sidecar from the command line: it prints its status and
+the round-trip latency of an encode and a product search.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.vector_sidecar import VectorSidecarClient, VectorSidecarServer
+from config import settings
+
+logging.basicConfig(
+    level=getattr(logging, settings.LOG_LEVEL),
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+
+def ping(socket_path: str, query: str, rounds: int):
+    client = VectorSidecarClient(socket_path)
+    print(json.dumps(client.status(), indent=2))
+
+    for name, call in (
+        ("encode", lambda: client.encode([query])),
+        ("search_products", lambda: client.search_products(query)),
+    ):
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            call()
+            timings.append((time.perf_counter() - started) * 1000)
+        print(
+            f"{name}: p50 {statistics.median(timings):.2f} ms, "
+            f"max {max(timings):.2f} ms over {rounds} calls"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vector search sidecar")
+    parser.add_argument(
+        "--socket",
+        default=settings.VECTOR_SIDECAR_SOCKET or "/tmp/partselect-vectors.sock",
+    )
+    parser.add_argument("--ping", metavar="QUERY", help="Query a running sidecar")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.ping:
+        ping(args.socket, args.ping, args.rounds)
+        return
+
+    try:
+        asyncio.run(VectorSidecarServer(args.socket).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
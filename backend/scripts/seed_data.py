@@ -1,138 +1,67 @@
 import sys
 import os
-import json
+import argparse
+import asyncio
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.services.database import SessionLocal, init_db
-from app.services.vector_store import get_vector_store
-from app.models.database_models import Product, Compatibility
+from app.services.database import init_db
+from app.services.vector_store import get_local_vector_store
+from app.services.ingestion import (
+    ingest_compatibility,
+    ingest_products,
+    iter_records,
+)
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def load_json(filename):
-    """Load JSON file from data directory"""
-    data_dir = Path(__file__).parent.parent / "data"
-    file_path = data_dir / filename
+DATA_DIR = Path(__file__).parent.parent / "data"
 
-    with open(file_path, "r") as f:
-        return json.load(f)
 
+def _log_stats(stats):
+    summary = stats.summary()
+    logger.info(
+        f"{stats.name}: {summary['rows']} rows "
+        f"({summary['inserted_or_updated']} inserted/updated, "
+        f"{summary['unchanged']} unchanged, {summary['skipped']} skipped, "
+        f"{summary['deleted']} deleted) "
+        f"in {summary['seconds']}s, {summary['rows_per_sec']} rows/sec"
+    )
 
-def seed_products():
-    """Seed products into database"""
-    db = SessionLocal()
 
-    try:
-        # Check if products already exist
-        existing_count = db.query(Product).count()
-        if existing_count > 0:
-            logger.info(
-                f"Database already contains {existing_count} products. Skipping seed."
-            )
-            return
-
-        # Load products from JSON
-        data = load_json("products.json")
-        products = data["products"]
-
-        # Add products to database
-        for product_data in products:
-            product = Product(
-                part_number=product_data["part_number"],
-                name=product_data["name"],
-                description=product_data["description"],
-                price=product_data["price"],
-                image_url=product_data["image_url"],
-                category=product_data["category"],
-                appliance_type=product_data["appliance_type"],
-                brand=product_data["brand"],
-                in_stock=product_data["in_stock"],
-            )
-            db.add(product)
-
-        db.commit()
-        logger.info(f"Successfully seeded {len(products)} products")
+def seed_products(path=None, batch_size=None, prune=True):
+    """Upsert products; re-running applies only what changed"""
+    stats = asyncio.run(
+        ingest_products(path or DATA_DIR / "products.json", batch_size, prune)
+    )
+    _log_stats(stats)
 
-    except Exception as e:
-        logger.error(f"Error seeding products: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
 
+def seed_compatibility(path=None, batch_size=None, prune=True):
+    """Upsert compatibility rows for products already in the database"""
+    stats = asyncio.run(
+        ingest_compatibility(path or DATA_DIR / "compatibility.json", batch_size, prune)
+    )
+    _log_stats(stats)
 
-def seed_compatibility():
-    """Seed compatibility data into database"""
-    db = SessionLocal()
 
+def seed_vector_store(products_path=None, prune=True):
+    """Sync the vector store with products and troubleshooting docs"""
     try:
-        # Check if compatibility data already exists
-        existing_count = db.query(Compatibility).count()
-        if existing_count > 0:
-            logger.info(
-                f"Database already contains {existing_count} compatibility records. Skipping seed."
-            )
-            return
-
-        # Load compatibility data
-        data = load_json("compatibility.json")
-        compatibility_data = data["compatibility"]
-
-        # Add compatibility records
-        for compat_data in compatibility_data:
-            part_number = compat_data["part_number"]
-
-            # Find product
-            product = (
-                db.query(Product).filter(Product.part_number == part_number).first()
-            )
-
-            if not product:
-                logger.warning(
-                    f"Product {part_number} not found, skipping compatibility"
-                )
-                continue
-
-            # Add compatibility for each model
-            for model_number in compat_data["model_numbers"]:
-                compatibility = Compatibility(
-                    product_id=product.id,
-                    model_number=model_number.upper(),
-                    brand=compat_data["brand"],
-                    appliance_type=compat_data["appliance_type"],
-                )
-                db.add(compatibility)
+        vector_store = get_local_vector_store()
 
-        db.commit()
-        logger.info("Successfully seeded compatibility data")
-
-    except Exception as e:
-        logger.error(f"Error seeding compatibility: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
-
-
-def seed_vector_store():
-    """Seed vector store with products and troubleshooting docs"""
-    try:
-        vector_store = get_vector_store()
-
-        # Load and add products
-        data = load_json("products.json")
-        products = data["products"]
-        vector_store.add_products(products)
-        logger.info(f"Added {len(products)} products to vector store")
+        # Stream products; only new or changed ones are embedded
+        products = iter_records(products_path or DATA_DIR / "products.json", "products")
+        stats = vector_store.sync_products(products, prune=prune)
+        logger.info(f"Synced products to vector store: {stats}")
 
         # Load and add troubleshooting docs
-        data_dir = Path(__file__).parent.parent / "data" / "troubleshooting"
+        data_dir = DATA_DIR / "troubleshooting"
         troubleshooting_docs = []
 
         for txt_file in data_dir.glob("*.txt"):
@@ -155,6 +84,7 @@ def seed_vector_store():
 
                 troubleshooting_docs.append(
                     {
+                        "source": txt_file.name,
                         "title": title or txt_file.stem,
                         "content": content,
                         "category": category,
@@ -162,10 +92,10 @@ def seed_vector_store():
                     }
                 )
 
-        vector_store.add_troubleshooting_docs(troubleshooting_docs)
-        logger.info(
-            f"Added {len(troubleshooting_docs)} troubleshooting docs to vector store"
+        stats = vector_store.sync_troubleshooting_docs(
+            troubleshooting_docs, prune=prune
         )
+        logger.info(f"Synced troubleshooting docs to vector store: {stats}")
 
     except Exception as e:
         logger.error(f"Error seeding vector store: {e}")
@@ -174,15 +104,30 @@ def seed_vector_store():
 
 def main():
     """Main seeding function"""
+    parser = argparse.ArgumentParser(description="Seed the catalog")
+    parser.add_argument("--products", help="products JSON or NDJSON file")
+    parser.add_argument("--compatibility", help="compatibility JSON or NDJSON file")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument(
+        "--skip-vectors", action="store_true", help="Only seed the database"
+    )
+    parser.add_argument(
+        "--no-prune",
+        action="store_true",
+        help="Keep rows missing from the files (for partial updates)",
+    )
+    args = parser.parse_args()
+
     logger.info("Starting database seeding...")
 
     # Initialize database
     init_db()
 
     # Seed data
-    seed_products()
-    seed_compatibility()
-    seed_vector_store()
+    seed_products(args.products, args.batch_size, not args.no_prune)
+    seed_compatibility(args.compatibility, args.batch_size, not args.no_prune)
+    if not args.skip_vectors:
+        seed_vector_store(args.products, not args.no_prune)
 
     logger.info("Database seeding complete!")
 
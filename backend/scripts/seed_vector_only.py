@@ -4,7 +4,7 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from app.services.vector_store import get_vector_store
+from app.services.vector_store import get_local_vector_store
 import json
 from pathlib import Path
 import logging
@@ -17,7 +17,7 @@ def seed_vector_store():
     """Seed vector store with products and troubleshooting docs"""
     try:
         logger.info("Initializing vector store...")
-        vector_store = get_vector_store()
+        vector_store = get_local_vector_store()
 
         # Load and add products
         logger.info("Loading products...")
@@ -28,9 +28,9 @@ def seed_vector_store():
             data = json.load(f)
             products = data["products"]
 
-        logger.info(f"Adding {len(products)} products to vector store...")
-        vector_store.add_products(products)
-        logger.info(f"✓ Added {len(products)} products to vector store")
+        logger.info(f"Syncing {len(products)} products to vector store...")
+        stats = vector_store.sync_products(products)
+        logger.info(f"✓ Synced products to vector store: {stats}")
 
         # Load and add troubleshooting docs
         logger.info("Loading troubleshooting docs...")
@@ -65,6 +65,7 @@ def seed_vector_store():
                         appliance_type = line.replace("Appliance:", "").strip().lower()
 
                 doc = {
+                    "source": txt_file.name,
                     "title": title or txt_file.stem,
                     "content": content,
                     "category": category,
@@ -77,12 +78,10 @@ def seed_vector_store():
 
         if troubleshooting_docs:
             logger.info(
-                f"Adding {len(troubleshooting_docs)} troubleshooting docs to vector store..."
-            )
-            vector_store.add_troubleshooting_docs(troubleshooting_docs)
-            logger.info(
-                f"✓ Added {len(troubleshooting_docs)} troubleshooting docs to vector store"
+                f"Syncing {len(troubleshooting_docs)} troubleshooting docs to vector store..."
             )
+            stats = vector_store.sync_troubleshooting_docs(troubleshooting_docs)
+            logger.info(f"✓ Synced troubleshooting docs to vector store: {stats}")
         else:
             logger.warning("No troubleshooting docs found!")
 
@@ -0,0 +1,77 @@
+# scripts/usage_report.py
+"""
+Token usage and estimated cost from the token_usage table.
+
+    python scripts/usage_report.py                       # per phase, last 7 days
+    python scripts/usage_report.py --group-by day,phase --days 30
+    python scripts/usage_report.py --group-by conversation --limit 20
+    python scripts/usage_report.py --conversation-id <id> --group-by phase
+
+Prices come from the LLM_PRICE_* settings.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.usage import usage_report
+
+COLUMNS = (
+    ("calls", 7, "d"),
+    ("prompt_tokens", 12, "d"),
+    ("completion_tokens", 12, "d"),
+    ("cached_tokens", 12, "d"),
+    ("cache_hit_ratio", 7, ".1%"),
+    ("cost_usd", 11, ".4f"),
+)
+HEADERS = ("calls", "prompt", "completion", "cached", "hit", "cost $")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token usage and cost report")
+    parser.add_argument(
+        "--group-by", default="phase", help="conversation,phase,day,model"
+    )
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--conversation-id")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Print raw JSON")
+    args = parser.parse_args()
+
+    group_by = [name.strip() for name in args.group_by.split(",")]
+    try:
+        report = usage_report(
+            group_by,
+            days=args.days,
+            conversation_id=args.conversation_id,
+            limit=args.limit,
+        )
+    except ValueError as e:
+        sys.exit(str(e))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    key_width = max(
+        [len(" / ".join(group_by))]
+        + [len(" / ".join(str(row[n]) for n in group_by)) for row in report["rows"]]
+    )
+    print(f"Since {report['since']}\n")
+    print(
+        f"{' / '.join(group_by):<{key_width}}"
+        + "".join(f"{h:>{w}}" for h, (_, w, _) in zip(HEADERS, COLUMNS))
+    )
+    lines = [(" / ".join(str(row[n]) for n in group_by), row) for row in report["rows"]]
+    for label, row in lines + [("total", report["totals"])]:
+        print(
+            f"{label:<{key_width}}"
+            + "".join(f"{row[field]:>{w}{fmt}}" for field, w, fmt in COLUMNS)
+        )
+
+
+if __name__ == "__main__":
+    main()
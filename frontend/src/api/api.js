@@ -1,5 +1,14 @@
 const API_BASE_URL = 'http://localhost:8000/api/v1';
 
+// Once the server has assigned a conversation id it keeps the context,
+// so later turns only send the new message
+let conversationId = null;
+
+const chatRequestBody = (userQuery, conversationHistory) =>
+    conversationId
+        ? { message: userQuery, conversation_id: conversationId }
+        : { message: userQuery, conversation_history: conversationHistory };
+
 /**
  * Send message and get complete response (non-streaming)
  */
@@ -10,10 +19,7 @@ export const getAIMessage = async (userQuery, conversationHistory = []) => {
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                message: userQuery,
-                conversation_history: conversationHistory,
-            }),
+            body: JSON.stringify(chatRequestBody(userQuery, conversationHistory)),
         });
 
         if (!response.ok) {
@@ -21,6 +27,7 @@ export const getAIMessage = async (userQuery, conversationHistory = []) => {
         }
 
         const data = await response.json();
+        conversationId = data.conversation_id || conversationId;
 
         // Format response
         return {
@@ -50,16 +57,15 @@ export const streamAIMessage = async (userQuery, conversationHistory = [], onChu
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({
-                message: userQuery,
-                conversation_history: conversationHistory,
-            }),
+            body: JSON.stringify(chatRequestBody(userQuery, conversationHistory)),
         });
 
         if (!response.ok) {
             throw new Error(`API error: ${response.status}`);
         }
 
+        conversationId = response.headers.get('X-Conversation-ID') || conversationId;
+
         const reader = response.body.getReader();
         const decoder = new TextDecoder();
 
@@ -11,8 +11,10 @@ CREATE INDEX IF NOT EXISTS idx_products_appliance_type ON products(appliance_typ
 -- Create compatibility indexes
 CREATE INDEX IF NOT EXISTS idx_compatibility_model_number ON compatibility(model_number);
 CREATE INDEX IF NOT EXISTS idx_compatibility_product_id ON compatibility(product_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_compatibility_product_model ON compatibility(product_id, model_number);
 
 -- Create conversations indexes
 CREATE INDEX IF NOT EXISTS idx_conversations_conversation_id ON conversations(conversation_id);
 CREATE INDEX IF NOT EXISTS idx_messages_conversation_id ON messages(conversation_id);
-CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_messages_timestamp ON messages(timestamp);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_timestamp_id ON messages(conversation_id, timestamp, id);
@@ -0,0 +1,20 @@
+-- Add the (product_id, model_number) natural key that catalog ingestion
+-- upserts on. New databases get it from init.sql; run this once on
+-- databases created before it:
+--
+--   psql -U partselect_admin -d partselect_db -f postgres/migrate_compatibility_unique.sql
+--
+-- Duplicate rows are removed first, keeping the oldest of each pair.
+
+BEGIN;
+
+DELETE FROM compatibility duplicate
+USING compatibility original
+WHERE duplicate.product_id = original.product_id
+  AND duplicate.model_number = original.model_number
+  AND duplicate.id > original.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_compatibility_product_model
+    ON compatibility(product_id, model_number);
+
+COMMIT;
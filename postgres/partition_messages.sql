@@ -0,0 +1,93 @@
+-- Optional: partition messages by month on "timestamp"
+--
+-- With monthly partitions, retention drops whole months of messages
+-- instead of deleting row by row. Run once, in a maintenance window:
+--
+--   psql -U partselect_admin -d partselect_db -f postgres/partition_messages.sql
+--
+-- then set RETENTION_PARTITIONED=true. Partition drops are age-based on
+-- message timestamps, even when RETENTION_MODE=inactivity.
+
+BEGIN;
+
+-- Create monthly partitions from start_from's month through months_ahead months from now
+CREATE OR REPLACE FUNCTION create_message_partitions(
+    start_from date DEFAULT now()::date,
+    months_ahead integer DEFAULT 3
+) RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    month_start date := date_trunc('month', start_from)::date;
+    last_month date := (date_trunc('month', now()) + make_interval(months => months_ahead))::date;
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := format('messages_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF messages FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, (month_start + interval '1 month')::date
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + interval '1 month')::date;
+    END LOOP;
+    RETURN created;
+END $$;
+
+-- Drop monthly partitions that end on or before the cutoff
+CREATE OR REPLACE FUNCTION drop_message_partitions_before(cutoff timestamp)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    part record;
+    dropped integer := 0;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'messages'::regclass
+          AND c.relname ~ '^messages_[0-9]{4}_[0-9]{2}$'
+    LOOP
+        IF to_date(substr(part.relname, 10), 'YYYY_MM') + interval '1 month' <= cutoff THEN
+            EXECUTE format('DROP TABLE %I', part.relname);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END $$;
+
+-- Swap in a partitioned table, keeping ids and the existing sequence
+ALTER TABLE messages RENAME TO messages_unpartitioned;
+ALTER SEQUENCE messages_id_seq OWNED BY NONE;
+
+CREATE TABLE messages (
+    id integer NOT NULL DEFAULT nextval('messages_id_seq'),
+    conversation_id integer NOT NULL REFERENCES conversations(id),
+    role varchar NOT NULL,
+    content text NOT NULL,
+    message_metadata json,
+    "timestamp" timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+    PRIMARY KEY (id, "timestamp")
+) PARTITION BY RANGE ("timestamp");
+
+-- Catches rows outside the pre-created months
+CREATE TABLE messages_default PARTITION OF messages DEFAULT;
+
+SELECT create_message_partitions(
+    COALESCE((SELECT min("timestamp") FROM messages_unpartitioned)::date, now()::date)
+);
+
+INSERT INTO messages (id, conversation_id, role, content, message_metadata, "timestamp")
+SELECT id, conversation_id, role, content, message_metadata,
+       COALESCE("timestamp", now() AT TIME ZONE 'utc')
+FROM messages_unpartitioned;
+
+DROP TABLE messages_unpartitioned;
+ALTER SEQUENCE messages_id_seq OWNED BY messages.id;
+
+CREATE INDEX idx_messages_conversation_id ON messages(conversation_id);
+CREATE INDEX idx_messages_timestamp ON messages("timestamp");
+CREATE INDEX idx_messages_conversation_timestamp_id ON messages(conversation_id, "timestamp", id);
+
+COMMIT;